@@ -0,0 +1,91 @@
+"""
+benchmarks/chain_build.py
+-------------------------
+Micro-benchmark for chain construction in models/chains.py.
+
+Measures the per-request cost of each build_*_chain() call against a single
+LLM instance (what every ATS / optimize / parse request pays before the
+provider is even contacted). No network calls are made — the client is built
+with a dummy key. With --against, the same builders are timed as they were at
+another git revision.
+
+Usage (from the repo root):
+    python benchmarks/chain_build.py
+    python benchmarks/chain_build.py --against HEAD~1
+"""
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain_openai import ChatOpenAI
+
+BUILDERS = (
+    "build_res2yaml_chain",
+    "build_jd_parser_chain",
+    "build_enhanced_ats_chain",
+    "build_optimization_chain",
+)
+
+
+def _load_chains(revision: str | None):
+    """Import models/chains.py from the working tree, or from a git revision."""
+    if revision is None:
+        from models import chains
+        return chains
+    source = subprocess.run(
+        ["git", "show", f"{revision}:models/chains.py"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(f"chains_{revision}", f.name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    os.unlink(f.name)
+    return module
+
+
+def bench(chains, iterations: int) -> dict:
+    """Return {builder: microseconds per call} for one shared LLM instance."""
+    llm = ChatOpenAI(api_key="sk-benchmark-0000", model="gpt-4o-mini")
+    results = {}
+    for name in BUILDERS:
+        build = getattr(chains, name)
+        build(llm)   # warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            build(llm)
+        results[name] = (time.perf_counter() - start) / iterations * 1e6
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500, help="calls per builder (default 500)")
+    parser.add_argument("--against", metavar="REV", help="also benchmark models/chains.py at this git revision")
+    args = parser.parse_args()
+
+    current = bench(_load_chains(None), args.iterations)
+    baseline = bench(_load_chains(args.against), args.iterations) if args.against else None
+
+    header = f"{'builder':<26} {'working tree':>14}"
+    if baseline:
+        header += f" {args.against:>14} {'speed-up':>10}"
+    print(header)
+    for name in BUILDERS:
+        line = f"{name:<26} {current[name]:>11.1f} µs"
+        if baseline:
+            line += f" {baseline[name]:>11.1f} µs {baseline[name] / current[name]:>9.0f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
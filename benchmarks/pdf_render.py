@@ -0,0 +1,133 @@
+"""
+benchmarks/pdf_render.py
+------------------------
+Micro-benchmark for config/pdf_generator.generate_pdf_from_yaml_string.
+
+Renders a representative two-page resume repeatedly and reports renders per
+second. With --against, the same benchmark is run against the generator as it
+was at another git revision, and the two outputs are checked to be
+byte-identical (ReportLab's invariant mode pins timestamps and document IDs).
+
+Usage (from the repo root):
+    python benchmarks/pdf_render.py
+    python benchmarks/pdf_render.py --against HEAD~1 --renders 300
+"""
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reportlab import rl_config
+
+rl_config.invariant = 1
+
+SAMPLE_RESUME = """
+name: Jane Doe
+contact:
+  location: Berlin, Germany
+  email: jane.doe@example.com
+  phone: "+49 30 1234567"
+  linkedin: linkedin.com/in/janedoe
+  github: github.com/janedoe
+experience:
+""" + "".join(f"""
+  - company: Company {i}
+    role: Senior Backend Engineer
+    location: Berlin
+    period: Jan 20{10 + i} - Dec 20{11 + i}
+    achievements:
+      - Designed and shipped a multi-tenant REST API in Python and FastAPI serving 2M requests/day
+      - Cut p95 latency by 38% by moving hot reads to Redis and batching Postgres writes
+      - Led migration of 40 services to Kubernetes with Helm, Terraform and GitHub Actions
+      - Mentored four engineers and ran the backend guild's design review
+""" for i in range(5)) + """
+projects:
+""" + "".join(f"""
+  - name: Project {i}
+    description: Open-source tooling for data pipelines
+    stack: [Python, Airflow, Postgres, Docker]
+    highlights:
+      - Built an incremental loader that processes 50 GB/day with exactly-once semantics
+      - 1.2k GitHub stars, 30 external contributors
+""" for i in range(3)) + """
+education:
+  - institution: Technical University of Berlin
+    degree: MSc Computer Science
+    major: Distributed Systems
+    period: 2008 - 2010
+    cgpa: 8.9
+  - institution: University of Delhi
+    degree: BSc Computer Science
+    period: 2005 - 2008
+technical_skills:
+  programming_languages: [Python, Go, TypeScript, SQL]
+  domains: [Distributed Systems, Data Engineering]
+  tools_and_frameworks: [FastAPI, Django, Airflow, Kafka]
+  web_and_backend: [REST, gRPC, GraphQL]
+  databases: [PostgreSQL, Redis, ClickHouse]
+certifications:
+  - AWS Certified Solutions Architect – Professional
+  - Certified Kubernetes Administrator
+extracurricular_activities:
+  - role: Organiser
+    organization: PyBerlin Meetup
+    period: 2016 - Present
+    highlights:
+      - Run a monthly meetup of 200+ attendees
+"""
+
+
+def _load_generator(revision: str | None):
+    """Import pdf_generator from the working tree, or from a git revision."""
+    if revision is None:
+        from config import pdf_generator
+        return pdf_generator
+    source = subprocess.run(
+        ["git", "show", f"{revision}:config/pdf_generator.py"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(f"pdf_generator_{revision}", f.name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    os.unlink(f.name)
+    return module
+
+
+def bench(generator, renders: int) -> tuple[float, bytes]:
+    """Return (renders per second, output of the last render)."""
+    render = generator.generate_pdf_from_yaml_string
+    for _ in range(5):   # warm up font metrics / imports
+        pdf_bytes = render(SAMPLE_RESUME)
+    start = time.perf_counter()
+    for _ in range(renders):
+        pdf_bytes = render(SAMPLE_RESUME)
+    return renders / (time.perf_counter() - start), pdf_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=200, help="timed renders per run (default 200)")
+    parser.add_argument("--against", metavar="REV", help="also benchmark config/pdf_generator.py at this git revision")
+    args = parser.parse_args()
+
+    current_rate, current_pdf = bench(_load_generator(None), args.renders)
+    print(f"working tree : {current_rate:8.1f} renders/s  ({len(current_pdf):,} bytes)")
+
+    if args.against:
+        baseline_rate, baseline_pdf = bench(_load_generator(args.against), args.renders)
+        print(f"{args.against:<13}: {baseline_rate:8.1f} renders/s  ({len(baseline_pdf):,} bytes)")
+        print(f"speed-up     : {current_rate / baseline_rate:8.2f}x")
+        print(f"identical PDF: {'yes' if current_pdf == baseline_pdf else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+benchmarks/pdf_text.py
+----------------------
+Benchmark for the PDF text extraction engines in config/pdf_text.py.
+
+Runs every engine in EXTRACTORS over a corpus of resume PDFs and reports
+throughput (documents and pages per second, single process) and text
+fidelity. Fidelity is the share of the resume's words that the engine
+recovers. By default the corpus is rendered from variants of the sample
+resume in benchmarks/pdf_render.py, so the source YAML gives the ground
+truth. With --corpus, a directory of real PDFs is used instead; those have
+no ground truth, so fidelity is measured against the fallback engine's output.
+
+It then times the configured pool (pdf_text_pool settings) end to end,
+with --concurrency uploads in flight, as /upload-resume uses it.
+
+Usage (from the repo root):
+    python benchmarks/pdf_text.py
+    python benchmarks/pdf_text.py --corpus ~/resumes --rounds 5 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import copy
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import yaml
+
+from benchmarks.pdf_render import SAMPLE_RESUME
+from config.pdf_text import EXTRACTORS, PDFTextPool, pdf_text_pool
+
+
+def _words(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def _leaf_text(node) -> str:
+    """All scalar values of a parsed YAML document, space-separated."""
+    if isinstance(node, dict):
+        return " ".join(_leaf_text(value) for value in node.values())
+    if isinstance(node, list):
+        return " ".join(_leaf_text(item) for item in node)
+    return "" if node is None else str(node)
+
+
+def _recall(expected: Counter, actual: Counter) -> float:
+    total = sum(expected.values())
+    return sum(min(count, actual[word]) for word, count in expected.items()) / total if total else 1.0
+
+
+def generated_corpus() -> list[tuple[str, bytes, Counter]]:
+    """(name, pdf bytes, ground-truth words) for resume variants from one to ~10 pages."""
+    from config.pdf_generator import generate_pdf_from_yaml_string
+
+    base = yaml.safe_load(SAMPLE_RESUME)
+    corpus = []
+    for jobs in (1, 3, 6, 12, 24, 48):
+        data = copy.deepcopy(base)
+        data["experience"] = [
+            dict(job, company=f"Company {i}") for i, job in
+            enumerate((base["experience"] * (jobs // len(base["experience"]) + 1))[:jobs])
+        ]
+        if jobs == 1:
+            data["projects"] = data["projects"][:1]
+        source = yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
+        corpus.append((f"resume-{jobs:02d}-jobs", generate_pdf_from_yaml_string(source), _words(_leaf_text(data))))
+    return corpus
+
+
+def directory_corpus(path: str) -> list[tuple[str, bytes, Counter | None]]:
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(".pdf"):
+            with open(os.path.join(path, name), "rb") as f:
+                corpus.append((name, f.read(), None))
+    return corpus
+
+
+def extract_sync(engine_name: str, pdf_bytes: bytes) -> tuple[int, str]:
+    engine = EXTRACTORS[engine_name]
+    doc = engine.open(pdf_bytes)
+    try:
+        count = engine.page_count(doc)
+        return count, "\n".join(engine.page_texts(doc, 0, count))
+    finally:
+        engine.close(doc)
+
+
+def bench_engine(engine_name: str, corpus, rounds: int) -> tuple[float, float, dict[str, str]]:
+    """Return (documents/s, pages/s, extracted text per document)."""
+    texts = {name: extract_sync(engine_name, pdf)[1] for name, pdf, _ in corpus}   # warm-up
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, pdf, _ in corpus:
+            pages += extract_sync(engine_name, pdf)[0]
+    elapsed = time.perf_counter() - start
+    return rounds * len(corpus) / elapsed, pages / elapsed, texts
+
+
+async def bench_pool(pool: PDFTextPool, corpus, rounds: int, concurrency: int) -> float:
+    """Documents per second through the pool with `concurrency` extractions in flight."""
+    pool.start()
+    await asyncio.gather(*(pool.extract(pdf) for _, pdf, _ in corpus))   # warm-up (spawn + imports)
+    jobs = [pdf for _ in range(rounds) for _, pdf, _ in corpus]
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(pdf: bytes) -> None:
+        async with gate:
+            await pool.extract(pdf)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(pdf) for pdf in jobs))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return len(jobs) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", metavar="DIR", help="directory of PDFs (default: generated sample resumes)")
+    parser.add_argument("--rounds", type=int, default=20, help="timed passes over the corpus (default 20)")
+    parser.add_argument("--concurrency", type=int, default=4, help="extractions in flight for the pool run (default 4)")
+    args = parser.parse_args()
+
+    corpus = directory_corpus(args.corpus) if args.corpus else generated_corpus()
+    if not corpus:
+        sys.exit("No PDFs found.")
+    page_counts = [extract_sync(pdf_text_pool.fallback or pdf_text_pool.engine, pdf)[0] for _, pdf, _ in corpus]
+    print(f"corpus       : {len(corpus)} PDFs, {sum(page_counts)} pages, {sum(len(pdf) for _, pdf, _ in corpus):,} bytes")
+
+    reference = None
+    results = {}
+    for name in EXTRACTORS:
+        results[name] = bench_engine(name, corpus, args.rounds)
+    if corpus[0][2] is None:
+        reference = results[pdf_text_pool.fallback or pdf_text_pool.engine][2]
+
+    for name, (docs_s, pages_s, texts) in results.items():
+        recalls = [
+            _recall(truth if truth is not None else _words(reference[doc]), _words(texts[doc]))
+            for doc, _, truth in corpus
+        ]
+        print(f"{name:<13}: {docs_s:8.1f} docs/s  {pages_s:8.1f} pages/s  "
+              f"word recall {sum(recalls) / len(recalls):6.1%} (min {min(recalls):6.1%})")
+
+    pool = PDFTextPool(
+        engine=pdf_text_pool.engine, fallback=pdf_text_pool.fallback, workers=pdf_text_pool.workers,
+        queue_depth=max(pdf_text_pool.queue_depth, args.concurrency * 4),
+        pages_per_task=pdf_text_pool.pages_per_task, timeout=pdf_text_pool.timeout,
+        max_pages=pdf_text_pool.max_pages,
+    )
+    rate = asyncio.run(bench_pool(pool, corpus, args.rounds, args.concurrency))
+    print(f"pool         : {rate:8.1f} docs/s  ({pool.engine}, {pool.workers} workers, "
+          f"{pool.pages_per_task} pages/task, concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+"""
+config/ats_fast.py
+------------------
+Deterministic, LLM-free ATS scoring.
+
+Fills every field of `DetailedATS` from the parsed JD (`skills`, title and raw
+text) and the resume YAML alone, using the same 40/30/20/10 weighting and
+match-level bands as ENHANCED_ATS_SYSTEM_PROMPT. It is meant for instant
+scores (the extension's live badge) — the LLM scorer remains the source of
+truth for the narrative fields, which here are short templated sentences.
+
+How matching works:
+    Every text field of the resume is lower-cased and tokenised ("Node.js" →
+    node js, "C++" → c++), and all 1-4 token n-grams are collected into a set.
+    The same text is scanned against the skill taxonomy (config/skills.py)
+    and the canonical ids of the skills it mentions join the set. A JD skill
+    matches when its id is in that set ("Postgres" in the JD matches
+    "PostgreSQL" in the resume), or, for skills outside the taxonomy, when its
+    own token tuple is. Scoring a whole JD is a handful of set lookups.
+    Indexes are cached by resume hash, so repeated scores of the same resume
+    only pay for the JD side.
+
+    rescore_delta() updates an existing (usually LLM-produced) DetailedATS for
+    an edited resume, tokenising only the fields that changed.
+
+Public API:
+    score_fast(resume_yaml, parsed_jd) -> DetailedATS
+    rescore_delta(baseline, parsed_jd, original_yaml, optimized_yaml) -> DetailedATS
+    build_resume_index(resume_yaml) -> ResumeIndex
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import date
+
+import yaml
+
+from config.cache import TTLCache
+from config.skills import normalize_term, skill_key, skill_taxonomy
+from schema.schema import (
+    DetailedATS, ExperienceAlignment, FormattingScore,
+    KeywordMatch, SkillsAnalysis, parsedJobDescription,
+)
+
+MAX_NGRAM = 4
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|[\n;•]+")
+_YEARS_RE    = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)", re.IGNORECASE)
+_DATE_RE     = re.compile(
+    r"(?:(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+)?((?:19|20)\d{2})|(present|current|now)",
+    re.IGNORECASE,
+)
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+
+# JD sentences containing one of these mark the skills in them as must-haves
+_REQUIRED_CUES = ("require", "must", "minimum", "qualification", "you have", "you will need", "essential")
+
+SKILL_SECTIONS    = ("technical_skills", "skills")
+STANDARD_SECTIONS = frozenset({
+    "name", "contact", "summary", "objective", "experience", "education", "projects",
+    "technical_skills", "skills", "certifications", "publications", "awards",
+    "extracurricular_activities", "leadership", "volunteer_work", "languages", "interests",
+})
+
+# Generic words ignored when comparing the JD title with past role titles
+_TITLE_STOPWORDS = frozenset({
+    "senior", "junior", "lead", "principal", "staff", "intern", "sr", "jr", "i", "ii", "iii",
+    "of", "and", "the", "a", "an", "for", "to", "in", "at",
+})
+
+
+def _ngrams(tokens: tuple[str, ...]) -> set:
+    return {
+        tokens[i:i + n]
+        for n in range(1, MAX_NGRAM + 1)
+        for i in range(len(tokens) - n + 1)
+    }
+
+
+def _terms(text: str) -> set:
+    """N-grams of `text` plus the taxonomy ids of the skills it mentions."""
+    return _ngrams(normalize_term(text)) | skill_taxonomy.ids(text)
+
+
+def _strings(node) -> list[str]:
+    """Every scalar in a YAML subtree, as strings."""
+    if isinstance(node, dict):
+        return [s for v in node.values() for s in _strings(v)]
+    if isinstance(node, list):
+        return [s for v in node for s in _strings(v)]
+    return [] if node is None else [str(node)]
+
+
+@dataclass(frozen=True)
+class ResumeIndex:
+    """Pre-tokenised view of one resume."""
+    ngrams:        frozenset   # every n-gram and skill id in the resume
+    bullet_ngrams: frozenset   # n-grams and skill ids from experience / project bullets
+    bullets:       tuple       # raw bullet strings
+    sections:      frozenset   # top-level YAML keys
+    roles:         tuple       # (role title tokens, months) per experience entry
+    total_months:  int         # experience span with overlapping roles merged
+
+    def mentions(self, skill: str, where: frozenset | None = None) -> bool:
+        """True when the resume (or `where`) mentions the skill under any of its aliases."""
+        return _mentions(self.ngrams if where is None else where, skill)
+
+
+def _mentions(pool: frozenset, skill: str) -> bool:
+    known = skill_taxonomy.lookup(skill)
+    return (known is not None and known.id in pool) or _contains(pool, normalize_term(skill))
+
+
+def _contains(pool: frozenset, term: tuple[str, ...]) -> bool:
+    if not term:
+        return False
+    if len(term) <= MAX_NGRAM:
+        return term in pool
+    return all((tok,) in pool for tok in term)   # long phrases: every token present
+
+
+def _parse_period(period: str) -> tuple[int, int] | None:
+    """'Jan 2020 - Present' → (start, end) as month ordinals, or None if undated."""
+    points = []
+    today = date.today()
+    for month, year, present in _DATE_RE.findall(period or ""):
+        if present:
+            points.append(today.year * 12 + today.month - 1)
+        else:
+            points.append(int(year) * 12 + _MONTHS.get(month[:3].lower(), 1) - 1)
+    if not points:
+        return None
+    start, end = points[0], points[-1]
+    return (start, end) if end >= start else (end, start)
+
+
+def _merged_months(spans: list[tuple[int, int]]) -> int:
+    total, cur_start, cur_end = 0, None, None
+    for start, end in sorted(spans):
+        if cur_end is None or start > cur_end:
+            if cur_end is not None:
+                total += cur_end - cur_start
+            cur_start, cur_end = start, end
+        else:
+            cur_end = max(cur_end, end)
+    if cur_end is not None:
+        total += cur_end - cur_start
+    return total
+
+
+def _bullets(data: dict) -> tuple:
+    """Experience, project and activity bullets of a resume dict."""
+    bullets = []
+    for section, field in (("experience", "achievements"), ("projects", "highlights"),
+                           ("extracurricular_activities", "highlights")):
+        for entry in data.get(section) or []:
+            if isinstance(entry, dict):
+                bullets.extend(str(b) for b in entry.get(field) or [])
+    return tuple(bullets)
+
+
+def _build_index(data: dict) -> ResumeIndex:
+    ngrams, bullet_ngrams = set(), set()
+    for s in _strings(data):
+        ngrams |= _terms(s)
+
+    bullets = _bullets(data)
+    for b in bullets:
+        bullet_ngrams |= _terms(b)
+
+    roles, spans = [], []
+    for job in data.get("experience") or []:
+        if not isinstance(job, dict):
+            continue
+        span = _parse_period(str(job.get("period", "")))
+        if span:
+            spans.append(span)
+        roles.append((normalize_term(job.get("role", "")), (span[1] - span[0]) if span else 0))
+
+    return ResumeIndex(
+        ngrams=frozenset(ngrams),
+        bullet_ngrams=frozenset(bullet_ngrams),
+        bullets=bullets,
+        sections=frozenset(data.keys()),
+        roles=tuple(roles),
+        total_months=_merged_months(spans),
+    )
+
+
+_index_cache = TTLCache(maxsize=512, ttl=3600, name="ats_fast_index")
+
+
+def build_resume_index(resume_yaml: str) -> ResumeIndex:
+    """Tokenise a resume YAML string (cached by content hash)."""
+    key = hashlib.sha256(resume_yaml.encode("utf-8")).hexdigest()
+    index = _index_cache.get(key)
+    if index is None:
+        data = yaml.safe_load(resume_yaml)
+        index = _build_index(data if isinstance(data, dict) else {})
+        _index_cache.set(key, index)
+    return index
+
+
+# ── Scoring components ───────────────────────────────────────────────────────
+
+def _split_jd_skills(jd: parsedJobDescription) -> tuple[list, list, list]:
+    """Partition JD skills into (critical technical, important technical, soft)."""
+    title_terms = _terms(jd.job_title)
+    cue_terms, seen_terms = set(), {}
+    for sentence in _SENTENCE_RE.split(jd.job_description.lower()):
+        grams = _terms(sentence)
+        for g in grams:
+            seen_terms[g] = seen_terms.get(g, 0) + 1
+        if any(cue in sentence for cue in _REQUIRED_CUES):
+            cue_terms |= grams
+
+    critical, important, soft, seen = [], [], [], set()
+    for skill in jd.skills:
+        term  = normalize_term(skill)
+        known = skill_taxonomy.lookup(skill)
+        key   = known.id if known is not None else term
+        if not term or key in seen:
+            continue
+        seen.add(key)
+        if known is not None and known.soft:
+            soft.append(skill)
+        elif any(k in title_terms or k in cue_terms or seen_terms.get(k, 0) >= 2 for k in (key, term)):
+            critical.append(skill)
+        else:
+            important.append(skill)
+    if important and not critical:
+        critical, important = important, []   # no cues in the JD — treat all as required
+    return critical, important, soft
+
+
+def _coverage(matched: int, total: int) -> float:
+    return matched / total if total else 1.0
+
+
+def _experience(index: ResumeIndex, jd: parsedJobDescription) -> ExperienceAlignment:
+    years_found = [int(y) for y in _YEARS_RE.findall(jd.job_description)]
+    required = float(min(years_found)) if years_found else 0.0
+
+    title = frozenset(normalize_term(jd.job_title)) - _TITLE_STOPWORDS
+    best, relevant_months = 0.0, 0
+    for role_tokens, months in index.roles:
+        overlap = len(title & set(role_tokens)) / len(title) if title else 0.0
+        best = max(best, overlap)
+        if overlap > 0:
+            relevant_months += months
+    relevant = round((relevant_months if relevant_months else index.total_months) / 12, 1)
+
+    alignment = "High" if best >= 0.5 else "Medium" if best > 0 else "Low"
+    years_factor = min(1.0, relevant / required) if required else (1.0 if index.roles else 0.0)
+    alignment_factor = {"High": 1.0, "Medium": 0.6, "Low": 0.2}[alignment]
+    return ExperienceAlignment(
+        relevant_years=relevant,
+        required_years=required,
+        role_alignment=alignment,
+        experience_score=round(100 * (0.7 * years_factor + 0.3 * alignment_factor), 1),
+    )
+
+
+def _formatting(sections: frozenset, bullets: tuple) -> FormattingScore:
+    has_skills = any(s in sections for s in SKILL_SECTIONS)
+    clear = {"experience", "education"} <= sections and has_skills
+    standard = sections <= STANDARD_SECTIONS
+
+    quantified = sum(1 for b in bullets if any(ch.isdigit() for ch in b))
+    well_sized = sum(1 for b in bullets if 6 <= len(b.split()) <= 35)
+    q_ratio = _coverage(quantified, len(bullets)) if bullets else 0.0
+    quality = "Excellent" if q_ratio >= 0.5 else "Good" if q_ratio >= 0.2 else "Poor"
+    readability = 100 * (0.5 * _coverage(well_sized, len(bullets)) + 0.25 * clear + 0.25 * standard)
+    return FormattingScore(
+        has_clear_sections=clear,
+        uses_standard_headers=standard,
+        bullet_point_quality=quality,
+        readability_score=round(readability if bullets else readability * 0.5, 1),
+    )
+
+
+def _match_level(score: float) -> tuple[str, str]:
+    if score >= 85:
+        return "Excellent", "High"
+    if score >= 70:
+        return "Good", "Medium"
+    if score >= 55:
+        return "Fair", "Medium"
+    return "Poor", "Low"
+
+
+def score_fast(resume_yaml: str, parsed_jd: parsedJobDescription) -> DetailedATS:
+    """Score a resume against a parsed JD without calling an LLM."""
+    index = build_resume_index(resume_yaml)
+    critical, important, soft = _split_jd_skills(parsed_jd)
+
+    def split(skills, where=None):
+        hit  = [s for s in skills if index.mentions(s, where)]
+        miss = [s for s in skills if s not in hit]
+        return hit, miss
+
+    crit_hit, crit_miss = split(critical)
+    imp_hit,  imp_miss  = split(important)
+    soft_hit, soft_miss = split(soft)
+
+    # Keywords: must-haves count double
+    keyword_score = 100 * _coverage(2 * len(crit_hit) + len(imp_hit), 2 * len(critical) + len(important))
+
+    # Skills: a technical skill listed *and* used in a bullet counts fully, listed-only counts 3/4
+    technical = critical + important
+    tech_hit  = crit_hit + imp_hit
+    demonstrated = sum(1 for s in tech_hit if index.mentions(s, index.bullet_ngrams))
+    tech_cov = _coverage(0.75 * len(tech_hit) + 0.25 * demonstrated, len(technical))
+    skills_score = 100 * (0.8 * tech_cov + 0.2 * _coverage(len(soft_hit), len(soft))) if soft else 100 * tech_cov
+
+    experience = _experience(index, parsed_jd)
+    formatting = _formatting(index.sections, index.bullets)
+
+    weights = {
+        "keyword_weight_score":    round(keyword_score * 0.40, 1),
+        "skills_weight_score":     round(skills_score * 0.30, 1),
+        "experience_weight_score": round(experience.experience_score * 0.20, 1),
+        "formatting_weight_score": round(formatting.readability_score * 0.10, 1),
+    }
+    overall = round(min(100.0, sum(weights.values())), 1)
+    match_level, likelihood = _match_level(overall)
+
+    strengths = []
+    if crit_hit:
+        strengths.append(f"Covers must-have skills: {', '.join(crit_hit[:6])}")
+    if experience.required_years and experience.relevant_years >= experience.required_years:
+        strengths.append(f"Meets the {experience.required_years:g}+ years of experience requirement")
+    if experience.role_alignment == "High":
+        strengths.append("Past roles closely match the target title")
+    if formatting.bullet_point_quality == "Excellent":
+        strengths.append("Most achievements are quantified")
+
+    critical_improvements = []
+    if crit_miss:
+        critical_improvements.append(f"Add: {', '.join(crit_miss)}")
+    if experience.required_years and experience.relevant_years < experience.required_years:
+        critical_improvements.append(
+            f"Role asks for {experience.required_years:g}+ years; resume shows {experience.relevant_years:g}"
+        )
+    if not formatting.has_clear_sections:
+        critical_improvements.append("Include Experience, Education and Skills sections")
+
+    recommended = []
+    if imp_miss:
+        recommended.append(f"Consider adding: {', '.join(imp_miss)}")
+    if soft_miss:
+        recommended.append(f"Show {', '.join(soft_miss)} through concrete achievements")
+    if formatting.bullet_point_quality != "Excellent":
+        recommended.append("Quantify more achievements with numbers or percentages")
+
+    return DetailedATS(
+        overall_score=overall,
+        keyword_analysis=KeywordMatch(
+            matched_keywords=crit_hit + imp_hit,
+            missing_critical_keywords=crit_miss,
+            missing_important_keywords=imp_miss,
+            keyword_density_score=round(keyword_score, 1),
+        ),
+        skills_analysis=SkillsAnalysis(
+            matched_technical_skills=tech_hit,
+            missing_technical_skills=crit_miss + imp_miss,
+            matched_soft_skills=soft_hit,
+            missing_soft_skills=soft_miss,
+            skills_alignment_score=round(skills_score, 1),
+        ),
+        experience_alignment=experience,
+        formatting_score=formatting,
+        **weights,
+        strengths=strengths,
+        critical_improvements=critical_improvements,
+        recommended_improvements=recommended,
+        match_level=match_level,
+        likelihood_to_pass_ats=likelihood,
+    )
+
+
+# ── Incremental re-scoring ───────────────────────────────────────────────────
+
+def _load_dict(yaml_str: str) -> dict:
+    data = yaml.safe_load(yaml_str)
+    return data if isinstance(data, dict) else {}
+
+
+def _changed_ngrams(before: set, after: set) -> frozenset:
+    grams = set()
+    for s in after - before:
+        grams |= _terms(s)
+    return frozenset(grams)
+
+
+def _move(matched: list, missing: list, gained_in, lost_in) -> tuple[list, list, list, list]:
+    """Shift items between a matched/missing pair; returns (matched, missing, gained, lost)."""
+    gained = [k for k in missing if gained_in(k)]
+    lost   = [k for k in matched if lost_in(k)]
+    return (
+        [k for k in matched if k not in lost] + gained,
+        [k for k in missing if k not in gained] + lost,
+        gained, lost,
+    )
+
+
+def _shift_score(score: float, gained: int, missing: int, lost: int, matched: int) -> float:
+    """Close the gap to 100 by the share of missing items gained; drop by the share of matched items lost."""
+    score += (100 - score) * _coverage(gained, missing) if missing else 0.0
+    score -= score * (lost / matched) if matched else 0.0
+    return round(max(0.0, min(100.0, score)), 1)
+
+
+def rescore_delta(baseline: DetailedATS, parsed_jd: parsedJobDescription,
+                  original_yaml: str, optimized_yaml: str) -> DetailedATS:
+    """Score an optimized resume from the original's DetailedATS without an LLM call.
+
+    Only the text fields that changed between the two resumes are tokenised.
+    Missing keywords/skills that now appear in new text move to matched, and
+    matched ones whose only mentions were removed move to missing — lost
+    keywords the JD treats as must-haves go to the critical list and count
+    double, like gained ones. The keyword and skills scores are shifted
+    accordingly. Formatting is re-scored from the optimized YAML with the
+    score_fast formatting rules, since optimization rewrites bullets and may
+    reorder sections. Experience is carried over: the optimizer keeps roles
+    and dates. The overall score moves by the change in the weighted
+    components.
+    """
+    optimized = _load_dict(optimized_yaml)
+    before = set(_strings(_load_dict(original_yaml)))
+    after  = set(_strings(optimized))
+    added_ngrams   = _changed_ngrams(before, after)
+    removed_ngrams = _changed_ngrams(after, before)
+    optimized_index = build_resume_index(optimized_yaml) if removed_ngrams else None
+
+    def gained_in(kw):
+        return _mentions(added_ngrams, kw)
+
+    def lost_in(kw):
+        return optimized_index is not None and _mentions(removed_ngrams, kw) and not optimized_index.mentions(kw)
+
+    ka, sa = baseline.keyword_analysis, baseline.skills_analysis
+    critical_keys = {skill_key(k) for k in _split_jd_skills(parsed_jd)[0]}
+
+    def weight(kw):
+        return 2 if skill_key(kw) in critical_keys else 1
+
+    crit_gained = [k for k in ka.missing_critical_keywords if gained_in(k)]
+    imp_gained  = [k for k in ka.missing_important_keywords if gained_in(k)]
+    lost_kw     = [k for k in ka.matched_keywords if lost_in(k)]
+    crit_lost   = [k for k in lost_kw if weight(k) == 2]
+    imp_lost    = [k for k in lost_kw if weight(k) == 1]
+    kw_matched      = [k for k in ka.matched_keywords if k not in lost_kw] + crit_gained + imp_gained
+    kw_missing_crit = [k for k in ka.missing_critical_keywords if k not in crit_gained] + crit_lost
+    kw_missing_imp  = [k for k in ka.missing_important_keywords if k not in imp_gained] + imp_lost
+    keyword_score = _shift_score(
+        ka.keyword_density_score,
+        gained=2 * len(crit_gained) + len(imp_gained),
+        missing=2 * len(ka.missing_critical_keywords) + len(ka.missing_important_keywords),
+        lost=2 * len(crit_lost) + len(imp_lost),
+        matched=sum(weight(k) for k in ka.matched_keywords),
+    )
+
+    tech_matched, tech_missing, tech_gained, tech_lost = _move(
+        sa.matched_technical_skills, sa.missing_technical_skills, gained_in, lost_in)
+    soft_matched, soft_missing, soft_gained, soft_lost = _move(
+        sa.matched_soft_skills, sa.missing_soft_skills, gained_in, lost_in)
+    skills_score = _shift_score(
+        sa.skills_alignment_score,
+        gained=len(tech_gained) + len(soft_gained),
+        missing=len(sa.missing_technical_skills) + len(sa.missing_soft_skills),
+        lost=len(tech_lost) + len(soft_lost),
+        matched=len(sa.matched_technical_skills) + len(sa.matched_soft_skills),
+    )
+
+    formatting = _formatting(frozenset(optimized.keys()), _bullets(optimized))
+
+    keyword_weight    = round(keyword_score * 0.40, 1)
+    skills_weight     = round(skills_score * 0.30, 1)
+    formatting_weight = round(formatting.readability_score * 0.10, 1)
+    overall = baseline.overall_score + (keyword_weight - baseline.keyword_weight_score) \
+                                     + (skills_weight - baseline.skills_weight_score) \
+                                     + (formatting_weight - baseline.formatting_weight_score)
+    overall = round(max(0.0, min(100.0, overall)), 1)
+    match_level, likelihood = _match_level(overall)
+
+    # Drop advice only once everything it names is covered: it must mention a
+    # keyword the optimization gained and none that is still missing. Matched
+    # on whole tokens and skill ids so "C" or "Go" do not close unrelated advice
+    resolved   = crit_gained + imp_gained + tech_gained + soft_gained
+    unresolved = kw_missing_crit + kw_missing_imp + tech_missing + soft_missing
+    def still_open(items):
+        open_items = []
+        for item in items:
+            terms = _terms(item)
+            if not any(_mentions(terms, k) for k in resolved) or any(_mentions(terms, k) for k in unresolved):
+                open_items.append(item)
+        return open_items
+
+    return baseline.model_copy(update={
+        "overall_score": overall,
+        "keyword_analysis": KeywordMatch(
+            matched_keywords=kw_matched,
+            missing_critical_keywords=kw_missing_crit,
+            missing_important_keywords=kw_missing_imp,
+            keyword_density_score=keyword_score,
+        ),
+        "skills_analysis": SkillsAnalysis(
+            matched_technical_skills=tech_matched,
+            missing_technical_skills=tech_missing,
+            matched_soft_skills=soft_matched,
+            missing_soft_skills=soft_missing,
+            skills_alignment_score=skills_score,
+        ),
+        "keyword_weight_score":     keyword_weight,
+        "skills_weight_score":      skills_weight,
+        "formatting_score":         formatting,
+        "formatting_weight_score":  formatting_weight,
+        "critical_improvements":    still_open(baseline.critical_improvements),
+        "recommended_improvements": still_open(baseline.recommended_improvements),
+        "match_level":              match_level,
+        "likelihood_to_pass_ats":   likelihood,
+    })
@@ -4,10 +4,15 @@ from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer, make_transient_to_detached
 from models.database_models import User
-from config.database import get_db
+from config.database import get_async_db
+from config.cache import TTLCache
 import os
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -27,6 +32,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours — extension silently refresh
 # Bearer token security
 security = HTTPBearer()
 
+# Short-lived per-process cache of the lean (non-deferred) user columns, so
+# back-to-back authenticated requests skip the users lookup. Writes to a user
+# must call invalidate_cached_user(); other workers may serve the old row for
+# up to USER_CACHE_TTL_SECONDS (0 disables the cache).
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "5"))
+user_cache = TTLCache(maxsize=int(os.getenv("USER_CACHE_SIZE", "4096")), ttl=USER_CACHE_TTL_SECONDS, name="auth_users")
+_LEAN_USER_ATTRS = tuple(prop.key for prop in inspect(User).column_attrs if not prop.deferred)
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Drop a user's cached auth row after changing it (call after commit)."""
+    user_cache.pop(user_id)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its bcrypt hash"""
@@ -72,7 +90,7 @@ def decode_token(token: str) -> dict:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user from token"""
     token = credentials.credentials
@@ -93,22 +111,43 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    cached = user_cache.get(user_uuid) if USER_CACHE_TTL_SECONDS > 0 else None
+    if cached is not None:
+        # Attach a clean instance to this request's session without a SELECT
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    result = await db.execute(select(User).where(User.id == user_uuid))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    if USER_CACHE_TTL_SECONDS > 0:
+        user_cache.set(user_uuid, {key: getattr(user, key) for key in _LEAN_USER_ATTRS})
     return user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user by email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).options(undefer(User.password_hash)).where(User.email == email))
+    user = result.scalars().first()
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    # bcrypt is deliberately slow — keep it off the event loop
+    if not await run_in_threadpool(verify_password, password, user.password_hash):
         return None
     return user
@@ -0,0 +1,162 @@
+"""
+config/cache.py
+---------------
+Small in-process caching primitives shared by the API.
+
+TTLCache sits in front of Postgres-backed caches (e.g. ParsedJDCache) so
+hot entries never leave the worker process; SingleFlight makes concurrent
+misses for the same key share one expensive computation. Every instance is
+per-process — with several uvicorn workers each keeps its own copy.
+
+Public API:
+    TTLCache(maxsize, ttl, name, sliding)  — bounded LRU mapping with per-entry TTL
+    SingleFlight(name)            — per-key coalescing of concurrent async work
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire `ttl` seconds after insert.
+
+    With `sliding=True` every hit restarts the entry's TTL, so entries expire
+    after `ttl` seconds of *idleness* instead of after a fixed lifetime.
+
+    Thread-safe: FastAPI runs sync endpoints/dependencies in a threadpool, so
+    the same cache may be touched from the event loop and worker threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "cache", sliding: bool = False):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl     = float(ttl)
+        self.name    = name
+        self.sliding = sliding
+        self._data: OrderedDict = OrderedDict()   # key -> (expires_at, value)
+        self._lock   = threading.Lock()
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0   # dropped to stay within maxsize
+        self.expirations = 0   # dropped because the TTL ran out
+
+    def get(self, key, default=None):
+        """Return the cached value (refreshing its LRU position) or `default`."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if self.sliding:
+                self._data[key] = (now + self.ttl, value)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        """Insert or replace `key`, evicting the least recently used entries if full."""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (expires_at, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove `key` and return its value (expired or not), or `default`."""
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry now (expiry is otherwise lazy); returns how many."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._data.items() if expires_at <= now]
+            for k in expired:
+                del self._data[k]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Counters for /health and logging."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name":        self.name,
+                "size":        len(self._data),
+                "maxsize":     self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits":        self.hits,
+                "misses":      self.misses,
+                "evictions":   self.evictions,
+                "expirations": self.expirations,
+                "hit_rate":    round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls for the same key onto one in-flight task.
+
+    The first caller for a key (the leader) starts `factory()` as a task; every
+    caller that arrives while it is still running awaits that same task
+    instead of starting its own. The task is shielded, so a cancelled caller
+    (e.g. a client disconnect) does not abort the work for the others.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, name: str = "flight"):
+        self.name      = name
+        self._inflight: dict = {}
+        self.leaders   = 0
+        self.followers = 0
+
+    def in_flight(self, key) -> bool:
+        return key in self._inflight
+
+    async def run(self, key, factory):
+        """Return the result of `factory()`, sharing one execution per key."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "name":      self.name,
+            "in_flight": len(self._inflight),
+            "leaders":   self.leaders,
+            "followers": self.followers,
+        }
@@ -0,0 +1,249 @@
+"""
+config/idempotency.py
+---------------------
+Idempotency-Key support for expensive, side-effecting endpoints.
+
+A client that retries a request after a network blip sends the same
+`Idempotency-Key` header. The first request to arrive claims the key (a row
+in `idempotency_keys`, models.IdempotencyKey) and runs normally. A retry then
+either replays the stored response or, while the first request is still
+running, waits for it and replays its response. Either way it never calls the
+LLM or counts usage again.
+
+The endpoint marks the key `committed` inside the transaction that persists
+its own side effects (usage bump, saved rows). So a retry that arrives after a
+crash between commit and response still sees the work as done, and the
+endpoint can rebuild the response from `resource_id`. If the request fails
+before that point, the key is released and a retry runs from scratch.
+
+Keys are scoped per user and endpoint. Each key is bound to a SHA-256
+fingerprint of the request body (secrets excluded), so reusing a key for a
+different request gets a 422.
+
+Configuration (env):
+    IDEMPOTENCY_TTL_SECONDS   how long keys and stored responses are kept (default 86400)
+    IDEMPOTENCY_WAIT_SECONDS  how long a retry waits on an in-flight original (default 120)
+    IDEMPOTENCY_LOCK_SECONDS  after this long an unfinished claim is presumed dead
+                              and may be taken over (default 600)
+    IDEMPOTENCY_POLL_SECONDS  poll interval when the original runs in another process (default 1)
+
+Public API:
+    request_fingerprint(payload) -> str
+    await begin(user_id, endpoint, key, request_hash) -> IdempotencyClaim | IdempotentReplay
+    await mark_committed(db, claim, resource_id=None, response=None)
+    await complete(claim, response) / await release(claim)
+    await purge_expired_keys() -> int
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.database import AsyncSessionLocal
+from models.database_models import IdempotencyKey
+
+logger = logging.getLogger("Sculpt")
+
+IDEMPOTENCY_TTL_SECONDS  = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "120"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "600"))
+IDEMPOTENCY_POLL_SECONDS = float(os.getenv("IDEMPOTENCY_POLL_SECONDS", "1"))
+
+# Keys this process currently owns → event set when the owner finishes, so
+# same-process retries wake up immediately instead of polling the table.
+_owned: dict[tuple, asyncio.Event] = {}
+
+
+@dataclass(frozen=True)
+class IdempotencyClaim:
+    """This request owns the key and must run, then complete() or release() it."""
+    id:         uuid.UUID
+    flight_key: tuple
+
+
+@dataclass(frozen=True)
+class IdempotentReplay:
+    """The key was already used for this request: answer from the stored outcome.
+
+    `response` is None when the original committed but died before storing
+    its response; the endpoint rebuilds it from `resource_id`.
+    """
+    response:    dict | None
+    resource_id: uuid.UUID | None
+
+
+def request_fingerprint(payload) -> str:
+    """SHA-256 of a JSON-serialisable request payload (key order independent)."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _takeover_condition():
+    """Rows a new request may claim: expired ones, or claims whose owner is presumed dead."""
+    return or_(
+        IdempotencyKey.expires_at < func.now(),
+        and_(
+            IdempotencyKey.status == "in_progress",
+            IdempotencyKey.locked_at < func.now() - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+        ),
+    )
+
+
+async def _try_claim(user_id, endpoint: str, key: str, request_hash: str):
+    """One claim attempt. Returns (claimed_id, existing_row) — exactly one is set,
+    or both are None if the row vanished between statements."""
+    expires_at = func.now() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    async with AsyncSessionLocal() as db:
+        claimed_id = (await db.execute(
+            pg_insert(IdempotencyKey)
+            .values(id=uuid.uuid4(), user_id=user_id, endpoint=endpoint, key=key,
+                    request_hash=request_hash, status="in_progress", expires_at=expires_at)
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_user_endpoint_key")
+            .returning(IdempotencyKey.id)
+        )).scalar_one_or_none()
+
+        row = None
+        if claimed_id is None:
+            where = and_(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.endpoint == endpoint,
+                IdempotencyKey.key == key,
+            )
+            claimed_id = (await db.execute(
+                update(IdempotencyKey)
+                .where(where, _takeover_condition())
+                .values(request_hash=request_hash, status="in_progress", resource_id=None,
+                        response=None, locked_at=func.now(), expires_at=expires_at)
+                .returning(IdempotencyKey.id)
+            )).scalar_one_or_none()
+            if claimed_id is None:
+                row = (await db.execute(select(IdempotencyKey).where(where))).scalar_one_or_none()
+        await db.commit()
+    return claimed_id, row
+
+
+async def begin(user_id, endpoint: str, key: str, request_hash: str) -> IdempotencyClaim | IdempotentReplay:
+    """Claim `key` for this request, or return the outcome of the request that already used it.
+
+    Raises
+    ------
+    HTTPException(422) when the key was used for a different request body.
+    HTTPException(409) when the original is still running after IDEMPOTENCY_WAIT_SECONDS.
+    """
+    flight_key = (user_id, endpoint, key)
+    loop       = asyncio.get_running_loop()
+    deadline   = loop.time() + IDEMPOTENCY_WAIT_SECONDS
+    waited     = False
+
+    while True:
+        claimed_id, row = await _try_claim(user_id, endpoint, key, request_hash)
+        if claimed_id is not None:
+            _owned[flight_key] = asyncio.Event()
+            return IdempotencyClaim(id=claimed_id, flight_key=flight_key)
+        if row is None:
+            continue   # released between our insert and select — try to claim it again
+
+        if row.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="This Idempotency-Key was already used for a different request. Use a new key.",
+            )
+        if row.status != "in_progress":
+            logger.info(f"[IDEMPOTENCY] Replaying {endpoint} for key {key[:16]}")
+            return IdempotentReplay(response=row.response, resource_id=row.resource_id)
+
+        # The original is still running — attach to it
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress. Retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+        if not waited:
+            logger.info(f"[IDEMPOTENCY] Waiting on in-flight {endpoint} for key {key[:16]}")
+            waited = True
+        event = _owned.get(flight_key)
+        try:
+            if event is not None:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            else:
+                await asyncio.sleep(min(IDEMPOTENCY_POLL_SECONDS, remaining))
+        except asyncio.TimeoutError:
+            pass
+
+
+def _finished(claim: IdempotencyClaim) -> None:
+    event = _owned.pop(claim.flight_key, None)
+    if event is not None:
+        event.set()
+
+
+async def mark_committed(db: AsyncSession, claim: IdempotencyClaim,
+                         resource_id=None, response: dict | None = None) -> None:
+    """Record the outcome inside the caller's transaction, right before it commits.
+
+    Pass `response` when the final body is already known (the key is then
+    completed); otherwise call complete() once it is.
+    """
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == claim.id)
+        .values(status="completed" if response is not None else "committed",
+                resource_id=resource_id, response=response)
+    )
+
+
+async def complete(claim: IdempotencyClaim, response: dict | None = None) -> None:
+    """Store the final response (after the caller's commit) and wake waiting retries."""
+    try:
+        if response is not None:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.id == claim.id, IdempotencyKey.status != "in_progress")
+                    .values(status="completed", response=response)
+                )
+                await db.commit()
+    except Exception as e:
+        # The work is committed; retries will rebuild the response from resource_id
+        logger.warning(f"[IDEMPOTENCY] Could not store response for {claim.id}: {e}")
+    finally:
+        _finished(claim)
+
+
+async def release(claim: IdempotencyClaim) -> None:
+    """Give the key up after a failure so a retry runs the request again.
+
+    Keys that already reached `committed` are kept — the work was done.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.id == claim.id, IdempotencyKey.status == "in_progress")
+            )
+            await db.commit()
+    except Exception as e:
+        # The claim lapses after IDEMPOTENCY_LOCK_SECONDS anyway
+        logger.warning(f"[IDEMPOTENCY] Could not release {claim.id}: {e}")
+    finally:
+        _finished(claim)
+
+
+async def purge_expired_keys() -> int:
+    """Delete expired keys. Returns the number of rows removed."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now()))
+        await db.commit()
+    return result.rowcount or 0
@@ -0,0 +1,203 @@
+"""
+config/jd_local.py
+------------------
+Heuristic, LLM-free job description parser.
+
+Produces the same parsedJobDescription as the jd_parser chain, so most JDs
+can be parsed without a network round trip:
+
+    job_title        an explicit "Job Title: …" / "Position: …" line, else a
+                     "hiring / looking for / seeking a <title>" phrase, else
+                     the first short line that names a role ("Senior Data Engineer")
+    skills           skill taxonomy matches (config/skills.py) under their
+                     canonical names, skills from requirement sections first
+    job_description  the posting without boilerplate sections (about the
+                     company, benefits, equal-opportunity text, how to apply),
+                     with whitespace and bullets normalised
+
+Each parse comes with a confidence in [0, 1] built from how the title was
+found (40%), how many technical skills were recognised (40%; soft skills are
+easy to hit in company prose and do not count) and whether the posting
+has recognisable responsibilities / requirements structure (20%). A JD with
+no detectable title never reaches the default threshold. get_or_parse_jd()
+in main.py keeps confident parses and sends the rest to the LLM (or keeps
+them anyway when the request has no AI config).
+
+Configuration (env):
+    JD_LOCAL_PARSER           try the local parser before the LLM (default true)
+    JD_LOCAL_MIN_CONFIDENCE   confidence needed to skip the LLM (default 0.75)
+
+Public API:
+    LocalJDParse                                    — (parsed, confidence)
+    parse_jd_locally(raw_jd) -> LocalJDParse
+"""
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from config.skills import skill_taxonomy
+from schema.schema import parsedJobDescription
+
+JD_LOCAL_PARSER         = os.getenv("JD_LOCAL_PARSER", "true").lower() == "true"
+JD_LOCAL_MIN_CONFIDENCE = float(os.getenv("JD_LOCAL_MIN_CONFIDENCE", "0.75"))
+
+MAX_SKILLS        = 30
+MAX_TITLE_WORDS   = 8
+MAX_HEADING_WORDS = 6
+# Technical skills recognised at which the skills component of the confidence saturates
+FULL_SKILL_COUNT  = 6
+
+ROLE_NOUNS = frozenset({
+    "engineer", "developer", "programmer", "architect", "scientist", "analyst", "manager",
+    "designer", "lead", "director", "consultant", "specialist", "administrator", "intern",
+    "researcher", "officer", "coordinator", "associate", "executive", "representative",
+    "technician", "writer", "accountant", "recruiter", "strategist", "owner", "head",
+    "tester", "auditor", "advisor", "editor", "marketer", "operator", "assistant",
+    "sre", "devops", "president", "vp", "cto", "cfo", "ceo", "partner", "principal",
+})
+
+# Heading text (lower-case, punctuation stripped) containing one of these → section kind
+_DROP_HEADINGS = (
+    "about us", "about the company", "who we are", "our company", "company overview",
+    "benefits", "perks", "what we offer", "why join", "why you ll love", "compensation",
+    "salary", "equal opportunity", "eeo", "diversity", "inclusion", "how to apply",
+    "application process", "our values", "our mission", "life at",
+)
+_REQUIREMENT_HEADINGS = (
+    "requirement", "qualification", "what you ll bring", "what we re looking for",
+    "what we are looking for", "who you are", "must have", "skills", "you have",
+    "you ll need", "you will need", "experience", "nice to have", "preferred", "bonus",
+    "good to have", "plus",
+)
+_ROLE_HEADINGS = (
+    "responsibilit", "what you ll do", "what you will do", "the role", "your role",
+    "role overview", "duties", "day to day", "about the job", "about the position",
+    "job description", "the opportunity",
+)
+
+_LABEL_RE  = re.compile(r"^(?:job\s*title|position|role|title|opening)\s*[:\-–]\s*(.+)$", re.IGNORECASE)
+_PHRASE_RE = re.compile(
+    r"\b(?:hiring|looking\s+for|seeking|searching\s+for|recruiting|join\s+(?:us|our\s+team)\s+as)\s+"
+    r"(?:an?\s+|the\s+|our\s+(?:next|new|first)\s+)?"
+    r"(?P<title>[A-Za-z][\w/&+#.\- ]{2,80}?)"
+    r"(?=\s+(?:to|who|with|for|in|at|that|based|on|and\s+you)\b|[.,;:!?(\n]|$)",
+    re.IGNORECASE,
+)
+_BULLET_RE  = re.compile(r"^[\x7f\uf0b7•●▪■◦○‣∙·*–—-]\s*")
+_SPACES_RE  = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u205f\u3000]+")
+_WORD_RE    = re.compile(r"[a-z0-9]+")
+_GENDER_TAG = re.compile(r"\s*\((?:m|f|w|d|x|all genders?)(?:\s*/\s*(?:m|f|w|d|x))*\)\s*$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class LocalJDParse:
+    parsed:     parsedJobDescription
+    confidence: float
+
+
+def _clean_lines(raw_jd: str) -> list[str]:
+    lines = []
+    for raw in unicodedata.normalize("NFKC", raw_jd).splitlines():
+        line = _SPACES_RE.sub(" ", raw).strip()
+        if line:
+            lines.append("- " + _BULLET_RE.sub("", line) if _BULLET_RE.match(line) and len(line) > 2 else line)
+    return lines
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower().replace("'", " "))
+
+
+def _heading_kind(line: str) -> str | None:
+    """'drop' / 'requirements' / 'role' / 'other' for a heading line, None for content."""
+    if line.startswith("- ") or len(line) > 60:
+        return None
+    words = _words(line)
+    if not words or len(words) > MAX_HEADING_WORDS:
+        return None
+    stripped = line.rstrip()
+    if not stripped.endswith(":") and stripped[-1:] in ".!?,;":
+        return None
+    text = " ".join(words)
+    if any(h in text for h in _DROP_HEADINGS):
+        return "drop"
+    if any(h in text for h in _ROLE_HEADINGS):
+        return "role"
+    if any(h in text for h in _REQUIREMENT_HEADINGS):
+        return "requirements"
+    # Unknown headings must look like one: a trailing colon
+    return "other" if stripped.endswith(":") else None
+
+
+def _is_title(candidate: str) -> bool:
+    words = _words(candidate)
+    return 0 < len(words) <= MAX_TITLE_WORDS and any(w in ROLE_NOUNS for w in words)
+
+
+def _tidy_title(title: str) -> str:
+    return _GENDER_TAG.sub("", title).strip(" -–|:,")
+
+
+def _find_title(lines: list[str]) -> tuple[str, float]:
+    """(job title, title confidence component)."""
+    for line in lines[:15]:
+        match = _LABEL_RE.match(line)
+        if match and _is_title(match.group(1)):
+            return _tidy_title(match.group(1)), 1.0
+
+    for line in lines[:15]:
+        for match in _PHRASE_RE.finditer(line):
+            title = _tidy_title(match.group("title"))
+            if _is_title(title):
+                return title, 0.9
+
+    for line in lines[:5]:
+        candidate = _tidy_title(line.split(" | ")[0].split(" at ")[0])
+        if not line.startswith("- ") and _heading_kind(line) is None and _is_title(candidate) \
+                and candidate[-1:] not in ".!?":
+            return candidate, 0.75
+    return "", 0.0
+
+
+def parse_jd_locally(raw_jd: str) -> LocalJDParse:
+    """Parse a raw JD into parsedJobDescription without an LLM (see module docstring)."""
+    lines = _clean_lines(raw_jd)
+    title, title_score = _find_title(lines)
+
+    kept, requirement_lines = [], []
+    kind, structured, bullets = "other", False, 0
+    for line in lines:
+        heading = _heading_kind(line)
+        if heading is not None:
+            kind = heading
+            structured = structured or heading in ("requirements", "role")
+            if kind != "drop":
+                kept.append(line)
+            continue
+        if kind == "drop":
+            continue
+        kept.append(line)
+        bullets += line.startswith("- ")
+        if kind == "requirements":
+            requirement_lines.append(line)
+
+    if not kept:   # everything looked like boilerplate — keep the posting whole
+        kept = lines
+    description = "\n".join(kept)
+
+    found = skill_taxonomy.find("\n".join(requirement_lines))
+    found += [s for s in skill_taxonomy.find(description) if s not in found]
+    found = found[:MAX_SKILLS]
+    technical = sum(1 for s in found if not s.soft)
+
+    structure_score = 1.0 if structured else 0.6 if bullets >= 3 else 0.3
+    confidence = (0.4 * title_score
+                  + 0.4 * min(1.0, technical / FULL_SKILL_COUNT)
+                  + 0.2 * structure_score)
+
+    return LocalJDParse(
+        parsed=parsedJobDescription(job_title=title, skills=[s.name for s in found], job_description=description),
+        confidence=round(confidence, 3),
+    )
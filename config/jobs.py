@@ -0,0 +1,336 @@
+"""
+config/jobs.py
+--------------
+Durable background queue for resume optimizations.
+
+Jobs live in the `optimization_jobs` table (models.OptimizationJob), so they
+survive API restarts, client disconnects and proxy timeouts. A JobWorker
+claims queued jobs with `SELECT … FOR UPDATE SKIP LOCKED`, so any number of
+workers can share the table. Workers can run inside the API process, in
+separate `python worker.py` processes, or both.
+
+Exactly-once completion: each claim increments `attempts` and takes a lease,
+which the worker renews while the job runs; an attempt whose renewal misses
+is cancelled. Every attempt reserves one slot of the user's weekly quota up
+front (main.reserve_generation) and refunds it if it fails, is cancelled or
+loses its lease before committing. The runner marks the job succeeded in the
+same transaction that inserts the OptimizedResume row, with an UPDATE fenced
+on `attempts`: if the job was re-claimed in the meantime the fence matches
+nothing, LeaseLost rolls the transaction back and the attempt's slot is
+refunded. So a job is persisted, and billed, at most once. Failed attempts
+are retried with backoff up to `max_attempts`.
+
+The user's BYOK key is needed by whichever process runs the job, so it is
+stored Fernet-encrypted (cryptography, via python-jose[cryptography]) and
+wiped when the job reaches a terminal state.
+
+Configuration (env):
+    JOB_WORKER_CONCURRENCY    jobs run at once per worker process (default 4)
+    JOB_PROVIDER_CONCURRENCY  per-provider caps, e.g. "openai=4,anthropic=2"
+    JOB_PROVIDER_DEFAULT_CAP  cap for providers not listed above (default 2)
+    JOB_LEASE_SECONDS         lease length, renewed every third of it (default 120)
+    JOB_MAX_ATTEMPTS          attempts before a job fails for good (default 3)
+    JOB_POLL_SECONDS          idle poll interval (default 1)
+    JOB_KEY_SECRET            secret for encrypting stored keys (default JWT_SECRET_KEY)
+
+Public API:
+    await enqueue_job(db, user_id, request, resume_id=None) -> OptimizationJob
+    JobWorker(runner).start() / await .stop() / .wake() / .stats()
+    LeaseLost
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+from datetime import timedelta
+
+from cryptography.fernet import Fernet
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.auth import SECRET_KEY
+from config.database import AsyncSessionLocal
+from models.database_models import OptimizationJob
+
+logger = logging.getLogger("Sculpt")
+
+JOB_WORKER_CONCURRENCY   = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_PROVIDER_DEFAULT_CAP = int(os.getenv("JOB_PROVIDER_DEFAULT_CAP", "2"))
+JOB_LEASE_SECONDS        = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS         = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_SECONDS         = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+def _parse_provider_caps(raw: str) -> dict[str, int]:
+    caps = {}
+    for part in filter(None, (p.strip() for p in raw.split(","))):
+        name, _, value = part.partition("=")
+        caps[name.strip().lower()] = int(value)
+    return caps
+
+
+PROVIDER_CAPS = _parse_provider_caps(os.getenv("JOB_PROVIDER_CONCURRENCY", ""))
+
+_fernet = Fernet(base64.urlsafe_b64encode(
+    hashlib.sha256(("sculpt-job-key:" + os.getenv("JOB_KEY_SECRET", SECRET_KEY)).encode("utf-8")).digest()
+))
+
+
+def encrypt_api_key(api_key: str) -> bytes:
+    return _fernet.encrypt(api_key.encode("utf-8"))
+
+
+def decrypt_api_key(token: bytes) -> str:
+    return _fernet.decrypt(token).decode("utf-8")
+
+
+class LeaseLost(Exception):
+    """The job was re-claimed by another worker (or finished) while we ran it."""
+
+
+async def enqueue_job(db: AsyncSession, user_id, request, resume_id=None) -> OptimizationJob:
+    """Persist an OptimizeResumeRequest as a queued job (the caller commits).
+
+    `resume_id` pins the resume version to optimize, so a re-upload while the
+    job waits does not change what it works on.
+    """
+    ai_config = request.ai_config
+    job = OptimizationJob(
+        user_id=user_id,
+        status="queued",
+        request=request.model_dump(exclude={"ai_config": {"api_key"}}),
+        resume_id=resume_id,
+        ai_provider=ai_config.provider.strip().lower(),
+        encrypted_api_key=encrypt_api_key(ai_config.api_key),
+        max_attempts=JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+def _fenced(job_id, attempt: int):
+    """WHERE clause matching the job only while this attempt still owns it."""
+    return and_(
+        OptimizationJob.id == job_id,
+        OptimizationJob.status == "running",
+        OptimizationJob.attempts == attempt,
+    )
+
+
+class JobWorker:
+    """Claims and runs optimization jobs with global and per-provider caps.
+
+    `runner(job, api_key, mark_succeeded)` does the actual work and returns
+    the result payload. It must call `await mark_succeeded(db, optimized_resume_id)`
+    inside the transaction that persists the optimization, right before commit.
+    """
+
+    def __init__(self, runner, concurrency: int = JOB_WORKER_CONCURRENCY,
+                 provider_caps: dict | None = None, default_cap: int = JOB_PROVIDER_DEFAULT_CAP):
+        self.runner        = runner
+        self.concurrency   = max(1, concurrency)
+        self.provider_caps = PROVIDER_CAPS if provider_caps is None else provider_caps
+        self.default_cap   = max(1, default_cap)
+        self._running: dict = {}                  # job_id → (provider, task)
+        self._wakeup       = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+
+        self.claimed   = 0
+        self.succeeded = 0
+        self.retried   = 0
+        self.failed    = 0
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._claim_loop())
+            logger.info(f"[JOBS] Worker started (concurrency {self.concurrency})")
+
+    async def stop(self) -> None:
+        """Stop claiming and abandon running jobs; their leases lapse and another worker retries them."""
+        tasks = [t for _, t in self._running.values()]
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+            self._loop_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def wake(self) -> None:
+        """Claim immediately instead of waiting for the next poll (e.g. right after enqueue)."""
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "running":   len(self._running),
+            "capacity":  self.concurrency,
+            "claimed":   self.claimed,
+            "succeeded": self.succeeded,
+            "retried":   self.retried,
+            "failed":    self.failed,
+        }
+
+    # ── claiming ─────────────────────────────────────────────────────────────
+
+    def _cap(self, provider: str) -> int:
+        return self.provider_caps.get(provider, self.default_cap)
+
+    def _running_for(self, provider: str) -> int:
+        return sum(1 for p, _ in self._running.values() if p == provider)
+
+    async def _claim_loop(self) -> None:
+        while True:
+            try:
+                claimed = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[JOBS] Claim failed: {e}")
+                claimed = 0
+            if claimed:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> int:
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        saturated = [p for p, _ in self._running.values() if self._running_for(p) >= self._cap(p)]
+
+        async with AsyncSessionLocal() as db:
+            # Jobs whose lease lapsed too many times are given up on
+            await db.execute(
+                update(OptimizationJob)
+                .where(OptimizationJob.status == "running",
+                       OptimizationJob.lease_expires_at < func.now(),
+                       OptimizationJob.attempts >= OptimizationJob.max_attempts)
+                .values(status="failed", error="Job was interrupted too many times.",
+                        encrypted_api_key=None, lease_expires_at=None, finished_at=func.now())
+            )
+
+            stmt = (
+                select(OptimizationJob)
+                .where(
+                    or_(
+                        and_(OptimizationJob.status == "queued", OptimizationJob.available_at <= func.now()),
+                        and_(OptimizationJob.status == "running", OptimizationJob.lease_expires_at < func.now()),
+                    ),
+                    OptimizationJob.attempts < OptimizationJob.max_attempts,
+                )
+                .order_by(OptimizationJob.created_at)
+                .limit(free)
+                .with_for_update(skip_locked=True)
+            )
+            if saturated:
+                stmt = stmt.where(OptimizationJob.ai_provider.not_in(saturated))
+            candidates = (await db.execute(stmt)).scalars().all()
+
+            # Respect per-provider caps within the batch; the rest stay queued
+            jobs, planned = [], {}
+            for job in candidates:
+                taken = self._running_for(job.ai_provider) + planned.get(job.ai_provider, 0)
+                if taken < self._cap(job.ai_provider):
+                    planned[job.ai_provider] = planned.get(job.ai_provider, 0) + 1
+                    jobs.append(job)
+
+            for job in jobs:
+                job.status           = "running"
+                job.attempts         = job.attempts + 1
+                job.lease_expires_at = func.now() + timedelta(seconds=JOB_LEASE_SECONDS)
+                job.started_at       = job.started_at or func.now()
+            await db.commit()
+
+        for job in jobs:
+            self.claimed += 1
+            task = asyncio.create_task(self._execute(job))
+            self._running[job.id] = (job.ai_provider, task)
+            task.add_done_callback(lambda _, job_id=job.id: self._running.pop(job_id, None))
+        return len(jobs)
+
+    # ── execution ────────────────────────────────────────────────────────────
+
+    async def _renew_lease(self, job_id, attempt: int, owner: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            async with AsyncSessionLocal() as db:
+                renewed = await db.execute(
+                    update(OptimizationJob)
+                    .where(_fenced(job_id, attempt))
+                    .values(lease_expires_at=func.now() + timedelta(seconds=JOB_LEASE_SECONDS))
+                )
+                await db.commit()
+            if renewed.rowcount != 1:
+                logger.warning(f"[JOBS] Lost lease on job {job_id} — abandoning attempt {attempt}")
+                owner.cancel()
+                return
+
+    async def _execute(self, job: OptimizationJob) -> None:
+        attempt = job.attempts
+
+        async def mark_succeeded(db: AsyncSession, optimized_resume_id) -> None:
+            done = await db.execute(
+                update(OptimizationJob)
+                .where(_fenced(job.id, attempt))
+                .values(status="succeeded", optimized_resume_id=optimized_resume_id, error=None,
+                        encrypted_api_key=None, lease_expires_at=None, finished_at=func.now())
+            )
+            if done.rowcount != 1:
+                raise LeaseLost(str(job.id))
+
+        heartbeat = asyncio.create_task(self._renew_lease(job.id, attempt, asyncio.current_task()))
+        try:
+            api_key = decrypt_api_key(job.encrypted_api_key)
+            result  = await self.runner(job, api_key, mark_succeeded)
+        except asyncio.CancelledError:
+            raise
+        except LeaseLost:
+            logger.warning(f"[JOBS] Job {job.id} attempt {attempt} finished after losing its lease — discarded")
+            return
+        except Exception as e:
+            await self._record_failure(job, attempt, e)
+            return
+        finally:
+            heartbeat.cancel()
+
+        self.succeeded += 1
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(OptimizationJob).where(OptimizationJob.id == job.id).values(result=result))
+            await db.commit()
+        logger.info(f"[JOBS] Job {job.id} succeeded (attempt {attempt})")
+
+    async def _record_failure(self, job: OptimizationJob, attempt: int, exc: Exception) -> None:
+        if isinstance(exc, HTTPException):
+            detail, retryable = str(exc.detail), exc.status_code >= 500
+        else:
+            detail, retryable = "Unexpected error while optimizing.", True
+        retry = retryable and attempt < job.max_attempts
+
+        if retry:
+            values = dict(status="queued", lease_expires_at=None, error=detail,
+                          available_at=func.now() + timedelta(seconds=5 * 2 ** (attempt - 1)))
+        else:
+            values = dict(status="failed", lease_expires_at=None, error=detail,
+                          encrypted_api_key=None, finished_at=func.now())
+        async with AsyncSessionLocal() as db:
+            # Fenced: if the job already succeeded (failure after commit) this is a no-op
+            updated = await db.execute(update(OptimizationJob).where(_fenced(job.id, attempt)).values(**values))
+            await db.commit()
+        if updated.rowcount != 1:
+            return
+        if retry:
+            self.retried += 1
+            logger.warning(f"[JOBS] Job {job.id} attempt {attempt} failed ({detail}) — will retry")
+        else:
+            self.failed += 1
+            logger.error(f"[JOBS] Job {job.id} failed permanently: {detail}")
@@ -0,0 +1,181 @@
+"""
+config/pdf_cache.py
+-------------------
+On-disk cache of rendered resume PDFs.
+
+Entries are keyed by a SHA-256 of the canonicalised resume YAML (parsed and
+re-serialised with sorted keys, so formatting/key-order differences share an
+entry) plus pdf_generator.TEMPLATE_VERSION. The key doubles as the HTTP ETag.
+The directory is capped in size and evicted least-recently-used first, using
+file mtimes as the recency clock, so several API workers can share it.
+
+Configuration (env):
+    PDF_CACHE_DIR        cache directory (default "pdf_cache")
+    PDF_CACHE_MAX_BYTES  size cap for the directory (default 256 MB)
+    PDF_PREWARM          pre-render optimized resumes in the background (default true)
+
+Public API:
+    pdf_cache_key(yaml_str) -> str
+    await render_pdf_cached(yaml_str) -> (pdf_bytes, etag)
+    schedule_prewarm(yaml_str)
+    pdf_cache.stats() -> dict
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import yaml
+
+from config.cache import SingleFlight
+from config.pdf_generator import TEMPLATE_VERSION
+from config.pdf_renderer import pdf_render_pool
+
+logger = logging.getLogger("Sculpt")
+
+PDF_PREWARM = os.getenv("PDF_PREWARM", "true").lower() == "true"
+
+
+def pdf_cache_key(yaml_str: str) -> str:
+    """Hash of the canonicalised YAML + template version (also used as the ETag)."""
+    try:
+        canonical = json.dumps(
+            yaml.safe_load(yaml_str), sort_keys=True, ensure_ascii=False,
+            separators=(",", ":"), default=str,
+        )
+    except yaml.YAMLError:
+        canonical = yaml_str   # unparseable — the render will fail anyway
+    payload = f"v{TEMPLATE_VERSION}\n{canonical}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class PDFDiskCache:
+    """Size-capped, LRU-evicted directory of `<key>.pdf` files.
+
+    Methods do blocking file I/O — call them via asyncio.to_thread from async code.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock     = threading.Lock()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)   # bump recency for LRU eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, pdf_bytes: bytes) -> None:
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, self._path(key))   # atomic: readers never see partial files
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total   = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".pdf"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue   # evicted by another worker
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()   # oldest access first
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "evictions": self.evictions,
+        }
+
+
+pdf_cache = PDFDiskCache(
+    directory=os.getenv("PDF_CACHE_DIR", "pdf_cache"),
+    max_bytes=int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1_048_576))),
+)
+
+# A prewarm and a download of the same resume share one render
+_render_flight = SingleFlight(name="pdf_render")
+_prewarm_tasks: set = set()
+
+
+async def _render_and_store(key: str, yaml_str: str) -> bytes:
+    pdf_bytes = await pdf_render_pool.render(yaml_str)
+    try:
+        await asyncio.to_thread(pdf_cache.put, key, pdf_bytes)
+    except OSError as e:
+        logger.warning(f"[PDF CACHE] Could not store {key[:12]}...: {e}")
+    return pdf_bytes
+
+
+async def render_pdf_cached(yaml_str: str, key: str | None = None) -> tuple[bytes, str]:
+    """Return (pdf_bytes, etag) for a resume YAML, rendering only on a cache miss."""
+    key = key or pdf_cache_key(yaml_str)
+    pdf_bytes = await asyncio.to_thread(pdf_cache.get, key)
+    if pdf_bytes is not None:
+        logger.info(f"[PDF CACHE] Hit for {key[:12]}...")
+        return pdf_bytes, key
+    pdf_bytes = await _render_flight.run(key, lambda: _render_and_store(key, yaml_str))
+    return pdf_bytes, key
+
+
+def schedule_prewarm(yaml_str: str) -> None:
+    """Render a PDF into the cache in the background so the first download is instant.
+
+    Best effort: skipped when PDF_PREWARM is off, and failures (including a
+    busy renderer pool) are only logged.
+    """
+    if not PDF_PREWARM:
+        return
+
+    async def _prewarm():
+        start = time.perf_counter()
+        try:
+            _, key = await render_pdf_cached(yaml_str)
+            logger.info(f"[PDF CACHE] Prewarmed {key[:12]}... in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            logger.info(f"[PDF CACHE] Prewarm skipped: {getattr(e, 'detail', e)}")
+
+    task = asyncio.create_task(_prewarm())
+    _prewarm_tasks.add(task)                     # keep a reference until it finishes
+    task.add_done_callback(_prewarm_tasks.discard)
@@ -6,6 +6,8 @@ No system dependencies — works on every cloud provider.
 
 Public API:
     generate_pdf_from_yaml_string(yaml_str: str) -> bytes
+    TEMPLATE_VERSION — bump whenever the rendered output changes, so cached
+                       PDFs (config/pdf_cache.py) are not served stale
 """
 
 import io
@@ -21,6 +23,8 @@ from reportlab.platypus import (
     Table, TableStyle, HRFlowable, KeepTogether,
 )
 
+TEMPLATE_VERSION = "1"
+
 # ── Colour palette ──────────────────────────────────────────────────────────
 ACCENT    = colors.HexColor("#2563EB")
 TEXT_DARK = colors.HexColor("#0F172A")
@@ -29,80 +33,112 @@ DIVIDER   = colors.HexColor("#CBD5E1")
 
 
 # ── Styles ──────────────────────────────────────────────────────────────────
+# Built once at import time and shared by every render. ReportLab only reads
+# ParagraphStyle / TableStyle objects while laying out, so they must never be
+# mutated after this point.
+
+STYLES = {
+    "name": ParagraphStyle(
+        "Name",
+        fontName="Helvetica-Bold",
+        fontSize=22,
+        textColor=TEXT_DARK,
+        alignment=TA_CENTER,
+        spaceAfter=15,
+    ),
+    "contact": ParagraphStyle(
+        "Contact",
+        fontName="Helvetica",
+        fontSize=8.5,
+        textColor=TEXT_MID,
+        alignment=TA_CENTER,
+        spaceBefore=4,
+        spaceAfter=10,
+    ),
+    "section": ParagraphStyle(
+        "Section",
+        fontName="Helvetica-Bold",
+        fontSize=10,
+        textColor=ACCENT,
+        spaceBefore=10,
+        spaceAfter=2,
+    ),
+    "role": ParagraphStyle(
+        "Role",
+        fontName="Helvetica-Bold",
+        fontSize=9.5,
+        textColor=TEXT_DARK,
+        spaceBefore=4,
+        spaceAfter=1,
+    ),
+    "meta": ParagraphStyle(
+        "Meta",
+        fontName="Helvetica",
+        fontSize=8,
+        textColor=TEXT_MID,
+        alignment=TA_RIGHT,
+    ),
+    "bullet": ParagraphStyle(
+        "Bullet",
+        fontName="Helvetica",
+        fontSize=9,
+        textColor=TEXT_DARK,
+        leftIndent=10,
+        spaceAfter=1.5,
+        leading=12,
+    ),
+    "skill_label": ParagraphStyle(
+        "SkillLabel",
+        fontName="Helvetica-Bold",
+        fontSize=9,
+        textColor=TEXT_MID,
+    ),
+    "skill_value": ParagraphStyle(
+        "SkillValue",
+        fontName="Helvetica",
+        fontSize=9,
+        textColor=TEXT_DARK,
+        leading=12,
+    ),
+    "cert": ParagraphStyle(
+        "Cert",
+        fontName="Helvetica",
+        fontSize=9,
+        textColor=TEXT_DARK,
+        leftIndent=10,
+        spaceAfter=2,
+    ),
+}
+
+ROLE_ROW_STYLE = TableStyle([
+    ("VALIGN",       (0, 0), (-1, -1), "TOP"),
+    ("ALIGN",        (1, 0), (1,  0),  "RIGHT"),
+    ("LEFTPADDING",  (0, 0), (-1, -1), 0),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+    ("TOPPADDING",   (0, 0), (-1, -1), 0),
+    ("BOTTOMPADDING",(0, 0), (-1, -1), 0),
+])
+
+SKILLS_TABLE_STYLE = TableStyle([
+    ("VALIGN",       (0, 0), (-1, -1), "TOP"),
+    ("LEFTPADDING",  (0, 0), (-1, -1), 0),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+    ("TOPPADDING",   (0, 0), (-1, -1), 1),
+    ("BOTTOMPADDING",(0, 0), (-1, -1), 1),
+])
+
+CONTACT_FIELDS = ("location", "email", "phone", "linkedin", "github")
+
+SKILL_ROWS = (
+    ("Languages",     "programming_languages"),
+    ("Domains",       "domains"),
+    ("Frameworks",    "tools_and_frameworks"),
+    ("Web / Backend", "web_and_backend"),
+    ("Databases",     "databases"),
+)
 
-def _build_styles() -> dict:
-    return {
-        "name": ParagraphStyle(
-            "Name",
-            fontName="Helvetica-Bold",
-            fontSize=22,
-            textColor=TEXT_DARK,
-            alignment=TA_CENTER,
-            spaceAfter=15,
-        ),
-        "contact": ParagraphStyle(
-            "Contact",
-            fontName="Helvetica",
-            fontSize=8.5,
-            textColor=TEXT_MID,
-            alignment=TA_CENTER,
-            spaceBefore=4,
-            spaceAfter=10,
-        ),
-        "section": ParagraphStyle(
-            "Section",
-            fontName="Helvetica-Bold",
-            fontSize=10,
-            textColor=ACCENT,
-            spaceBefore=10,
-            spaceAfter=2,
-        ),
-        "role": ParagraphStyle(
-            "Role",
-            fontName="Helvetica-Bold",
-            fontSize=9.5,
-            textColor=TEXT_DARK,
-            spaceBefore=4,
-            spaceAfter=1,
-        ),
-        "meta": ParagraphStyle(
-            "Meta",
-            fontName="Helvetica",
-            fontSize=8,
-            textColor=TEXT_MID,
-            alignment=TA_RIGHT,
-        ),
-        "bullet": ParagraphStyle(
-            "Bullet",
-            fontName="Helvetica",
-            fontSize=9,
-            textColor=TEXT_DARK,
-            leftIndent=10,
-            spaceAfter=1.5,
-            leading=12,
-        ),
-        "skill_label": ParagraphStyle(
-            "SkillLabel",
-            fontName="Helvetica-Bold",
-            fontSize=9,
-            textColor=TEXT_MID,
-        ),
-        "skill_value": ParagraphStyle(
-            "SkillValue",
-            fontName="Helvetica",
-            fontSize=9,
-            textColor=TEXT_DARK,
-            leading=12,
-        ),
-        "cert": ParagraphStyle(
-            "Cert",
-            fontName="Helvetica",
-            fontSize=9,
-            textColor=TEXT_DARK,
-            leftIndent=10,
-            spaceAfter=2,
-        ),
-    }
+# TEXT_MID as a 6-char hex string for inline ReportLab markup
+MID_HEX = TEXT_MID.hexval()[2:]   # strip leading "FF" alpha byte
 
 
 # ── Helpers ─────────────────────────────────────────────────────────────────
@@ -111,101 +147,69 @@ def _divider():
     return HRFlowable(width="100%", thickness=0.5, color=DIVIDER, spaceAfter=4)
 
 
-def _section(title: str, styles: dict) -> list:
-    return [Paragraph(title.upper(), styles["section"]), _divider()]
+def _section(title: str) -> list:
+    return [Paragraph(title.upper(), STYLES["section"]), _divider()]
 
 
-def _bullets(items: list, styles: dict) -> list:
-    return [Paragraph(f"• {item}", styles["bullet"]) for item in items]
+def _bullets(items: list) -> list:
+    style = STYLES["bullet"]
+    return [Paragraph(f"• {item}", style) for item in items]
 
 
-def _role_row(left: str, right: str, styles: dict):
+def _role_row(left: str, right: str):
     """Two-column table: left = role/name, right = date/location (right-aligned)."""
     t = Table(
-        [[Paragraph(left, styles["role"]), Paragraph(right, styles["meta"])]],
+        [[Paragraph(left, STYLES["role"]), Paragraph(right, STYLES["meta"])]],
         colWidths=["75%", "25%"],
     )
-    t.setStyle(TableStyle([
-        ("VALIGN",       (0, 0), (-1, -1), "TOP"),
-        ("ALIGN",        (1, 0), (1,  0),  "RIGHT"),
-        ("LEFTPADDING",  (0, 0), (-1, -1), 0),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-        ("TOPPADDING",   (0, 0), (-1, -1), 0),
-        ("BOTTOMPADDING",(0, 0), (-1, -1), 0),
-    ]))
+    t.setStyle(ROLE_ROW_STYLE)
     return t
 
 
-def _mid_hex() -> str:
-    """Return TEXT_MID as a 6-char hex string for inline ReportLab markup."""
-    return TEXT_MID.hexval()[2:]   # strip leading "FF" alpha byte
+def _entry(left: str, right: str, bullets: list) -> KeepTogether:
+    """Role row + bullet list kept on one page (experience, projects, activities)."""
+    return KeepTogether(
+        [_role_row(left, right), Spacer(1, 3)] + _bullets(bullets) + [Spacer(1, 5)]
+    )
 
 
 # ── Content builder ─────────────────────────────────────────────────────────
 
-def _build_content(data: dict, styles: dict) -> list:
-    story = []
-    mid   = _mid_hex()
-
-    # Header
-    story.append(Paragraph(data.get("name", ""), styles["name"]))
-    contact = data.get("contact", {})
-    parts   = [
-        str(contact[f]) for f in ["location", "email", "phone", "linkedin", "github"]
-        if contact.get(f)
-    ]
-    story.append(Paragraph("  |  ".join(parts), styles["contact"]))
-    story.append(_divider())
-
-    # Experience
-    for job in data.get("experience", []):
-        loc_period = " · ".join(filter(None, [job.get("location"), job.get("period")]))
-        block = [
-            _role_row(
-                f"<b>{job.get('role','')}</b>  <font color='#{mid}'>{job.get('company','')}</font>",
-                loc_period, styles,
-            ),
-            Spacer(1, 3),
-        ] + _bullets(job.get("achievements", []), styles) + [Spacer(1, 5)]
-        story.append(KeepTogether(block))
-    if data.get("experience"):
-        story = _section("Experience", styles) + story[1:]  # prepend heading
-
-    # rebuild properly — just prepend sections before their blocks
+def _build_content(data: dict) -> list:
+    """Build the whole story (header first, then each non-empty section) in one pass."""
     story = []
 
     def add_section(title, blocks):
         if blocks:
-            story.extend(_section(title, styles))
+            story.extend(_section(title))
             story.extend(blocks)
 
+    # Header
+    contact = data.get("contact", {})
+    parts   = [str(contact[f]) for f in CONTACT_FIELDS if contact.get(f)]
+    story.append(Paragraph(data.get("name", ""), STYLES["name"]))
+    story.append(Paragraph("  |  ".join(parts), STYLES["contact"]))
+    story.append(_divider())
+
     # Experience
-    exp_blocks = []
-    for job in data.get("experience", []):
-        loc_period = " · ".join(filter(None, [job.get("location"), job.get("period")]))
-        block = [
-            _role_row(
-                f"<b>{job.get('role','')}</b>  <font color='#{mid}'>{job.get('company','')}</font>",
-                loc_period, styles,
-            ),
-            Spacer(1, 3),
-        ] + _bullets(job.get("achievements", []), styles) + [Spacer(1, 5)]
-        exp_blocks.append(KeepTogether(block))
-    add_section("Experience", exp_blocks)
+    add_section("Experience", [
+        _entry(
+            f"<b>{job.get('role','')}</b>  <font color='#{MID_HEX}'>{job.get('company','')}</font>",
+            " · ".join(filter(None, [job.get("location"), job.get("period")])),
+            job.get("achievements", []),
+        )
+        for job in data.get("experience", [])
+    ])
 
     # Projects
-    proj_blocks = []
-    for proj in data.get("projects", []):
-        stack = " · ".join(proj.get("stack", []))
-        block = [
-            _role_row(
-                f"<b>{proj.get('name','')}</b>  <i><font color='#{mid}'>{proj.get('description','')}</font></i>",
-                f"<font color='#2563EB'>{stack}</font>", styles,
-            ),
-            Spacer(1, 3),
-        ] + _bullets(proj.get("highlights", []), styles) + [Spacer(1, 5)]
-        proj_blocks.append(KeepTogether(block))
-    add_section("Projects", proj_blocks)
+    add_section("Projects", [
+        _entry(
+            f"<b>{proj.get('name','')}</b>  <i><font color='#{MID_HEX}'>{proj.get('description','')}</font></i>",
+            f"<font color='#2563EB'>{' · '.join(proj.get('stack', []))}</font>",
+            proj.get("highlights", []),
+        )
+        for proj in data.get("projects", [])
+    ])
 
     # Education
     edu_blocks = []
@@ -214,64 +218,43 @@ def _build_content(data: dict, styles: dict) -> list:
         if edu.get("major"):
             degree_str += f" — {edu['major']}"
         right = " · ".join(filter(None, [edu.get("period"), f"CGPA: {edu['cgpa']}" if edu.get("cgpa") else None]))
-        block = [
+        edu_blocks.append(KeepTogether([
             _role_row(
-                f"<b>{edu.get('institution','')}</b>  <font color='#{mid}'>{degree_str}</font>",
-                right, styles,
+                f"<b>{edu.get('institution','')}</b>  <font color='#{MID_HEX}'>{degree_str}</font>",
+                right,
             ),
             Spacer(1, 6),
-        ]
-        edu_blocks.append(KeepTogether(block))
+        ]))
     add_section("Education", edu_blocks)
 
     # Technical Skills
     tech = data.get("technical_skills", {})
     if tech:
-        skill_map = [
-            ("Languages",     "programming_languages"),
-            ("Domains",       "domains"),
-            ("Frameworks",    "tools_and_frameworks"),
-            ("Web / Backend", "web_and_backend"),
-            ("Databases",     "databases"),
-        ]
         rows = [
-            [Paragraph(label, styles["skill_label"]),
-             Paragraph(", ".join(tech[key]), styles["skill_value"])]
-            for label, key in skill_map
+            [Paragraph(label, STYLES["skill_label"]),
+             Paragraph(", ".join(tech[key]), STYLES["skill_value"])]
+            for label, key in SKILL_ROWS
             if tech.get(key)
         ]
         if rows:
-            story.extend(_section("Technical Skills", styles))
             t = Table(rows, colWidths=[3.5 * cm, None])
-            t.setStyle(TableStyle([
-                ("VALIGN",       (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING",  (0, 0), (-1, -1), 0),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                ("TOPPADDING",   (0, 0), (-1, -1), 1),
-                ("BOTTOMPADDING",(0, 0), (-1, -1), 1),
-            ]))
-            story.append(t)
-            story.append(Spacer(1, 6))
+            t.setStyle(SKILLS_TABLE_STYLE)
+            add_section("Technical Skills", [t, Spacer(1, 6)])
 
     # Certifications
     certs = data.get("certifications", [])
     if certs:
-        story.extend(_section("Certifications", styles))
-        story += [Paragraph(f"• {c}", styles["cert"]) for c in certs]
-        story.append(Spacer(1, 6))
+        add_section("Certifications", [Paragraph(f"• {c}", STYLES["cert"]) for c in certs] + [Spacer(1, 6)])
 
     # Extracurricular
-    extra_blocks = []
-    for act in data.get("extracurricular_activities", []):
-        block = [
-            _role_row(
-                f"<b>{act.get('role','')}</b>  <font color='#{mid}'>{act.get('organization','')}</font>",
-                act.get("period", ""), styles,
-            ),
-            Spacer(1, 3),
-        ] + _bullets(act.get("highlights", []), styles) + [Spacer(1, 5)]
-        extra_blocks.append(KeepTogether(block))
-    add_section("Leadership & Extracurriculars", extra_blocks)
+    add_section("Leadership & Extracurriculars", [
+        _entry(
+            f"<b>{act.get('role','')}</b>  <font color='#{MID_HEX}'>{act.get('organization','')}</font>",
+            act.get("period", ""),
+            act.get("highlights", []),
+        )
+        for act in data.get("extracurricular_activities", [])
+    ])
 
     return story
 
@@ -283,23 +266,8 @@ def generate_pdf_from_yaml_string(yaml_str: str) -> bytes:
     Accept a YAML string (as stored in the DB / session), return PDF bytes.
     Ready to be streamed directly from a FastAPI endpoint.
     """
-    data   = yaml.safe_load(yaml_str)
-    styles = _build_styles()
-
-    # Build header separately so it always appears first
-    mid   = _mid_hex()
-    header = []
-    header.append(Paragraph(data.get("name", ""), styles["name"]))
-    contact = data.get("contact", {})
-    parts   = [
-        str(contact[f]) for f in ["location", "email", "phone", "linkedin", "github"]
-        if contact.get(f)
-    ]
-    header.append(Paragraph("  |  ".join(parts), styles["contact"]))
-    header.append(_divider())
-
-    body  = _build_content(data, styles)
-    story = header + body
+    data  = yaml.safe_load(yaml_str)
+    story = _build_content(data)
 
     buf = io.BytesIO()
     doc = SimpleDocTemplate(
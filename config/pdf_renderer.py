@@ -0,0 +1,179 @@
+"""
+config/pdf_renderer.py
+----------------------
+Off-event-loop PDF rendering.
+
+`generate_pdf_from_yaml_string` is CPU-bound pure-Python ReportLab work.
+Calling it directly inside an `async def` endpoint blocks the event loop
+(and every auth / ATS request on the same worker) for the whole render.
+This module runs renders in a dedicated process pool with a bounded queue.
+
+Configuration (env):
+    PDF_RENDER_WORKERS          renderer processes per API worker (default 2)
+    PDF_RENDER_QUEUE_DEPTH      renders allowed to wait for a free process (default 8)
+    PDF_RENDER_TIMEOUT_SECONDS  max wall time per render, queueing included (default 30)
+
+Public API:
+    pdf_render_pool.start() / .shutdown()
+    await pdf_render_pool.render(yaml_str) -> bytes
+    pdf_render_pool.stats() -> dict
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from config.pdf_generator import generate_pdf_from_yaml_string
+
+logger = logging.getLogger("Sculpt")
+
+
+def _render_in_worker(yaml_str: str) -> tuple[bytes, float]:
+    """Runs inside a pool process: render and report pure render time (ms)."""
+    start = time.perf_counter()
+    pdf_bytes = generate_pdf_from_yaml_string(yaml_str)
+    return pdf_bytes, (time.perf_counter() - start) * 1000
+
+
+def _warm_up() -> int:
+    """No-op task used to make the pool spawn (and import ReportLab) up front."""
+    return os.getpid()
+
+
+class PDFRenderPool:
+    """Process pool for PDF renders with back-pressure and timing counters.
+
+    At most `workers + queue_depth` renders may be in flight; beyond that
+    `render()` fails fast with 503 + Retry-After instead of piling up work.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, timeout: float):
+        self.workers     = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.timeout     = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight  = 0
+
+        self.rendered        = 0
+        self.failed          = 0
+        self.rejected        = 0
+        self.timed_out       = 0
+        self.total_render_ms = 0.0
+        self.total_wait_ms   = 0.0
+        self.max_render_ms   = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    def start(self) -> None:
+        """Spawn the renderer processes (called at app startup so the first render is warm)."""
+        if self._executor is None:
+            # spawn: never fork a process that is running an event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            for _ in range(self.workers):
+                self._executor.submit(_warm_up)
+            logger.info(f"[PDF] Renderer pool started ({self.workers} workers, queue depth {self.queue_depth})")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+
+    def _release_from_worker(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Done-callback of a pool future (runs on the executor's thread)."""
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass   # loop already closed (shutdown) — nothing left to account for
+
+    async def render(self, yaml_str: str) -> bytes:
+        """Render a resume YAML string to PDF bytes without blocking the event loop.
+
+        Raises
+        ------
+        HTTPException(503) when the pool and its queue are full.
+        HTTPException(504) when the render exceeds the time budget.
+        Any exception raised by the renderer itself (e.g. invalid YAML).
+        """
+        if self._in_flight >= self.capacity:
+            self.rejected += 1
+            logger.warning(f"[PDF] Renderer pool full ({self._in_flight}/{self.capacity}) — rejecting render")
+            raise HTTPException(
+                status_code=503,
+                detail="PDF renderer is busy. Please retry in a few seconds.",
+                headers={"Retry-After": "2"},
+            )
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        try:
+            cf_future = self._executor.submit(_render_in_worker, yaml_str)
+        except BrokenProcessPool:
+            # A renderer process died (e.g. OOM-killed) — rebuild the pool next time
+            self._executor = None
+            self.failed += 1
+            raise HTTPException(status_code=503, detail="PDF renderer restarting. Please retry.",
+                                headers={"Retry-After": "1"})
+
+        # The slot is held until the process actually finishes, even if the
+        # caller times out, so the in-flight count reflects real pool load.
+        self._in_flight += 1
+        cf_future.add_done_callback(lambda _: self._release_from_worker(loop))
+
+        try:
+            pdf_bytes, render_ms = await asyncio.wait_for(asyncio.wrap_future(cf_future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.error(f"[PDF] Render exceeded {self.timeout:.0f}s budget")
+            raise HTTPException(status_code=504, detail="PDF generation timed out. Please try again.")
+        except BrokenProcessPool:
+            self._executor = None
+            self.failed += 1
+            raise HTTPException(status_code=503, detail="PDF renderer restarting. Please retry.",
+                                headers={"Retry-After": "1"})
+        except Exception:
+            self.failed += 1
+            raise
+
+        wall_ms = (time.perf_counter() - submitted) * 1000
+        self.rendered        += 1
+        self.total_render_ms += render_ms
+        self.total_wait_ms   += max(0.0, wall_ms - render_ms)
+        self.max_render_ms    = max(self.max_render_ms, render_ms)
+        logger.info(f"[PDF] Rendered {len(pdf_bytes):,} bytes in {render_ms:.0f} ms (queued {wall_ms - render_ms:.0f} ms)")
+        return pdf_bytes
+
+    def stats(self) -> dict:
+        return {
+            "workers":        self.workers,
+            "queue_depth":    self.queue_depth,
+            "in_flight":      self._in_flight,
+            "rendered":       self.rendered,
+            "failed":         self.failed,
+            "rejected":       self.rejected,
+            "timed_out":      self.timed_out,
+            "avg_render_ms":  round(self.total_render_ms / self.rendered, 1) if self.rendered else 0.0,
+            "avg_wait_ms":    round(self.total_wait_ms / self.rendered, 1) if self.rendered else 0.0,
+            "max_render_ms":  round(self.max_render_ms, 1),
+        }
+
+
+pdf_render_pool = PDFRenderPool(
+    workers=int(os.getenv("PDF_RENDER_WORKERS", "2")),
+    queue_depth=int(os.getenv("PDF_RENDER_QUEUE_DEPTH", "8")),
+    timeout=float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "30")),
+)
@@ -0,0 +1,368 @@
+"""
+config/pdf_text.py
+------------------
+Off-event-loop text extraction for uploaded resume PDFs.
+
+Extraction is CPU-bound and used to run PyPDF2 page by page inside the
+upload request, blocking the event loop for the whole document. This module
+runs it in a dedicated process pool instead:
+
+  - Engines are pluggable (EXTRACTORS). pypdfium2 (PDFium, native code) is
+    the default; PyPDF2 is the fallback when the primary engine raises or
+    finds no text at all.
+  - The first task reads the page count and extracts the first
+    PDF_TEXT_PAGES_PER_TASK pages, which covers almost every resume in a
+    single round trip. Longer documents fan the remaining pages out across
+    the pool in page ranges.
+  - Pages are joined with form feeds ("\\f") so later stages can tell them
+    apart (see config/resume_prestructure.py).
+  - The whole extraction, fallback included, runs under one time budget
+    (spawning the pool at startup is not charged to it). A document that
+    blows it gets its extractor processes killed and the pool respawned,
+    since cancelling the awaiting coroutine does not stop a process.
+  - At most `workers + queue_depth` pool tasks may be in flight; beyond that
+    extract() fails fast with 503 + Retry-After, like the PDF renderer.
+
+pdfium is not thread-safe, hence processes rather than threads.
+
+Configuration (env):
+    PDF_TEXT_ENGINE          primary engine: pdfium | pypdf2 (default pdfium)
+    PDF_TEXT_FALLBACK        engine tried when the primary fails, or "none" (default pypdf2)
+    PDF_TEXT_WORKERS         extractor processes per API worker (default 2)
+    PDF_TEXT_QUEUE_DEPTH     tasks allowed to wait for a free process (default 8)
+    PDF_TEXT_PAGES_PER_TASK  pages per pool task (default 4)
+    PDF_TEXT_TIMEOUT_SECONDS max wall time per document (default 10)
+    PDF_TEXT_MAX_PAGES       documents with more pages are rejected (default 50)
+
+Public API:
+    EXTRACTORS                                        — engine name → PDFTextEngine
+    pdf_text_pool.start() / .shutdown()
+    await pdf_text_pool.extract(pdf_bytes) -> str
+    pdf_text_pool.stats() -> dict
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from fastapi import HTTPException
+
+logger = logging.getLogger("Sculpt")
+
+
+class PDFTextEngine(ABC):
+    """One extraction backend. Subclasses open a document from bytes and
+    return the text of a page range; both run inside pool processes.
+
+    Engines are instantiated when EXTRACTORS is built, at import, so one that
+    misses a method fails there rather than mid-upload in a worker."""
+
+    name = "base"
+
+    @abstractmethod
+    def open(self, pdf_bytes: bytes):
+        ...
+
+    @abstractmethod
+    def page_count(self, doc) -> int:
+        ...
+
+    @abstractmethod
+    def page_texts(self, doc, start: int, stop: int) -> list[str]:
+        ...
+
+    def close(self, doc) -> None:
+        pass
+
+
+class PdfiumEngine(PDFTextEngine):
+    name = "pdfium"
+
+    def open(self, pdf_bytes: bytes):
+        import pypdfium2
+        return pypdfium2.PdfDocument(pdf_bytes)
+
+    def page_count(self, doc) -> int:
+        return len(doc)
+
+    def page_texts(self, doc, start: int, stop: int) -> list[str]:
+        texts = []
+        for index in range(start, stop):
+            page = doc[index]
+            textpage = page.get_textpage()
+            try:
+                # PDFium separates lines with CRLF; normalise to what PyPDF2 produced
+                texts.append(textpage.get_text_bounded().replace("\r\n", "\n"))
+            finally:
+                textpage.close()
+                page.close()
+        return texts
+
+    def close(self, doc) -> None:
+        doc.close()
+
+
+class PyPDF2Engine(PDFTextEngine):
+    name = "pypdf2"
+
+    def open(self, pdf_bytes: bytes):
+        from PyPDF2 import PdfReader
+        return PdfReader(BytesIO(pdf_bytes))
+
+    def page_count(self, doc) -> int:
+        return len(doc.pages)
+
+    def page_texts(self, doc, start: int, stop: int) -> list[str]:
+        return [doc.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+EXTRACTORS: dict[str, PDFTextEngine] = {
+    engine.name: engine for engine in (PdfiumEngine(), PyPDF2Engine())
+}
+
+
+def _extract_in_worker(engine_name: str, pdf_bytes: bytes, start: int, stop: int,
+                       max_pages: int) -> tuple[int, list[str]]:
+    """Runs inside a pool process: (page count, texts of pages [start, stop)).
+
+    Pages past the end are ignored; nothing is extracted when the document
+    has more than `max_pages` pages.
+    """
+    engine = EXTRACTORS[engine_name]
+    doc    = engine.open(pdf_bytes)
+    try:
+        count = engine.page_count(doc)
+        texts = [] if count > max_pages else engine.page_texts(doc, start, min(stop, count))
+    finally:
+        engine.close(doc)
+    return count, texts
+
+
+def _warm_up() -> int:
+    """No-op task used to make the pool spawn (and import the engines) up front."""
+    import pypdfium2  # noqa: F401
+    import PyPDF2     # noqa: F401
+    return os.getpid()
+
+
+class _Slot:
+    """An in-flight slot reserved at admission and handed to a document's first pool task."""
+    __slots__ = ("held",)
+
+    def __init__(self):
+        self.held = True
+
+
+class PDFTextPool:
+    """Process pool that extracts PDF text page-parallel under a time budget."""
+
+    def __init__(self, engine: str, fallback: str | None, workers: int, queue_depth: int,
+                 pages_per_task: int, timeout: float, max_pages: int):
+        if engine not in EXTRACTORS or (fallback is not None and fallback not in EXTRACTORS):
+            raise ValueError(f"Unknown PDF text engine. Choose from: {', '.join(EXTRACTORS)}")
+        self.engine         = engine
+        self.fallback       = fallback if fallback != engine else None
+        self.workers        = max(1, workers)
+        self.queue_depth    = max(0, queue_depth)
+        self.pages_per_task = max(1, pages_per_task)
+        self.timeout        = timeout
+        self.max_pages      = max_pages
+        self._executor: ProcessPoolExecutor | None = None
+        self._warming: list = []
+        self._in_flight     = 0
+
+        self.extracted      = 0
+        self.pages          = 0
+        self.fallbacks      = 0
+        self.failed         = 0
+        self.timed_out      = 0
+        self.rejected       = 0
+        self.recycled       = 0
+        self.total_ms       = 0.0
+        self.max_ms         = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    def start(self) -> None:
+        """Spawn the extractor processes (called at app startup so the first upload is warm)."""
+        if self._executor is None:
+            # spawn: never fork a process that is running an event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._warming = [self._executor.submit(_warm_up) for _ in range(self.workers)]
+            logger.info(f"[PDF TEXT] Extractor pool started ({self.workers} workers, engine {self.engine})")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _recycle(self) -> None:
+        """Kill the extractor processes (a timed-out document is still running on
+        one) and start a fresh pool. Tasks of other documents on the old pool
+        fail with BrokenProcessPool and go to the fallback engine on the new one."""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        self.recycled += 1
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+
+    def _release_from_worker(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Done-callback of a pool future (runs on the executor's thread)."""
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass   # loop already closed (shutdown) — nothing left to account for
+
+    async def _ready(self) -> None:
+        """Wait for the processes to finish spawning; start-up is not charged to a document's budget."""
+        self.start()
+        if self._warming:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in self._warming), return_exceptions=True)
+            self._warming = []
+
+    async def _run(self, engine: str, pdf_bytes: bytes, start: int, stop: int,
+                   slot: _Slot | None = None) -> tuple[int, list[str]]:
+        self.start()
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            cf_future = executor.submit(_extract_in_worker, engine, pdf_bytes, start, stop, self.max_pages)
+            # The slot is held until the process actually finishes, even if the
+            # document times out, so the in-flight count reflects real pool load.
+            if slot is not None and slot.held:
+                slot.held = False   # the admission slot now belongs to this task
+            else:
+                self._in_flight += 1
+            cf_future.add_done_callback(lambda _: self._release_from_worker(loop))
+            return await asyncio.wrap_future(cf_future)
+        except BrokenProcessPool:
+            # An extractor process died (e.g. OOM-killed) — rebuild the pool next time
+            if self._executor is executor:
+                self._executor = None
+            raise
+
+    async def _extract_with(self, engine: str, pdf_bytes: bytes, slot: _Slot | None = None) -> tuple[int, str]:
+        """Extract every page with one engine: (page count, text)."""
+        count, texts = await self._run(engine, pdf_bytes, 0, self.pages_per_task, slot)
+        if count > self.max_pages:
+            return count, ""
+        if count > self.pages_per_task:
+            rest = await asyncio.gather(*(
+                self._run(engine, pdf_bytes, start, start + self.pages_per_task)
+                for start in range(self.pages_per_task, count, self.pages_per_task)
+            ))
+            for _, chunk in rest:
+                texts.extend(chunk)
+        return count, "\f".join(texts)
+
+    async def _extract(self, pdf_bytes: bytes, slot: _Slot) -> tuple[int, str]:
+        try:
+            count, text = await self._extract_with(self.engine, pdf_bytes, slot)
+            if text.strip() or count > self.max_pages or self.fallback is None:
+                return count, text
+            logger.info(f"[PDF TEXT] {self.engine} found no text — trying {self.fallback}")
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"[PDF TEXT] {self.engine} failed ({type(e).__name__}: {e}) — trying {self.fallback}")
+        self.fallbacks += 1
+        return await self._extract_with(self.fallback, pdf_bytes)
+
+    async def extract(self, pdf_bytes: bytes) -> str:
+        """Return the text of a PDF without blocking the event loop.
+
+        Raises
+        ------
+        HTTPException(400) when the PDF cannot be read, has more than
+            PDF_TEXT_MAX_PAGES pages, or exceeds the time budget.
+        HTTPException(503) when the pool and its queue are full.
+        """
+        if self._in_flight >= self.capacity:
+            self.rejected += 1
+            logger.warning(f"[PDF TEXT] Extractor pool full ({self._in_flight}/{self.capacity}) — rejecting upload")
+            raise HTTPException(
+                status_code=503,
+                detail="Resume reader is busy. Please retry in a few seconds.",
+                headers={"Retry-After": "2"},
+            )
+        # Take the slot now, before any await, so concurrent uploads cannot all pass the check
+        self._in_flight += 1
+        slot = _Slot()
+        recycled = self.recycled
+        try:
+            await self._ready()
+            began = time.perf_counter()
+            count, text = await asyncio.wait_for(self._extract(pdf_bytes, slot), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.error(f"[PDF TEXT] Extraction exceeded {self.timeout:.0f}s budget — recycling the extractor pool")
+            if self.recycled == recycled:   # not already done by a document that timed out alongside
+                self._recycle()
+            raise HTTPException(status_code=400, detail="PDF is too complex to read. Please upload a simpler export.")
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"[PDF TEXT] Extraction failed: {type(e).__name__}: {e}")
+            raise HTTPException(status_code=400, detail="Failed to read PDF. It may be corrupted or password-protected.")
+        finally:
+            if slot.held:
+                self._release()   # never reached the pool
+
+        if count > self.max_pages:
+            raise HTTPException(status_code=400, detail=f"PDF has too many pages (max {self.max_pages}).")
+
+        elapsed_ms = (time.perf_counter() - began) * 1000
+        self.extracted += 1
+        self.pages     += count
+        self.total_ms  += elapsed_ms
+        self.max_ms     = max(self.max_ms, elapsed_ms)
+        logger.info(f"[PDF TEXT] Extracted {count} page(s), {len(text):,} chars in {elapsed_ms:.0f} ms")
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "engine":        self.engine,
+            "fallback":      self.fallback,
+            "workers":       self.workers,
+            "queue_depth":   self.queue_depth,
+            "in_flight":     self._in_flight,
+            "extracted":     self.extracted,
+            "pages":         self.pages,
+            "fallbacks":     self.fallbacks,
+            "failed":        self.failed,
+            "timed_out":     self.timed_out,
+            "rejected":      self.rejected,
+            "recycled":      self.recycled,
+            "avg_ms":        round(self.total_ms / self.extracted, 1) if self.extracted else 0.0,
+            "max_ms":        round(self.max_ms, 1),
+        }
+
+
+_fallback = os.getenv("PDF_TEXT_FALLBACK", "pypdf2").lower()
+
+pdf_text_pool = PDFTextPool(
+    engine=os.getenv("PDF_TEXT_ENGINE", "pdfium").lower(),
+    fallback=None if _fallback == "none" else _fallback,
+    workers=int(os.getenv("PDF_TEXT_WORKERS", "2")),
+    queue_depth=int(os.getenv("PDF_TEXT_QUEUE_DEPTH", "8")),
+    pages_per_task=int(os.getenv("PDF_TEXT_PAGES_PER_TASK", "4")),
+    timeout=float(os.getenv("PDF_TEXT_TIMEOUT_SECONDS", "10")),
+    max_pages=int(os.getenv("PDF_TEXT_MAX_PAGES", "50")),
+)
@@ -147,7 +147,9 @@ interests: # if mentioned
    - tools
    - methodologies
 
-7. **Output Format**: 
+7. **Pre-segmented Input**: The resume text may already be split into sections by lines starting with `## `, e.g. `## experience (WORK EXPERIENCE)`. The word after `## ` is the suggested YAML key and the text in parentheses is the heading as written in the resume. Use them as hints for structure, never copy the markers into values, and still place content where it belongs if a hint looks wrong. `## header` holds the lines before the first heading (usually name and contact details).
+
+8. **Output Format**: 
    - Return ONLY the YAML content
    - DO NOT wrap the output in markdown code blocks
    - DO NOT include ```yaml or ``` markers
@@ -4,7 +4,7 @@ resume_functions.py
 High-level resume processing functions.
 
 All functions accept a `llm` parameter — a LangChain BaseChatModel built by
-`models.llm_factory.build_llm()` from the user's provider + API key.
+`models.llm_factory.get_llm()` from the user's provider + API key.
 """
 
 from models.chains import (
@@ -53,26 +53,38 @@ async def parse_jd(job_description: str, llm):
     return response
 
 
-async def optimize_resume(resume_content: str, job_description, llm, addons: str = ""):
+async def optimize_resume(resume_content: str, job_description, llm, addons: str = "", on_token=None):
     """Optimize resume based on job description and optional addons.
 
+    When `on_token` (an async callable) is given, the model output is streamed
+    with `astream` and every text chunk is passed to it as it arrives; the
+    return value is the same either way.
+
     After LLM generation, a hard guardrail restores the education section
     verbatim from the original resume so it can never be altered by the model.
     """
     import yaml
 
     chain = build_optimization_chain(llm)
-    response = await chain.ainvoke(
-        input={
-            "job_title":       job_description.job_title,
-            "skills":          ", ".join(job_description.skills),
-            "job_description": job_description.job_description,
-            "resume_yaml":     resume_content,
-            "addons":          addons if addons else "No additional information provided.",
-        }
-    )
-
-    optimized_yaml = response.content
+    chain_input = {
+        "job_title":       job_description.job_title,
+        "skills":          ", ".join(job_description.skills),
+        "job_description": job_description.job_description,
+        "resume_yaml":     resume_content,
+        "addons":          addons if addons else "No additional information provided.",
+    }
+
+    if on_token is None:
+        response = await chain.ainvoke(input=chain_input)
+        optimized_yaml = response.content
+    else:
+        parts = []
+        async for chunk in chain.astream(input=chain_input):
+            text = str(chunk.text)   # plain text even for providers that stream content blocks
+            if text:
+                parts.append(text)
+                await on_token(text)
+        optimized_yaml = "".join(parts)
 
     # ---- Strip markdown fences ----
     if "```" in optimized_yaml:
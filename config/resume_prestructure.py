@@ -0,0 +1,161 @@
+"""
+config/resume_prestructure.py
+-----------------------------
+Deterministic clean-up and sectioning of extracted resume text before the
+res2yaml LLM call.
+
+Raw PDF text carries page furniture (running headers and footers repeated on
+every page, "Page 2 of 3"), runs of whitespace, assorted bullet glyphs and
+words hyphenated across line breaks. All of it is billed as input tokens and
+none of it helps the parser. prestructure_resume() removes it and marks the
+section boundaries it can recognise, so the model receives a compact,
+pre-segmented document:
+
+    ## header
+    Jane Doe
+    Berlin | jane@example.com
+    ## experience (EXPERIENCE)
+    Senior Backend Engineer Company 0 Berlin · Jan 2010 - Dec 2011
+    - Designed and shipped ...
+
+Known headings are labelled with the YAML key the prompt asks for, followed
+by the heading as written. No resume content is dropped; only furniture is,
+and only when it repeats.
+
+How headings are detected:
+    A line is a heading when it is short (at most 5 words, 40 characters) and
+    matches SECTION_HEADINGS (case-insensitive, "&" for "and", trailing colon
+    allowed). Unlisted lines become sections under their own name when they
+    are written in capitals, contain no digits or sentence punctuation and
+    include a HEADING_WORDS word ("SPEAKING & TALKS" → "## speaking & talks").
+    All-caps company names and acronyms ("GOOGLE", "AWS") stay content.
+
+Pages are separated by form feeds ("\\f"), as produced by config/pdf_text.py.
+
+Public API:
+    prestructure_resume(text) -> str
+    SECTION_HEADINGS                                 — heading text → YAML section key
+    HEADING_WORDS                                    — words that mark an unlisted heading
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+SECTION_HEADINGS = {
+    "summary": "summary", "professional summary": "summary", "profile": "summary",
+    "about me": "summary", "objective": "summary", "career objective": "summary",
+    "experience": "experience", "work experience": "experience",
+    "professional experience": "experience", "employment": "experience",
+    "employment history": "experience", "work history": "experience",
+    "relevant experience": "experience", "internships": "experience",
+    "education": "education", "academic background": "education", "academics": "education",
+    "projects": "projects", "personal projects": "projects", "academic projects": "projects",
+    "key projects": "projects",
+    "skills": "technical_skills", "technical skills": "technical_skills",
+    "core competencies": "technical_skills", "technologies": "technical_skills",
+    "tech stack": "technical_skills", "tools and technologies": "technical_skills",
+    "certifications": "certifications", "certificates": "certifications",
+    "licenses and certifications": "certifications",
+    "publications": "publications", "research": "publications",
+    "awards": "awards", "honors": "awards", "honors and awards": "awards",
+    "achievements": "awards", "accomplishments": "awards",
+    "extracurricular activities": "extracurricular_activities",
+    "extracurriculars": "extracurricular_activities", "leadership": "extracurricular_activities",
+    "volunteer experience": "extracurricular_activities", "volunteering": "extracurricular_activities",
+    "positions of responsibility": "extracurricular_activities",
+    "languages": "languages", "interests": "interests", "hobbies": "interests",
+    "patents": "patents", "coursework": "coursework", "relevant coursework": "coursework",
+    "teaching experience": "teaching_experience", "speaking engagements": "speaking_engagements",
+    "training": "training", "references": "references",
+}
+
+HEADING_WORDS = frozenset({
+    "experience", "education", "projects", "skills", "activities", "engagements", "talks",
+    "awards", "honors", "certifications", "publications", "courses", "coursework", "training",
+    "involvement", "service", "interests", "achievements", "leadership", "volunteer",
+    "volunteering", "languages", "research", "patents", "positions", "contributions",
+    "summary", "profile", "memberships", "affiliations", "references", "highlights",
+})
+
+MAX_HEADING_WORDS = 5
+MAX_HEADING_CHARS = 40
+# Lines this close to the top or bottom of a page are candidates for page furniture
+FURNITURE_EDGE_LINES = 3
+
+_BULLET_RE      = re.compile(r"^[\x7f\uf0a7\uf0b7•●▪■◦○‣∙·*–—-]\s*")   # \x7f / U+F0B7: bullets as PyPDF2 and Symbol fonts emit them
+_SPACES_RE      = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u205f\u3000]+")
+_PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_HYPHEN_END_RE  = re.compile(r"[a-z]-$")
+_SENTENCE_PUNCT = re.compile(r"[.,;!?@|/]")
+
+
+def _clean_lines(page: str) -> list[str]:
+    lines = []
+    for raw in unicodedata.normalize("NFKC", page).splitlines():
+        line = _SPACES_RE.sub(" ", raw).strip()
+        if not line:
+            continue
+        if _BULLET_RE.match(line) and len(line) > 2:
+            line = "- " + _BULLET_RE.sub("", line)
+        # Re-join words hyphenated across a line break ("develop-" / "ment")
+        if lines and _HYPHEN_END_RE.search(lines[-1]) and line[:1].islower():
+            lines[-1] = lines[-1][:-1] + line
+            continue
+        lines.append(line)
+    return lines
+
+
+def _furniture(pages: list[list[str]]) -> set[str]:
+    """Lines repeated at the top or bottom of more than one page."""
+    if len(pages) < 2:
+        return set()
+    seen = Counter()
+    for lines in pages:
+        seen.update(set(lines[:FURNITURE_EDGE_LINES] + lines[-FURNITURE_EDGE_LINES:]))
+    return {line for line, count in seen.items() if count > 1}
+
+
+def _known_section(line: str) -> str | None:
+    """YAML key for a line that is one of SECTION_HEADINGS, else None."""
+    if len(line) > MAX_HEADING_CHARS or len(line.split()) > MAX_HEADING_WORDS:
+        return None
+    return SECTION_HEADINGS.get(re.sub(r"\s*&\s*", " and ", line.rstrip(":").strip().lower()))
+
+
+def _other_section(line: str) -> str | None:
+    """Label for an unlisted heading written in capitals ("SPEAKING & TALKS"), else None."""
+    heading = line.rstrip(":").strip()
+    if (len(line) > MAX_HEADING_CHARS or len(line.split()) > MAX_HEADING_WORDS
+            or not heading.isupper() or _SENTENCE_PUNCT.search(heading)
+            or any(ch.isdigit() for ch in heading)):
+        return None
+    label = heading.lower()
+    return label if HEADING_WORDS.intersection(re.findall(r"[a-z]+", label)) else None
+
+
+def prestructure_resume(text: str) -> str:
+    """Compact, section-marked version of extracted resume text (see module docstring)."""
+    pages = [_clean_lines(page) for page in text.split("\f")]
+    furniture = _furniture(pages)
+
+    out: list[str] = []
+    first_page = True
+    for lines in pages:
+        for line in lines:
+            if _PAGE_NUMBER_RE.match(line):
+                continue
+            # Keep the first occurrence of a running header/footer (often the name line)
+            if line in furniture and not first_page:
+                continue
+            key = _known_section(line) or _other_section(line)
+            if key is not None:
+                heading = line.rstrip(":").strip()
+                out.append(f"## {key}" if heading.lower() == key else f"## {key} ({heading})")
+                continue
+            if not out:
+                out.append("## header")
+            out.append(line)
+        if lines:
+            first_page = False
+    return "\n".join(out)
@@ -0,0 +1,202 @@
+"""
+config/resume_store.py
+----------------------
+Versioned, compressed resume storage (models.Resume).
+
+Each upload becomes an immutable row in `resumes`, holding the YAML
+zstd-compressed, its SHA-256 content hash and parse metadata.
+User.active_resume_id points at the current version. Re-uploading identical
+content reuses the existing version, so every cache keyed by the content hash
+(ATS results, the fast-ATS index, rendered PDFs) stays warm.
+
+Versions never change, so decompressed YAML is cached per process by version
+id. A request that reads the active resume therefore usually costs no query
+at all (the user row itself comes from the auth cache).
+
+Each version also records the SHA-256 of the PDF it was parsed from and of
+the normalized extracted text. An upload whose PDF bytes (or, failing that,
+extracted text) match an earlier one reuses that YAML instead of calling the
+res2yaml LLM again. Matches are limited to the uploader's own versions unless
+UPLOAD_DEDUP_SCOPE=global, which also reuses other users' parses of the
+byte-identical file or text.
+
+Configuration (env):
+    RESUME_ZSTD_LEVEL        zstd compression level (default 10)
+    RESUME_CACHE_SIZE        decompressed versions kept per process (default 1024)
+    UPLOAD_DEDUP_SCOPE       user | global | off (default user)
+
+Public API:
+    ResumeVersion                                   — immutable snapshot (id, content_hash, yaml, …)
+    resume_content_hash(yaml_str) -> str
+    compress_yaml(yaml_str) -> bytes / decompress_yaml(blob) -> str
+    upload_text_hash(text) -> str                   — SHA-256 of whitespace-normalized text
+    await store_resume(db, user, yaml_str, filename, ai_provider, ai_model,
+                       pdf_hash=None, text_hash=None) -> ResumeVersion
+    await reuse_parsed_upload(db, user, filename, pdf_hash, text_hash=None) -> ResumeVersion | None
+    await load_resume(db, resume_id, user_id) -> ResumeVersion | None
+    get_active_resume                               — FastAPI dependency
+"""
+
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+import zstandard
+from fastapi import Depends
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.auth import get_current_user
+from config.cache import TTLCache
+from config.database import get_async_db
+from models.database_models import Resume, User
+
+logger = logging.getLogger("Sculpt")
+
+RESUME_ZSTD_LEVEL  = int(os.getenv("RESUME_ZSTD_LEVEL", "10"))
+UPLOAD_DEDUP_SCOPE = os.getenv("UPLOAD_DEDUP_SCOPE", "user").lower()
+
+# Versions are immutable, so entries only leave by LRU eviction (or the long TTL)
+_version_cache = TTLCache(maxsize=int(os.getenv("RESUME_CACHE_SIZE", "1024")), ttl=86_400, name="resume_versions")
+
+
+@dataclass(frozen=True)
+class ResumeVersion:
+    id:           uuid.UUID
+    user_id:      uuid.UUID
+    content_hash: str
+    yaml:         str
+    filename:     str | None
+    created_at:   datetime | None
+
+
+def resume_content_hash(yaml_str: str) -> str:
+    """SHA-256 hex digest of a resume YAML string."""
+    return hashlib.sha256(yaml_str.encode("utf-8")).hexdigest()
+
+
+def upload_text_hash(text: str) -> str:
+    """SHA-256 of extracted PDF text after NFKC + whitespace normalization.
+
+    Re-exports of the same resume often differ only in byte layout or line
+    wrapping; this makes them hash the same.
+    """
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def compress_yaml(yaml_str: str) -> bytes:
+    return zstandard.ZstdCompressor(level=RESUME_ZSTD_LEVEL).compress(yaml_str.encode("utf-8"))
+
+
+def decompress_yaml(blob: bytes) -> str:
+    return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+
+
+def _version_from_row(row: Resume) -> ResumeVersion:
+    version = ResumeVersion(
+        id=row.id,
+        user_id=row.user_id,
+        content_hash=row.content_hash,
+        yaml=decompress_yaml(row.yaml_zstd),
+        filename=row.filename,
+        created_at=row.created_at,
+    )
+    _version_cache.set(row.id, version)
+    return version
+
+
+async def store_resume(db: AsyncSession, user: User, yaml_str: str, filename: str | None,
+                       ai_provider: str | None = None, ai_model: str | None = None,
+                       pdf_hash: str | None = None, text_hash: str | None = None) -> ResumeVersion:
+    """Save a parsed resume as a version (reusing an identical one) and make it active.
+
+    Reusing a version points its upload fingerprints at the latest upload.
+    Flushes but does not commit — the caller commits, so the version and the
+    user's pointer change together.
+    """
+    digest = resume_content_hash(yaml_str)
+    stmt = pg_insert(Resume).values(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        content_hash=digest,
+        yaml_zstd=compress_yaml(yaml_str),
+        yaml_bytes=len(yaml_str.encode("utf-8")),
+        filename=filename,
+        ai_provider=ai_provider,
+        ai_model=ai_model,
+        pdf_hash=pdf_hash,
+        text_hash=text_hash,
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_resumes_user_content_hash",
+            set_={
+                "pdf_hash":  func.coalesce(stmt.excluded.pdf_hash, Resume.pdf_hash),
+                "text_hash": func.coalesce(stmt.excluded.text_hash, Resume.text_hash),
+            },
+        )
+    )
+    row = (await db.execute(
+        select(Resume).where(Resume.user_id == user.id, Resume.content_hash == digest)
+    )).scalar_one()
+
+    user.active_resume_id   = row.id
+    user.resume_filename    = filename
+    user.resume_uploaded_at = datetime.utcnow()
+    await db.flush()
+    return _version_from_row(row)
+
+
+async def reuse_parsed_upload(db: AsyncSession, user: User, filename: str | None,
+                              pdf_hash: str, text_hash: str | None = None) -> ResumeVersion | None:
+    """Make an earlier parse of the same upload the active version, skipping the LLM.
+
+    Matches on `text_hash` when given, otherwise on `pdf_hash`. The user's own
+    versions are preferred, then (UPLOAD_DEDUP_SCOPE=global) anyone's, newest
+    first. Returns None on a miss. Like store_resume, the caller commits.
+    """
+    if UPLOAD_DEDUP_SCOPE == "off":
+        return None
+
+    query = select(Resume).where(Resume.text_hash == text_hash if text_hash else Resume.pdf_hash == pdf_hash)
+    if UPLOAD_DEDUP_SCOPE == "global":
+        query = query.order_by((Resume.user_id == user.id).desc(), Resume.created_at.desc())
+    else:
+        query = query.where(Resume.user_id == user.id).order_by(Resume.created_at.desc())
+    row = (await db.execute(query.limit(1))).scalar_one_or_none()
+    if row is None:
+        return None
+
+    logger.info(f"[UPLOAD DEDUP] Reusing parse of version {row.id} ({'text' if text_hash else 'pdf'} match)")
+    return await store_resume(
+        db, user, decompress_yaml(row.yaml_zstd), filename, row.ai_provider, row.ai_model,
+        pdf_hash=pdf_hash, text_hash=text_hash or row.text_hash,
+    )
+
+
+async def load_resume(db: AsyncSession, resume_id, user_id) -> ResumeVersion | None:
+    """Return one of the user's resume versions (from the process cache when possible)."""
+    if resume_id is None:
+        return None
+    version = _version_cache.get(resume_id)
+    if version is not None:
+        return version if version.user_id == user_id else None
+    row = (await db.execute(
+        select(Resume).where(Resume.id == resume_id, Resume.user_id == user_id)
+    )).scalar_one_or_none()
+    return _version_from_row(row) if row is not None else None
+
+
+async def get_active_resume(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> ResumeVersion | None:
+    """FastAPI dependency: the current user's active resume version, or None."""
+    return await load_resume(db, current_user.active_resume_id, current_user.id)
@@ -0,0 +1,264 @@
+"""
+config/skills.py
+----------------
+Skill taxonomy for LLM-free text analysis.
+
+Every skill has a canonical id, a display name (spelled the way it should be
+reported) and aliases, so "PostgreSQL", "Postgres" and "postgres db" are one
+skill. Comparisons are done on normalize_term() token tuples: lower-cased,
+with punctuation dropped except a trailing "+" or "#", so "node.js" and
+"Node JS" are the same term and "C++" stays distinct from "C#".
+
+The taxonomy is compiled once, at import, into a token-level Aho-Corasick
+automaton: one pass over a text's tokens finds every alias mention, however
+many aliases there are. Overlapping mentions resolve leftmost-longest
+("Apache Kafka" is one mention, not "Apache" and "Kafka"). The same compiled
+instance serves the resume diff (main.compute_resume_diff), fast ATS scoring
+and delta re-scoring (config/ats_fast.py), the local JD parser
+(config/jd_local.py) and the JD parse cache.
+
+Single words that are also common English or names ("go", "rest", "spring",
+"excel", "net", "julia", "oracle", "chef", "spark", "security", "statistics",
+"networking", "caching", "transformers") are left out or only listed in an
+unambiguous form ("Golang", "REST API", "Spring Boot", "Microsoft Excel",
+"dotnet", "Oracle Database", "Chef Infra", "Apache Spark", "Information
+Security"), since a JD full of "go", "head chef" or "security clearance"
+would otherwise report false skills. "HTTP" is listed only as "HTTP/2" or
+"HTTP protocol" so that URLs in a posting do not count. The same goes
+for soft skills that are ordinary prose ("our organization", "take
+ownership"): only "organizational skills" and "sense of ownership" count.
+
+Public API:
+    normalize_term(text) -> tuple[str, ...]
+    Skill                                           — (id, name, aliases, soft)
+    skill_taxonomy                                  — the compiled SkillTaxonomy
+    skill_taxonomy.lookup(term) -> Skill | None     — skill a whole term names
+    skill_taxonomy.find(text) -> list[Skill]        — skills mentioned, in order of first mention
+    skill_taxonomy.ids(text) -> frozenset[str]      — ids of the skills mentioned
+    find_skills(text) -> list[str]                  — display names of skills mentioned
+    skill_key(term) -> str                          — canonical id, or the normalised term
+    dedupe_skills(names) -> list[str]               — drop aliases of skills already listed
+    SOFT_SKILLS                                     — display names of soft skills
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+[+#]*")
+
+# "Display name | alias | alias" — aliases are matched after normalize_term()
+TECHNICAL_SKILLS = (
+    # Languages
+    "Python", "Java", "JavaScript | JS | ECMAScript", "TypeScript", "Golang | Go lang",
+    "Rust", "C++ | cpp", "C# | csharp", "Kotlin", "Scala", "Ruby", "PHP", "Perl", "Elixir",
+    "Erlang", "Haskell", "Clojure", "Dart", "Objective-C", "MATLAB", "Bash | shell scripting",
+    "PowerShell", "SQL", "PL/SQL", "T-SQL", "Solidity", "HTML | HTML5", "CSS | CSS3", "Sass | SCSS",
+    "Groovy", "Lua", "VBA", "COBOL", "Fortran",
+    # Frontend / mobile
+    "React | React.js | ReactJS", "React Native", "Next.js | NextJS", "Vue.js | Vue | VueJS",
+    "Nuxt.js | NuxtJS", "Angular | AngularJS", "Svelte", "Redux", "jQuery",
+    "Tailwind CSS | Tailwind", "Bootstrap", "Webpack", "Vite", "Flutter", "SwiftUI",
+    "Jetpack Compose", "Android", "iOS", "Xamarin", "Ionic", "Electron",
+    # Backend frameworks
+    "Node.js | NodeJS", "Express.js | ExpressJS", "NestJS", "Django", "Flask", "FastAPI",
+    "Spring Boot", "Ruby on Rails", "Laravel", "Symfony", "ASP.NET", ".NET Core | dotnet",
+    "GraphQL", "gRPC", "REST API | REST APIs | RESTful API | RESTful APIs | RESTful services",
+    "WebSockets | WebSocket", "Microservices | microservice architecture", "Celery", "RabbitMQ",
+    "Kafka | Apache Kafka", "ActiveMQ", "NATS", "Protocol Buffers | protobuf",
+    # Data stores
+    "PostgreSQL | Postgres | postgres db | psql", "MySQL", "MariaDB", "SQLite", "Oracle Database | Oracle DB | Oracle RDBMS",
+    "SQL Server | MSSQL | Microsoft SQL Server", "MongoDB | Mongo", "Redis", "Memcached",
+    "Cassandra | Apache Cassandra", "DynamoDB | Dynamo DB", "Elasticsearch | Elastic Search",
+    "OpenSearch", "Neo4j", "CouchDB", "Firebase", "Firestore", "Supabase", "ClickHouse",
+    "Snowflake", "BigQuery", "Redshift | Amazon Redshift", "Databricks", "InfluxDB",
+    "TimescaleDB", "Pinecone", "Milvus", "Weaviate", "ChromaDB", "pgvector",
+    # Cloud / infrastructure
+    "AWS | Amazon Web Services", "Azure | Microsoft Azure", "GCP | Google Cloud | Google Cloud Platform",
+    "Heroku", "Vercel", "Netlify", "DigitalOcean", "Cloudflare", "EC2 | Amazon EC2",
+    "S3 | Amazon S3", "AWS Lambda", "ECS | Amazon ECS", "EKS | Amazon EKS", "GKE", "AKS",
+    "CloudFormation", "Terraform", "Pulumi", "Ansible", "Chef Infra | Chef cookbooks | Opscode Chef", "Puppet", "Docker",
+    "Kubernetes | k8s", "Helm", "OpenShift", "Istio", "Linux", "Unix", "Nginx", "Serverless",
+    "Vagrant",
+    # DevOps / tooling
+    "Git", "GitHub", "GitLab", "Bitbucket", "GitHub Actions", "GitLab CI", "Jenkins",
+    "CircleCI", "Travis CI", "Argo CD | ArgoCD", "CI/CD | CICD | CI CD pipelines",
+    "Prometheus", "Grafana", "Datadog", "New Relic", "Splunk", "ELK | ELK Stack", "Kibana",
+    "Logstash", "OpenTelemetry", "Sentry", "PagerDuty", "Jira", "Confluence", "Postman",
+    "Swagger", "OpenAPI",
+    # Testing
+    "pytest", "JUnit", "Jest", "Mocha", "Cypress", "Playwright", "Selenium",
+    "unit testing | unit tests", "integration testing | integration tests",
+    "test automation | automated testing", "TDD | test driven development",
+    # Data / ML / AI
+    "Machine Learning | ML", "Deep Learning", "NLP | Natural Language Processing",
+    "Computer Vision", "Data Science", "Data Engineering", "Data Analysis | data analytics",
+    "Data Visualization", "Statistical Analysis | statistical modeling | statistical modelling | applied statistics", "TensorFlow", "PyTorch", "Keras",
+    "scikit-learn | sklearn", "XGBoost", "LightGBM", "pandas", "NumPy", "SciPy", "Matplotlib",
+    "Jupyter | Jupyter Notebook", "Apache Spark | Spark SQL | Spark Streaming", "PySpark", "Hadoop | Apache Hadoop",
+    "Apache Hive", "Airflow | Apache Airflow", "dbt", "Flink | Apache Flink",
+    "Apache Beam", "ETL", "ELT", "Tableau", "Power BI | PowerBI", "Looker",
+    "Microsoft Excel | MS Excel", "LLM | LLMs | large language models | large language model",
+    "Generative AI | GenAI", "LangChain", "LlamaIndex", "Hugging Face | HuggingFace",
+    "Hugging Face Transformers | transformer models | transformer architecture", "RAG | retrieval augmented generation", "Prompt Engineering",
+    "OpenAI API", "MLOps", "MLflow", "Kubeflow", "SageMaker | Amazon SageMaker",
+    "Vertex AI", "OpenCV",
+    # Practices / architecture
+    "Agile", "Scrum", "Kanban", "DevOps", "SRE | Site Reliability Engineering",
+    "Distributed Systems", "System Design", "Event-Driven Architecture | event driven",
+    "OOP | Object-Oriented Programming | object oriented design", "Functional Programming",
+    "Design Patterns", "Data Structures", "Algorithms", "Domain-Driven Design | DDD",
+    "Infrastructure as Code | IaC", "Observability", "Performance Tuning | performance optimization",
+    "Distributed Caching | caching strategies | caching layer", "Concurrency", "Multithreading",
+    "Computer Networking | network engineering | network protocols", "TCP/IP", "HTTP/2 | HTTP protocol",
+    "OAuth | OAuth 2.0 | OAuth2", "JWT", "SSO | single sign on", "SAML",
+    "Information Security | InfoSec | application security | AppSec | security engineering",
+    "Cybersecurity", "Penetration Testing | pentesting", "Encryption", "IAM",
+    "Embedded Systems", "RTOS", "FPGA", "Blockchain", "Web3",
+    # Design / product
+    "Figma", "Adobe XD", "Photoshop", "Illustrator", "UI/UX | UX/UI | UI UX design",
+    "UX Research", "Wireframing", "Prototyping", "Product Management",
+    "A/B Testing | AB testing | split testing", "SEO", "Google Analytics | GA4",
+    # Business tools
+    "Salesforce", "SAP", "HubSpot", "ServiceNow", "Zendesk", "Shopify", "WordPress",
+)
+
+SOFT_SKILL_ENTRIES = (
+    "communication | communication skills", "leadership | leadership skills",
+    "collaboration", "teamwork", "problem solving | problem solving skills",
+    "critical thinking", "mentoring | mentorship", "sense of ownership | ownership mindset", "adaptability",
+    "time management", "stakeholder management", "attention to detail", "creativity",
+    "presentation | presentation skills", "negotiation", "interpersonal skills",
+    "decision making", "organizational skills | organisational skills", "self motivated | self starter",
+    "analytical skills", "team player",
+)
+
+
+def normalize_term(text: str) -> tuple[str, ...]:
+    """Lower-case token tuple used for every comparison ("Node.js" → ("node", "js"))."""
+    return tuple(_TOKEN_RE.findall(str(text).lower()))
+
+
+@dataclass(frozen=True)
+class Skill:
+    id:      str                 # normalised display name, "-"-joined ("node-js", "c++")
+    name:    str
+    aliases: tuple[str, ...]
+    soft:    bool = False
+
+
+def _parse_entries(entries, soft: bool = False) -> list[Skill]:
+    skills = []
+    for entry in entries:
+        name, *aliases = (part.strip() for part in entry.split("|"))
+        skills.append(Skill(id="-".join(normalize_term(name)), name=name, aliases=tuple(aliases), soft=soft))
+    return skills
+
+
+class SkillTaxonomy:
+    """Alias index plus a token-level Aho-Corasick automaton over every alias."""
+
+    def __init__(self, skills: list[Skill]):
+        self.skills: dict[str, Skill] = {}
+        self._aliases: dict[tuple[str, ...], Skill] = {}
+        for skill in skills:
+            if skill.id in self.skills:
+                raise ValueError(f"Duplicate skill id {skill.id!r}")
+            self.skills[skill.id] = skill
+            for alias in (skill.name, *skill.aliases):
+                term = normalize_term(alias)
+                if term:
+                    # First skill to claim an alias keeps it
+                    self._aliases.setdefault(term, skill)
+
+        # Trie over alias tokens; state 0 is the root
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out:  list[tuple[tuple[int, Skill], ...]] = [()]   # (alias length, skill) ending here
+        for term, skill in self._aliases.items():
+            state = 0
+            for token in term:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] = ((len(term), skill),)
+
+        # Failure links, breadth first; outputs inherit their failure state's
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def lookup(self, term: str) -> Skill | None:
+        """The skill `term` names as a whole ("Postgres" → PostgreSQL), else None."""
+        return self._aliases.get(normalize_term(term))
+
+    def _mentions(self, tokens: tuple[str, ...]) -> list[Skill]:
+        """Non-overlapping alias mentions in token order, leftmost-longest."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits, state = [], 0
+        for end, token in enumerate(tokens, start=1):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, skill in out[state]:
+                hits.append((end - length, -length, skill))
+        if not hits:
+            return []
+
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        mentions, covered = [], 0
+        for start, neg_length, skill in hits:
+            if start >= covered:
+                mentions.append(skill)
+                covered = start - neg_length
+        return mentions
+
+    def find(self, text: str) -> list[Skill]:
+        """Skills mentioned in `text`, each once, in order of first mention."""
+        return list(dict.fromkeys(self._mentions(normalize_term(text))))
+
+    def ids(self, text: str) -> frozenset[str]:
+        return frozenset(skill.id for skill in self._mentions(normalize_term(text)))
+
+
+skill_taxonomy = SkillTaxonomy(_parse_entries(TECHNICAL_SKILLS) + _parse_entries(SOFT_SKILL_ENTRIES, soft=True))
+
+SOFT_SKILLS = frozenset(skill.name for skill in skill_taxonomy.skills.values() if skill.soft)
+
+
+def find_skills(text: str) -> list[str]:
+    """Display names of the skills mentioned in `text`, in order of first mention."""
+    return [skill.name for skill in skill_taxonomy.find(text)]
+
+
+def skill_key(term: str) -> str:
+    """Comparison key for a skill string: its canonical id when the taxonomy
+    knows it, else its normalised tokens ("Postgres" → "postgresql")."""
+    skill = skill_taxonomy.lookup(term)
+    return skill.id if skill is not None else " ".join(normalize_term(term))
+
+
+def dedupe_skills(names: list[str]) -> list[str]:
+    """Drop entries naming a skill already in the list, keeping the first spelling."""
+    seen, kept = set(), []
+    for name in names:
+        key = skill_key(name)
+        if key and key not in seen:
+            seen.add(key)
+            kept.append(name)
+    return kept
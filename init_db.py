@@ -4,7 +4,10 @@ Creates all tables in the Supabase PostgreSQL database
 """
 
 from config.database import engine, Base, test_connection
-from models.database_models import User, OptimizedResume, GenerationUsage, ParsedJDCache
+from models.database_models import User, Resume, OptimizedResume, GenerationUsage, ParsedJDCache, ATSResultCache, OptimizationJob, IdempotencyKey
+from config.resume_store import compress_yaml, resume_content_hash
+from sqlalchemy import inspect, text
+import uuid
 import logging
 from dotenv import load_dotenv
 load_dotenv()
@@ -23,17 +26,105 @@ def init_database():
 
     try:
         Base.metadata.create_all(bind=engine)
+        upgrade_schema()
         logger.info("[OK] Successfully created all tables:")
-        logger.info("   - users               (auth + resume storage)")
+        logger.info("   - users               (auth + active resume pointer)")
+        logger.info("   - resumes             (versioned, compressed resume YAML)")
         logger.info("   - optimized_resumes   (generation history)")
         logger.info("   - generation_usage    (weekly paywall tracking)")
-        logger.info("   - parsed_jd_cache     (LLM JD parse cache)")
+        logger.info("   - parsed_jd_cache     (local / LLM JD parse cache)")
+        logger.info("   - ats_result_cache    (DetailedATS result cache)")
+        logger.info("   - optimization_jobs   (background optimization queue)")
+        logger.info("   - idempotency_keys    (Idempotency-Key replay store)")
         return True
     except Exception as e:
         logger.error(f"[ERROR] Failed to create tables: {e}")
         return False
 
 
+# Columns added to tables that already existed in deployed databases
+COLUMN_UPGRADES = (
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS active_resume_id UUID "
+    "CONSTRAINT fk_users_active_resume_id REFERENCES resumes(id) ON DELETE SET NULL",
+    "ALTER TABLE optimized_resumes ADD COLUMN IF NOT EXISTS resume_id UUID REFERENCES resumes(id) ON DELETE SET NULL",
+    "ALTER TABLE optimization_jobs ADD COLUMN IF NOT EXISTS resume_id UUID REFERENCES resumes(id) ON DELETE SET NULL",
+    "ALTER TABLE resumes ADD COLUMN IF NOT EXISTS pdf_hash VARCHAR(64)",
+    "ALTER TABLE resumes ADD COLUMN IF NOT EXISTS text_hash VARCHAR(64)",
+    "ALTER TABLE parsed_jd_cache ADD COLUMN IF NOT EXISTS parser VARCHAR NOT NULL DEFAULT 'llm'",
+    "ALTER TABLE parsed_jd_cache ADD COLUMN IF NOT EXISTS confidence DOUBLE PRECISION",
+)
+
+
+def upgrade_schema():
+    """Bring tables created by an older version up to date (safe to re-run).
+
+    create_all() only creates missing tables, so columns and indexes added to
+    existing tables later are created here, and data is moved where needed.
+    """
+    with engine.begin() as conn:
+        for ddl in COLUMN_UPGRADES:
+            conn.execute(text(ddl))
+        migrate_inline_resumes(conn)
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate_inline_resumes(conn):
+    """Copy resumes stored inline on users.resume_yaml into `resumes` (safe to re-run).
+
+    The column itself is kept, so a rollback to code that still reads it
+    loses nothing. Drop it with `python init_db.py --drop-inline-resumes`
+    once the versioned read path has shipped.
+    """
+    user_columns = {col["name"] for col in inspect(conn).get_columns("users")}
+    if "resume_yaml" not in user_columns:
+        return
+
+    rows = conn.execute(text(
+        "SELECT id, resume_yaml, resume_filename, resume_uploaded_at FROM users "
+        "WHERE resume_yaml IS NOT NULL AND active_resume_id IS NULL"
+    )).all()
+    for user_id, resume_yaml, filename, uploaded_at in rows:
+        digest = resume_content_hash(resume_yaml)
+        conn.execute(text(
+            "INSERT INTO resumes (id, user_id, content_hash, yaml_zstd, yaml_bytes, filename, created_at) "
+            "VALUES (:id, :user_id, :hash, :blob, :size, :filename, COALESCE(:created_at, now())) "
+            "ON CONFLICT ON CONSTRAINT uq_resumes_user_content_hash DO NOTHING"
+        ), {
+            "id": uuid.uuid4(), "user_id": user_id, "hash": digest,
+            "blob": compress_yaml(resume_yaml), "size": len(resume_yaml.encode("utf-8")),
+            "filename": filename, "created_at": uploaded_at,
+        })
+        conn.execute(text(
+            "UPDATE users SET active_resume_id = "
+            "(SELECT id FROM resumes WHERE user_id = :user_id AND content_hash = :hash) WHERE id = :user_id"
+        ), {"user_id": user_id, "hash": digest})
+
+    if rows:
+        logger.info(f"[OK] Copied {len(rows)} inline resume(s) to the resumes table")
+
+
+def drop_inline_resumes():
+    """Drop users.resume_yaml after checking every inline resume was copied to `resumes`."""
+    with engine.begin() as conn:
+        user_columns = {col["name"] for col in inspect(conn).get_columns("users")}
+        if "resume_yaml" not in user_columns:
+            logger.info("[OK] users.resume_yaml already dropped")
+            return True
+        missing = conn.execute(text(
+            "SELECT count(*) FROM users u WHERE u.resume_yaml IS NOT NULL AND NOT EXISTS "
+            "(SELECT 1 FROM resumes r WHERE r.user_id = u.id AND r.content_hash = encode(sha256(convert_to(u.resume_yaml, 'UTF8')), 'hex'))"
+        )).scalar()
+        if missing:
+            logger.error(f"[ERROR] {missing} inline resume(s) have no copy in the resumes table — run init_db.py first")
+            return False
+        conn.execute(text("ALTER TABLE users DROP COLUMN resume_yaml"))
+    logger.info("[OK] Dropped users.resume_yaml")
+    return True
+
+
 def drop_all_tables():
     """Drop all tables — use with caution!"""
     logger.warning("[WARN] Dropping all tables...")
@@ -48,6 +139,8 @@ def drop_all_tables():
 
 if __name__ == "__main__":
     import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "--drop-inline-resumes":
+        sys.exit(0 if drop_inline_resumes() else 1)
     if len(sys.argv) > 1 and sys.argv[1] == "--drop":
         drop_all_tables()
     init_database()
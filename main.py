@@ -1,36 +1,66 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Depends, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Depends, Form, Header, Query
 from fastapi.responses import StreamingResponse, Response
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, func, text, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from schema.schema import (
     UserLogin, UserSignup, CalculateATS, AuthResponse,
     DetailedATS, OptimizeResumeRequest, GeneratePDFRequest,
-    ValidateKeyRequest, AIProviderConfig
+    ValidateKeyRequest, AIProviderConfig, parsedJobDescription, ParseJDRequest
 )
 from dotenv import load_dotenv
-from config.database import get_db, test_connection
+from config.database import get_async_db, AsyncSessionLocal, test_connection
+from config.cache import TTLCache, SingleFlight
 from config.auth import (
     get_password_hash,
     create_access_token,
     authenticate_user,
-    get_current_user
+    get_current_user,
+    invalidate_cached_user,
+    user_cache,
 )
-from models.database_models import User, OptimizedResume, GenerationUsage, ParsedJDCache
-from config.pdf_generator import generate_pdf_from_yaml_string
+from models.database_models import User, OptimizedResume, GenerationUsage, ParsedJDCache, ATSResultCache, OptimizationJob
+from config.resume_store import (
+    ResumeVersion,
+    get_active_resume,
+    load_resume,
+    reuse_parsed_upload,
+    store_resume,
+    upload_text_hash,
+)
+from config import idempotency
+from config.idempotency import IdempotentReplay, request_fingerprint
+from config.pdf_renderer import pdf_render_pool
+from config.pdf_text import pdf_text_pool
+from config.resume_prestructure import prestructure_resume
+from config.jd_local import JD_LOCAL_MIN_CONFIDENCE, JD_LOCAL_PARSER, parse_jd_locally
+from config.pdf_cache import pdf_cache, pdf_cache_key, render_pdf_cached, schedule_prewarm
+from config.jobs import JobWorker, LeaseLost, enqueue_job
 from config.email import send_verification_email
-from io import BytesIO
 from config.resume_functions import ats_detailed, optimize_resume, parse_jd
-from models.chains import llm, build_res2yaml_chain
-from models.llm_factory import build_llm
+from config.ats_fast import score_fast, rescore_delta
+from config.skills import dedupe_skills, skill_key
+from models.chains import llm, build_res2yaml_chain, purge_idle_chains, chain_cache_stats
+from models.llm_factory import (
+    build_llm, get_llm, PROVIDER_DEFAULTS,
+    purge_idle_llm_clients, aclose_llm_clients, llm_client_stats,
+)
 import yaml
+import asyncio
 from datetime import datetime, timedelta, date
+from typing import Literal
 import os
+import base64
 import hashlib
+import json
 import secrets
-from PyPDF2 import PdfReader
 import logging
 import logging.handlers
 import uuid
+from contextlib import aclosing
+from dataclasses import dataclass
 
 def _mask_email(email: str) -> str:
     """Mask an email address for safe logging: user@example.com → u***@example.com"""
@@ -68,6 +98,7 @@ async def cors_and_security_middleware(request, call_next):
         )
     response = await call_next(request)
     response.headers["Access-Control-Allow-Origin"]  = "*"
+    response.headers["Access-Control-Expose-Headers"] = "ETag, Content-Disposition"
     # Security headers (L3)
     response.headers["X-Content-Type-Options"]       = "nosniff"
     response.headers["X-Frame-Options"]              = "DENY"
@@ -91,69 +122,118 @@ def get_week_start(today: date = None) -> date:
     return d - timedelta(days=d.weekday())
 
 
-def get_weekly_usage(user_id, db: Session) -> int:
+async def get_weekly_usage(user_id, db: AsyncSession) -> int:
     """Return the number of generations used this week by the user."""
     week_start = get_week_start()
-    record = db.query(GenerationUsage).filter(
+    result = await db.execute(select(GenerationUsage.count).where(
         GenerationUsage.user_id == user_id,
         GenerationUsage.week_start == week_start
-    ).first()
-    return record.count if record else 0
+    ))
+    return result.scalar() or 0
 
 
-def increment_weekly_usage(user_id, db: Session) -> int:
-    """Increment the weekly generation counter and return new count."""
-    week_start = get_week_start()
-    record = db.query(GenerationUsage).filter(
-        GenerationUsage.user_id == user_id,
-        GenerationUsage.week_start == week_start
-    ).first()
+@dataclass
+class UsageReservation:
+    """One generation slot taken from a user's weekly quota by reserve_generation()."""
+    user_id:    uuid.UUID
+    week_start: date
+    count:      int             # weekly usage including this reservation
+    consumed:   bool = False    # set once the generation is committed; no refund after that
 
-    if record:
-        record.count += 1
-    else:
-        record = GenerationUsage(
-            id=uuid.uuid4(),
-            user_id=user_id,
-            week_start=week_start,
-            count=1
-        )
-        db.add(record)
 
-    db.flush()
-    return record.count
+def _limit_reached_error(used: int, limit: int, plan: str) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Weekly generation limit reached ({used}/{limit}). "
+               f"{'Upgrade to Pro for 30 generations/week.' if plan == 'free' else 'Limit resets every Monday.'}"
+    )
+
 
+async def reserve_generation(user: User) -> UsageReservation:
+    """Atomically take one slot of the user's weekly quota, or raise 429.
 
-def check_generation_limit(user: User, db: Session):
+    A single INSERT … ON CONFLICT DO UPDATE … WHERE count < limit both checks
+    and increments, so concurrent requests can neither lose an update nor
+    overspend the quota. Runs and commits in its own short transaction so the
+    row lock is not held for the length of the LLM pipeline.
+    """
+    week_start = get_week_start()
+    limit      = PLAN_LIMITS.get(user.plan, PLAN_LIMITS["free"])
+    async with AsyncSessionLocal() as db:
+        count = (await db.execute(
+            pg_insert(GenerationUsage)
+            .values(id=uuid.uuid4(), user_id=user.id, week_start=week_start, count=1)
+            .on_conflict_do_update(
+                constraint="uq_generation_usage_user_week",
+                set_={"count": GenerationUsage.count + 1},
+                where=GenerationUsage.count < limit,
+            )
+            .returning(GenerationUsage.count)
+        )).scalar_one_or_none()
+        await db.commit()
+    if count is None:
+        raise _limit_reached_error(limit, limit, user.plan)
+    return UsageReservation(user_id=user.id, week_start=week_start, count=count)
+
+
+async def release_generation(reservation: UsageReservation) -> None:
+    """Refund a reservation whose generation failed before it was committed."""
+    if reservation.consumed:
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(GenerationUsage)
+                .where(
+                    GenerationUsage.user_id == reservation.user_id,
+                    GenerationUsage.week_start == reservation.week_start,
+                    GenerationUsage.count > 0,
+                )
+                .values(count=GenerationUsage.count - 1)
+            )
+            await db.commit()
+        reservation.consumed = True   # refunded — never twice
+    except Exception as e:
+        logger.error(f"[USAGE] Could not refund a generation for {reservation.user_id}: {e}")
+
+
+async def check_generation_limit(user: User, db: AsyncSession):
     """Raise 429 if the user has hit their weekly generation limit."""
-    used  = get_weekly_usage(user.id, db)
+    used  = await get_weekly_usage(user.id, db)
     limit = PLAN_LIMITS.get(user.plan, PLAN_LIMITS["free"])
     if used >= limit:
-        raise HTTPException(
-            status_code=429,
-            detail=f"Weekly generation limit reached ({used}/{limit}). "
-                   f"{'Upgrade to Pro for 30 generations/week.' if user.plan == 'free' else 'Limit resets every Monday.'}"
-        )
+        raise _limit_reached_error(used, limit, user.plan)
 
 
-def get_daily_usage(user_id, db: Session) -> int:
-    """Count resume generations made today (UTC)."""
-    today_start = datetime.combine(date.today(), datetime.min.time())
-    today_end   = today_start + timedelta(days=1)
-    return db.query(OptimizedResume).filter(
-        OptimizedResume.user_id == user_id,
-        OptimizedResume.created_at >= today_start,
-        OptimizedResume.created_at <  today_end,
-    ).count()
+async def get_usage_snapshot(user_id, db: AsyncSession) -> tuple[int, int, int]:
+    """Return (weekly, daily, monthly) generation counts in a single round trip.
 
+    Weekly is the paywall counter from generation_usage; daily (today, UTC) and
+    monthly (this calendar month, UTC) count optimized_resumes rows with
+    FILTER aggregates over one range scan of ix_optimized_resumes_user_created.
+    """
+    today       = date.today()
+    today_start = datetime.combine(today, datetime.min.time())
+    today_end   = today_start + timedelta(days=1)
+    month_start = datetime.combine(today.replace(day=1), datetime.min.time())
 
-def get_monthly_usage(user_id, db: Session) -> int:
-    """Count resume generations made this calendar month (UTC)."""
-    month_start = datetime.combine(date.today().replace(day=1), datetime.min.time())
-    return db.query(OptimizedResume).filter(
-        OptimizedResume.user_id == user_id,
-        OptimizedResume.created_at >= month_start,
-    ).count()
+    weekly = (
+        select(GenerationUsage.count)
+        .where(GenerationUsage.user_id == user_id, GenerationUsage.week_start == get_week_start(today))
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            func.coalesce(weekly, 0),
+            func.count().filter(OptimizedResume.created_at >= today_start,
+                                OptimizedResume.created_at < today_end),
+            func.count(),
+        )
+        .select_from(OptimizedResume)
+        .where(OptimizedResume.user_id == user_id, OptimizedResume.created_at >= month_start)
+    )
+    weekly_usage, daily_usage, monthly_usage = result.one()
+    return weekly_usage, daily_usage, monthly_usage
 
 
 def compute_resume_diff(original_yaml: str, optimized_yaml: str) -> list:
@@ -177,16 +257,13 @@ def compute_resume_diff(original_yaml: str, optimized_yaml: str) -> list:
         else:
             changes.append({"severity": "critical", "label": "Education section was altered by the model", "items": None})
 
-        # 2. Skills diff
-        def flatten_skills(data: dict) -> set:
-            skills = set()
+        # 2. Skills diff — compared by canonical skill, so "Postgres" → "PostgreSQL" is no change
+        def flatten_skills(data: dict) -> dict:
+            skills = {}
             for v in data.values():
-                if isinstance(v, list):
-                    for item in v:
-                        if isinstance(item, str):
-                            skills.add(item.lower())
-                elif isinstance(v, str):
-                    skills.add(v.lower())
+                for item in (v if isinstance(v, list) else [v]):
+                    if isinstance(item, str):
+                        skills.setdefault(skill_key(item), item)
             return skills
 
         orig_skills_section = orig.get("technical_skills") or {}
@@ -194,8 +271,8 @@ def compute_resume_diff(original_yaml: str, optimized_yaml: str) -> list:
         if isinstance(orig_skills_section, dict) and isinstance(opti_skills_section, dict):
             orig_skills = flatten_skills(orig_skills_section)
             opti_skills = flatten_skills(opti_skills_section)
-            added   = sorted(opti_skills - orig_skills)
-            removed = sorted(orig_skills - opti_skills)
+            added   = sorted((opti_skills[k] for k in opti_skills.keys() - orig_skills.keys()), key=str.lower)
+            removed = sorted((orig_skills[k] for k in orig_skills.keys() - opti_skills.keys()), key=str.lower)
             if added:
                 changes.append({"severity": "positive", "label": f"{len(added)} skill(s) added", "items": added})
             if removed:
@@ -255,88 +332,305 @@ def compute_resume_diff(original_yaml: str, optimized_yaml: str) -> list:
     return changes
 
 
+async def gather_or_cancel(*aws):
+    """Run awaitables concurrently and return their results in order.
+
+    Unlike a bare asyncio.gather, a failure in one awaitable cancels the
+    others instead of leaving them running (and billing LLM tokens) in the
+    background.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 def jd_hash(raw_jd: str) -> str:
     """Return a SHA-256 hex digest of the raw job description (stripped + lowercased)."""
     return hashlib.sha256(raw_jd.strip().lower().encode("utf-8")).hexdigest()
 
 
-async def get_or_parse_jd(raw_jd: str, db: Session, llm=None):
-    """Return a cached parsedJobDescription for this JD, calling the LLM only on a cache miss.
+# In-process LRU + TTL tier in front of the ParsedJDCache table. Each parsed JD
+# is stored under both ("hash", jd_hash) and ("id", cache_id) so lookups from
+# raw JD text and from a client-supplied jd_cache_id both stay in memory.
+# Only final rows are kept here (LLM parses and confident local ones), and
+# those are never updated, so the TTL only bounds staleness of memory, not
+# correctness.
+jd_memory_cache = TTLCache(
+    maxsize=int(os.getenv("JD_CACHE_MAX_ENTRIES", "2048")),
+    ttl=float(os.getenv("JD_CACHE_TTL_SECONDS", "3600")),
+    name="parsed_jd",
+)
+
+
+# Concurrent cache misses for the same jd_hash share a single LLM parse.
+jd_parse_flight = SingleFlight(name="jd_parse")
+
+# Opt-in cross-worker coalescing: the parsing worker holds a transaction-scoped
+# Postgres advisory lock on the digest, so other workers block, then re-check
+# the table instead of parsing again. Off by default because it holds a pooled
+# connection for the duration of the LLM call.
+JD_PARSE_ADVISORY_LOCK = os.getenv("JD_PARSE_ADVISORY_LOCK", "false").lower() == "true"
+
+
+def _remember_parsed_jd(parsed: parsedJobDescription, cache_id: str, digest: str) -> None:
+    """Store a parsed JD in the in-process tier under both of its keys."""
+    entry = (parsed, cache_id)
+    jd_memory_cache.set(("hash", digest), entry)
+    jd_memory_cache.set(("id", cache_id), entry)
+
+
+def _is_provisional(row: ParsedJDCache) -> bool:
+    """A local parse below the confidence threshold — to be replaced by an LLM parse when one is possible."""
+    return row.parser == "local" and (row.confidence or 0.0) < JD_LOCAL_MIN_CONFIDENCE
+
+
+def _parsed_jd_from_row(row: ParsedJDCache) -> parsedJobDescription:
+    parsed = parsedJobDescription(
+        job_title=row.job_title or "",
+        skills=row.skills or [],
+        job_description=row.job_description,
+    )
+    if not _is_provisional(row):
+        _remember_parsed_jd(parsed, str(row.id), row.jd_hash)
+    return parsed
+
+
+async def get_jd_cache_entry(cache_id: str, db: AsyncSession):
+    """Look up a ParsedJDCache row by its id; returns None for unknown or malformed ids."""
+    try:
+        cache_uuid = uuid.UUID(cache_id)
+    except ValueError:
+        return None
+    return await db.get(ParsedJDCache, cache_uuid)
+
+
+async def get_or_parse_jd(raw_jd: str, db: AsyncSession, llm=None):
+    """Return a cached parsedJobDescription for this JD, calling the LLM only when needed.
+
+    Lookup order: in-process cache → ParsedJDCache table → local heuristic
+    parse (config/jd_local.py) → LLM parse. The LLM is only called when the
+    local parse is not confident enough; without an LLM the local parse is
+    used regardless, and the first later request that brings an LLM
+    re-parses it (the row keeps its cache id).
 
     Parameters
     ----------
     raw_jd : str
         The raw job description text.
-    db : Session
-        SQLAlchemy DB session.
+    db : AsyncSession
+        SQLAlchemy async DB session.
     llm : BaseChatModel | None
-        Per-request LangChain LLM built from user's BYOK config.
-        Required on cache misses. If None and a cache miss occurs, raises 400.
+        Per-request LangChain LLM built from user's BYOK config. If None, a
+        cache miss is served by the local parser; with JD_LOCAL_PARSER=false
+        it raises 400 instead.
 
     Returns:
         tuple[parsedJobDescription, str]: (parsed_jd object, cache_id string)
     """
     digest = jd_hash(raw_jd)
 
-    # --- Cache hit ---
-    cached = db.query(ParsedJDCache).filter(ParsedJDCache.jd_hash == digest).first()
-    if cached:
-        logger.info(f"[CACHE HIT] JD parse cache hit for hash {digest[:12]}...")
-        from schema.schema import parsedJobDescription
-        parsed = parsedJobDescription(
-            job_title=cached.job_title or "",
-            skills=cached.skills or [],
-            job_description=cached.job_description,
-        )
-        return parsed, str(cached.id)
+    # --- In-process hit ---
+    memo = jd_memory_cache.get(("hash", digest))
+    if memo is not None:
+        return memo
 
-    # --- Cache miss — call LLM ---
+    # --- DB cache hit (unless it is a provisional local parse we can now improve) ---
+    result = await db.execute(select(ParsedJDCache).where(ParsedJDCache.jd_hash == digest))
+    cached = result.scalars().first()
+    if cached and not (llm is not None and _is_provisional(cached)):
+        logger.info(f"[CACHE HIT] JD parse cache hit for hash {digest[:12]}...")
+        return _parsed_jd_from_row(cached), str(cached.id)
+
+    # --- Cache miss — try the local parser first ---
+    if cached is None and JD_LOCAL_PARSER:
+        local = parse_jd_locally(raw_jd)
+        if local.confidence >= JD_LOCAL_MIN_CONFIDENCE or llm is None:
+            logger.info(f"[JD LOCAL] Parsed JD locally (confidence {local.confidence:.2f}) for hash {digest[:12]}...")
+            async with AsyncSessionLocal() as local_db:
+                return await _store_parsed_jd(local_db, digest, local.parsed, "local", local.confidence)
+        logger.info(f"[JD LOCAL] Low confidence ({local.confidence:.2f}) for hash {digest[:12]}... — using LLM")
+
+    # --- Call LLM (once per digest across concurrent requests) ---
     if llm is None:
         raise HTTPException(
             status_code=400,
             detail="AI provider config is required for first-time job description parsing."
         )
-    logger.info(f"[CACHE MISS] Parsing JD via LLM for hash {digest[:12]}...")
-    parsed = await parse_jd(job_description=raw_jd, llm=llm)
+    leader = not jd_parse_flight.in_flight(digest)
+    try:
+        return await jd_parse_flight.run(digest, lambda: _parse_and_store_jd(raw_jd, digest, llm))
+    except HTTPException:
+        raise
+    except Exception:
+        if leader:
+            raise
+        # The shared parse ran on another user's key and failed — retry on ours.
+        logger.warning(f"[CACHE MISS] Shared JD parse failed for hash {digest[:12]}...; retrying with own key")
+        return await jd_parse_flight.run(digest, lambda: _parse_and_store_jd(raw_jd, digest, llm))
+
+
+async def _parse_and_store_jd(raw_jd: str, digest: str, llm):
+    """Parse a JD via the LLM and insert it into ParsedJDCache.
+
+    Runs as a shared single-flight task, so it uses its own session rather
+    than the (possibly already closed) session of the request that started it.
+    """
+    async with AsyncSessionLocal() as db:
+        if JD_PARSE_ADVISORY_LOCK:
+            # Released on commit/rollback; transaction-scoped so it is safe
+            # behind Neon's PgBouncer (transaction pooling).
+            await db.execute(
+                text("SELECT pg_advisory_xact_lock(hashtextextended(:digest, 0))"),
+                {"digest": digest},
+            )
+            result = await db.execute(select(ParsedJDCache).where(ParsedJDCache.jd_hash == digest))
+            cached = result.scalars().first()
+            if cached and not _is_provisional(cached):
+                await db.rollback()
+                logger.info(f"[CACHE HIT] JD parsed by another worker for hash {digest[:12]}...")
+                return _parsed_jd_from_row(cached), str(cached.id)
+
+        logger.info(f"[CACHE MISS] Parsing JD via LLM for hash {digest[:12]}...")
+        parsed = await parse_jd(job_description=raw_jd, llm=llm)
+        return await _store_parsed_jd(db, digest, parsed, "llm")
 
-    record = ParsedJDCache(
+
+async def _store_parsed_jd(db: AsyncSession, digest: str, parsed: parsedJobDescription,
+                           parser: str, confidence: float | None = None):
+    """Insert a parse into ParsedJDCache, commit, and return (parsed_jd, cache_id) of the stored row.
+
+    An LLM parse replaces a local one in place (same id, so jd_cache_ids
+    handed out for it stay valid). Otherwise the first row for a digest wins.
+    """
+    # One entry per canonical skill ("PostgreSQL" and "Postgres" from the LLM count once)
+    parsed = parsed.model_copy(update={"skills": dedupe_skills(parsed.skills)})
+    stmt = pg_insert(ParsedJDCache).values(
         id=uuid.uuid4(),
         jd_hash=digest,
         job_title=parsed.job_title,
         skills=parsed.skills,
         job_description=parsed.job_description,
+        parser=parser,
+        confidence=confidence,
     )
-    db.add(record)
-    try:
-        db.commit()
-        db.refresh(record)
-    except IntegrityError:
-        # Another concurrent request inserted the same jd_hash between our
-        # cache-miss check and this INSERT (TOCTOU race). Roll back and use
-        # the row that the other request committed.
-        db.rollback()
-        cached = db.query(ParsedJDCache).filter(ParsedJDCache.jd_hash == digest).first()
+    if parser == "llm":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ParsedJDCache.jd_hash],
+            set_={col: stmt.excluded[col] for col in ("job_title", "skills", "job_description", "parser", "confidence")},
+            where=ParsedJDCache.parser == "local",
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[ParsedJDCache.jd_hash])
+    row_id = (await db.execute(stmt.returning(ParsedJDCache.id))).scalar_one_or_none()
+    await db.commit()
+
+    if row_id is None:
+        # Another worker stored this JD between our cache-miss check and this
+        # INSERT (TOCTOU race), or already has an LLM parse — use its row.
+        result = await db.execute(select(ParsedJDCache).where(ParsedJDCache.jd_hash == digest))
+        cached = result.scalars().first()
         if cached is None:
             # Should never happen, but raise a clear error if it does
             raise HTTPException(status_code=500, detail="JD cache write conflict; please retry.")
         logger.info(f"[CACHE RACE] Resolved concurrent insert for hash {digest[:12]}...")
-        from schema.schema import parsedJobDescription
-        parsed = parsedJobDescription(
-            job_title=cached.job_title or "",
-            skills=cached.skills or [],
-            job_description=cached.job_description,
+        return _parsed_jd_from_row(cached), str(cached.id)
+
+    if parser == "llm" or (confidence or 0.0) >= JD_LOCAL_MIN_CONFIDENCE:
+        _remember_parsed_jd(parsed, str(row_id), digest)
+    return parsed, str(row_id)
+
+
+async def resolve_parsed_jd(raw_jd: str, jd_cache_id: str | None, db: AsyncSession, llm=None):
+    """Resolve the parsed JD for a request, preferring the client's jd_cache_id.
+
+    Falls back to `get_or_parse_jd` when no id is given or the id is unknown.
+    Returns the same (parsed_jd, cache_id) tuple as `get_or_parse_jd`.
+    """
+    if jd_cache_id:
+        memo = jd_memory_cache.get(("id", jd_cache_id))
+        if memo is not None:
+            return memo
+        cached = await get_jd_cache_entry(jd_cache_id, db)
+        if cached and not (llm is not None and _is_provisional(cached)):
+            logger.info(f"[CACHE HIT] Reused parsed JD (cache_id={jd_cache_id})")
+            return _parsed_jd_from_row(cached), str(cached.id)
+        if not cached:
+            logger.warning(f"jd_cache_id {jd_cache_id} not found — falling back to live parse")
+    return await get_or_parse_jd(raw_jd, db, llm=llm)
+
+
+# ATSResultCache rows older than this are purged by sweep_idle_llm_clients()
+ATS_CACHE_TTL_DAYS = int(os.getenv("ATS_CACHE_TTL_DAYS", "30"))
+
+
+def ats_cache_key(user_id, resume: ResumeVersion, raw_jd: str, ai_config: AIProviderConfig) -> dict:
+    """Column values identifying an ATSResultCache row for this resume/JD/provider/model."""
+    provider = ai_config.provider.strip().lower()
+    return {
+        "user_id":     user_id,
+        "resume_hash": resume.content_hash,
+        "jd_hash":     jd_hash(raw_jd),
+        "ai_provider": provider,
+        "ai_model":    ai_config.model or PROVIDER_DEFAULTS.get(provider, ""),
+    }
+
+
+async def get_cached_ats(key: dict, db: AsyncSession) -> DetailedATS | None:
+    """Return the cached DetailedATS for `key` (see ats_cache_key), or None."""
+    result = await db.execute(
+        select(ATSResultCache.result).where(
+            *(getattr(ATSResultCache, col) == value for col, value in key.items()),
+            ATSResultCache.created_at >= func.now() - timedelta(days=ATS_CACHE_TTL_DAYS),
         )
-        return parsed, str(cached.id)
+    )
+    payload = result.scalar()
+    if payload is None:
+        return None
+    logger.info(f"[CACHE HIT] ATS result cache hit for resume {key['resume_hash'][:12]}... / JD {key['jd_hash'][:12]}...")
+    return DetailedATS.model_validate(payload)
 
-    return parsed, str(record.id)
 
+async def store_ats_result(key: dict, ats_result: DetailedATS) -> None:
+    """Insert an ATS result into the cache, replacing an expired row for the same key.
+
+    Best-effort: the result has already been paid for, so a failed write is
+    logged rather than failing the request. It runs in its own short
+    session, so rolling it back leaves the request's session untouched.
+    """
+    stmt = pg_insert(ATSResultCache).values(id=uuid.uuid4(), result=ats_result.model_dump(mode="json"), **key)
+    try:
+        async with AsyncSessionLocal() as cache_db:
+            await cache_db.execute(
+                stmt.on_conflict_do_update(
+                    constraint="uq_ats_result_cache_key",
+                    set_={"result": stmt.excluded.result, "created_at": func.now()},
+                )
+            )
+            await cache_db.commit()
+    except Exception as e:
+        logger.warning(f"[ATS CACHE] Could not store result for resume {key['resume_hash'][:12]}...: {e}")
 
-def build_auth_response(user: User, access_token: str, db: Session) -> AuthResponse:
+
+async def purge_expired_ats_results() -> int:
+    """Delete ATSResultCache rows older than ATS_CACHE_TTL_DAYS. Returns the number removed."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(ATSResultCache).where(
+                ATSResultCache.created_at < func.now() - timedelta(days=ATS_CACHE_TTL_DAYS)
+            )
+        )
+        await db.commit()
+    return result.rowcount or 0
+
+
+async def build_auth_response(user: User, access_token: str, db: AsyncSession) -> AuthResponse:
     """Build a consistent AuthResponse including paywall fields."""
-    weekly_usage  = get_weekly_usage(user.id, db)
+    weekly_usage, daily_usage, monthly_usage = await get_usage_snapshot(user.id, db)
     weekly_limit  = PLAN_LIMITS.get(user.plan, PLAN_LIMITS["free"])
-    daily_usage   = get_daily_usage(user.id, db)
-    monthly_usage = get_monthly_usage(user.id, db)
     return AuthResponse(
         access_token=access_token,
         token_type="bearer",
@@ -344,7 +638,7 @@ def build_auth_response(user: User, access_token: str, db: Session) -> AuthRespo
         email=user.email,
         full_name=user.full_name,
         plan=user.plan,
-        has_resume=bool(user.resume_yaml),
+        has_resume=bool(user.has_resume),
         resume_filename=user.resume_filename,
         email_verified=bool(user.email_verified),
         weekly_usage=weekly_usage,
@@ -362,6 +656,51 @@ async def startup_event():
         logger.info("[OK] Application started with database connection")
     else:
         logger.error("[WARN] Application started but database connection failed")
+    pdf_render_pool.start()
+    pdf_text_pool.start()
+    global _llm_sweeper
+    _llm_sweeper = asyncio.create_task(sweep_idle_llm_clients())
+    if JOB_RUN_IN_API:
+        job_worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_worker.stop()
+    pdf_render_pool.shutdown()
+    pdf_text_pool.shutdown()
+    if _llm_sweeper is not None:
+        _llm_sweeper.cancel()
+    await aclose_llm_clients()
+
+
+_llm_sweeper: asyncio.Task | None = None
+
+
+async def sweep_idle_llm_clients(interval: float = 60.0):
+    """Periodically drop idle pooled LLM clients (and their cached chains) so BYOK
+    keys do not outlive their TTL, and purge expired idempotency keys and
+    ATS results.
+
+    Runs in every process that builds LLM clients: the API (startup_event)
+    and the standalone worker (worker.py)."""
+    while True:
+        await asyncio.sleep(interval)
+        purged = purge_idle_llm_clients() + purge_idle_chains()
+        if purged:
+            logger.info(f"[LLM POOL] Dropped {purged} idle client(s)/chain(s)")
+        try:
+            expired = await idempotency.purge_expired_keys()
+            if expired:
+                logger.info(f"[IDEMPOTENCY] Purged {expired} expired key(s)")
+        except Exception as e:
+            logger.warning(f"[IDEMPOTENCY] Purge failed: {e}")
+        try:
+            expired = await purge_expired_ats_results()
+            if expired:
+                logger.info(f"[ATS CACHE] Purged {expired} expired result(s)")
+        except Exception as e:
+            logger.warning(f"[ATS CACHE] Purge failed: {e}")
 
 
 
@@ -376,7 +715,19 @@ def home():
 
 @app.get("/health")
 def health():
-    return {"status": "OK", "model_loaded": llm is not None}
+    return {
+        "status":       "OK",
+        "model_loaded": llm is not None,
+        "jd_cache":     jd_memory_cache.stats(),
+        "jd_parse":     jd_parse_flight.stats(),
+        "pdf_renderer": pdf_render_pool.stats(),
+        "pdf_text":     pdf_text_pool.stats(),
+        "pdf_cache":    pdf_cache.stats(),
+        "llm_clients":  llm_client_stats(),
+        "llm_chains":   chain_cache_stats(),
+        "jobs":         job_worker.stats(),
+        "auth_users":   user_cache.stats(),
+    }
 
 
 
@@ -384,9 +735,9 @@ def health():
 
 
 def _build_llm_from_config(ai_config):
-    """Helper: build per-request LLM from an AIProviderConfig, catching auth errors."""
+    """Helper: get the pooled LLM client for an AIProviderConfig, catching auth errors."""
     try:
-        return build_llm(
+        return get_llm(
             provider=ai_config.provider,
             api_key=ai_config.api_key,
             model=ai_config.model,
@@ -399,17 +750,18 @@ def _build_llm_from_config(ai_config):
 
 @app.post('/parse-jd')
 async def parse_job_description(
-    request: CalculateATS,
+    request: ParseJDRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Parse and cache a job description. Returns a jd_cache_id the client should
     pass to /calculate-ats-detailed and /optimize-resume to skip repeated LLM parsing.
-    Requires ai_config (provider + api_key) in the request body."""
+    ai_config is optional: most JDs are parsed locally, and the LLM is only used
+    (when ai_config is given) for postings the local parser is unsure about."""
     if not request.job_desc.strip():
         raise HTTPException(status_code=400, detail="Job description cannot be empty.")
 
-    request_llm = _build_llm_from_config(request.ai_config)
+    request_llm = _build_llm_from_config(request.ai_config) if request.ai_config else None
     parsed, cache_id = await get_or_parse_jd(request.job_desc, db, llm=request_llm)
     logger.info(f"JD parsed/cached for {current_user.email}: cache_id={cache_id}")
     return {
@@ -456,11 +808,12 @@ async def validate_api_key(
 # ==================== AUTHENTICATION ENDPOINTS ====================
 
 @app.post('/auth/signup', response_model=AuthResponse)
-def create_user(credentials: UserSignup, db: Session = Depends(get_db)):
+async def create_user(credentials: UserSignup, db: AsyncSession = Depends(get_async_db)):
     """Create a new user account and send a verification email."""
     logger.info(f"Signup attempt for email: {_mask_email(credentials.email)}")
 
-    existing_user = db.query(User).filter(User.email == credentials.email).first()
+    result = await db.execute(select(User).where(User.email == credentials.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(status_code=409, detail="User with this email already exists")
 
@@ -470,7 +823,7 @@ def create_user(credentials: UserSignup, db: Session = Depends(get_db)):
     new_user = User(
         id=uuid.uuid4(),
         email=credentials.email,
-        password_hash=get_password_hash(credentials.password),
+        password_hash=await run_in_threadpool(get_password_hash, credentials.password),
         full_name=credentials.full_name,
         plan="free",
         email_verified=False,
@@ -478,12 +831,12 @@ def create_user(credentials: UserSignup, db: Session = Depends(get_db)):
         email_verification_sent_at=datetime.utcnow(),
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     # Send verification email (non-blocking — failure doesn't break signup)
     try:
-        send_verification_email(new_user.email, new_user.full_name, verification_token)
+        await run_in_threadpool(send_verification_email, new_user.email, new_user.full_name, verification_token)
     except Exception as e:
         logger.warning(f"[EMAIL] Verification email failed for {_mask_email(new_user.email)}: {e}")
 
@@ -492,15 +845,15 @@ def create_user(credentials: UserSignup, db: Session = Depends(get_db)):
         expires_delta=timedelta(hours=24)
     )
     logger.info(f"[OK] User created: {_mask_email(new_user.email)}")
-    return build_auth_response(new_user, access_token, db)
+    return await build_auth_response(new_user, access_token, db)
 
 
 @app.post('/auth/login', response_model=AuthResponse)
-def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return JWT token."""
     logger.info(f"Login attempt for: {_mask_email(credentials.email)}")
 
-    user = authenticate_user(db, credentials.email, credentials.password)
+    user = await authenticate_user(db, credentials.email, credentials.password)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
 
@@ -509,25 +862,23 @@ def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
         expires_delta=timedelta(hours=24)
     )
     logger.info(f"[OK] User logged in: {_mask_email(user.email)}")
-    return build_auth_response(user, access_token, db)
+    return await build_auth_response(user, access_token, db)
 
 
 @app.get('/auth/me')
-def get_current_user_profile(
+async def get_current_user_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current authenticated user's profile including paywall status."""
-    weekly_usage  = get_weekly_usage(current_user.id, db)
+    weekly_usage, daily_usage, monthly_usage = await get_usage_snapshot(current_user.id, db)
     weekly_limit  = PLAN_LIMITS.get(current_user.plan, PLAN_LIMITS["free"])
-    daily_usage   = get_daily_usage(current_user.id, db)
-    monthly_usage = get_monthly_usage(current_user.id, db)
     return {
         "user_id":            str(current_user.id),
         "email":              current_user.email,
         "full_name":          current_user.full_name,
         "plan":               current_user.plan,
-        "has_resume":         bool(current_user.resume_yaml),
+        "has_resume":         bool(current_user.has_resume),
         "resume_filename":    current_user.resume_filename,
         "resume_uploaded_at": current_user.resume_uploaded_at.isoformat() if current_user.resume_uploaded_at else None,
         "email_verified":     bool(current_user.email_verified),
@@ -540,9 +891,9 @@ def get_current_user_profile(
 
 
 @app.delete('/auth/me')
-def delete_account(
+async def delete_account(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Permanently delete the authenticated user's account and all associated data.
@@ -557,27 +908,26 @@ def delete_account(
     masked = _mask_email(current_user.email)
     logger.info(f"[DELETE ACCOUNT] Request for {masked}")
 
-    db.delete(current_user)
-    db.commit()
+    await db.delete(current_user)
+    await db.commit()
+    invalidate_cached_user(current_user.id)
 
     logger.info(f"[DELETE ACCOUNT] Account permanently deleted: {masked}")
     return {"message": "Your account and all associated data have been permanently deleted."}
 
 
 @app.post('/auth/refresh', response_model=AuthResponse)
-def refresh_token(
+async def refresh_token(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Issue a fresh JWT for an authenticated user.
     The existing token must still be valid (not expired).
     Call proactively when < 24h remain to keep sessions alive.
     """
-    weekly_usage  = get_weekly_usage(current_user.id, db)
+    weekly_usage, daily_usage, monthly_usage = await get_usage_snapshot(current_user.id, db)
     weekly_limit  = PLAN_LIMITS.get(current_user.plan, PLAN_LIMITS["free"])
-    daily_usage   = get_daily_usage(current_user.id, db)
-    monthly_usage = get_monthly_usage(current_user.id, db)
 
     new_token = create_access_token(data={"sub": str(current_user.id)})
     logger.info(f"[REFRESH] Token refreshed for {current_user.email}")
@@ -589,7 +939,7 @@ def refresh_token(
         "email":           current_user.email,
         "full_name":       current_user.full_name,
         "plan":            current_user.plan,
-        "has_resume":      bool(current_user.resume_yaml),
+        "has_resume":      bool(current_user.has_resume),
         "resume_filename": current_user.resume_filename,
         "email_verified":  bool(current_user.email_verified),
         "weekly_usage":    weekly_usage,
@@ -600,7 +950,7 @@ def refresh_token(
 
 
 @app.post('/auth/google', response_model=AuthResponse)
-async def google_auth(payload: dict, db: Session = Depends(get_db)):
+async def google_auth(payload: dict, db: AsyncSession = Depends(get_async_db)):
     """
     Verify a Google access token (from chrome.identity.getAuthToken) and
     return a ResumeSculpt session JWT.
@@ -633,28 +983,30 @@ async def google_auth(payload: dict, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Could not retrieve email from Google.")
 
     # ── Step 2: Find or create user ─────────────────────────────────────────
-    user = db.query(User).filter(User.email == google_email).first()
+    result = await db.execute(select(User).where(User.email == google_email))
+    user = result.scalars().first()
 
     if not user:
         # New user — set a random unusable password (OAuth users sign in via Google)
         user = User(
             id=uuid.uuid4(),
             email=google_email,
-            password_hash=get_password_hash(secrets.token_hex(32)),
+            password_hash=await run_in_threadpool(get_password_hash, secrets.token_hex(32)),
             full_name=google_name,
             plan="free",
             email_verified=google_verified,  # Google already verified their email
             email_verification_token=None,
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         logger.info(f"[GOOGLE] New user created via OAuth: {google_email}")
     else:
         # Existing user — sync verified status from Google if not already set
         if google_verified and not user.email_verified:
             user.email_verified = True
-            db.commit()
+            await db.commit()
+            invalidate_cached_user(user.id)
         logger.info(f"[GOOGLE] Existing user signed in via OAuth: {google_email}")
 
     # ── Step 3: Issue our own JWT ────────────────────────────────────────────
@@ -662,11 +1014,11 @@ async def google_auth(payload: dict, db: Session = Depends(get_db)):
         data={"sub": str(user.id)},
         expires_delta=timedelta(hours=24)
     )
-    return build_auth_response(user, jwt_token, db)
+    return await build_auth_response(user, jwt_token, db)
 
 
 @app.get('/auth/verify-email')
-def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_async_db)):
     """
     Verify a user's email address using the one-time token sent on signup.
     Token is valid for 24 hours.
@@ -674,7 +1026,8 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     if not token:
         raise HTTPException(status_code=400, detail="Verification token is required.")
 
-    user = db.query(User).filter(User.email_verification_token == token).first()
+    result = await db.execute(select(User).where(User.email_verification_token == token))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired verification link.")
 
@@ -692,7 +1045,8 @@ def verify_email(token: str, db: Session = Depends(get_db)):
 
     user.email_verified             = True
     user.email_verification_token   = None  # Invalidate token after use
-    db.commit()
+    await db.commit()
+    invalidate_cached_user(user.id)
 
     logger.info(f"[OK] Email verified for {user.email}")
     # Return a simple success page the browser can display
@@ -720,9 +1074,9 @@ def verify_email(token: str, db: Session = Depends(get_db)):
 
 
 @app.post('/auth/resend-verification')
-def resend_verification(
+async def resend_verification(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Resend the verification email. Rate-limited to once every 60 seconds."""
     if current_user.email_verified:
@@ -741,10 +1095,11 @@ def resend_verification(
     token = secrets.token_urlsafe(32)
     current_user.email_verification_token   = token
     current_user.email_verification_sent_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    invalidate_cached_user(current_user.id)
 
     try:
-        send_verification_email(current_user.email, current_user.full_name, token)
+        await run_in_threadpool(send_verification_email, current_user.email, current_user.full_name, token)
     except Exception as e:
         logger.error(f"[EMAIL] Resend failed for {current_user.email}: {e}")
         raise HTTPException(status_code=500, detail="Failed to send verification email. Please try again.")
@@ -754,19 +1109,30 @@ def resend_verification(
 
 # ==================== RESUME MANAGEMENT ENDPOINTS ====================
 
+# Clean up and section extracted text before res2yaml (config/resume_prestructure.py)
+RESUME_PRESTRUCTURE = os.getenv("RESUME_PRESTRUCTURE", "true").lower() == "true"
+
+
 @app.post('/upload-resume')
 async def upload_resume(
+    response:    Response,
     file:        UploadFile = File(..., description="Resume PDF file"),
     ai_provider: str        = Form(None, description="BYOK provider name (openai | anthropic | google | groq | openrouter)"),
     ai_api_key:  str        = Form(None, description="User's API key for the chosen provider"),
     ai_model:    str        = Form(None, description="Optional model override"),
+    reparse:     bool       = Form(False, description="Parse again with the LLM even if this PDF was parsed before"),
+    idempotency_key: str | None = Header(None, max_length=255, description="Retries with the same key replay the first response."),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload and parse user's resume.
 
-    Multipart form: file (PDF) + ai_provider, ai_api_key, ai_model (text fields).
-    Replaces any previously uploaded resume.
+    Multipart form: file (PDF) + ai_provider, ai_api_key, ai_model, reparse (text fields).
+    Replaces any previously uploaded resume. A PDF (or PDF text) that was
+    parsed before reuses that parse without calling the LLM, unless
+    `reparse=true` asks for a fresh parse (e.g. the earlier one was bad). With an
+    `Idempotency-Key` header, a retry of the same upload replays the first
+    response without re-parsing.
     """
     logger.info(f"Resume upload for user: {current_user.email}")
 
@@ -792,33 +1158,76 @@ async def upload_resume(
             detail=f"File too large. Maximum 2 MB allowed."
         )
 
-    # Extract text from PDF
-    try:
-        pdf_bytes = await file.read()
+    pdf_bytes = await file.read()
+
+    # Re-check size after read (content-type / size header can be spoofed)
+    if len(pdf_bytes) > PDF_MAX_BYTES:
+        raise HTTPException(status_code=400, detail="File too large. Maximum 2 MB allowed.")
+
+    # Magic-byte check — PDFs always start with "%PDF"
+    if not pdf_bytes.startswith(b"%PDF"):
+        raise HTTPException(status_code=400, detail="Invalid file: not a PDF.")
+
+    pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
+
+    claim = None
+    if idempotency_key:
+        fingerprint = request_fingerprint({
+            "pdf_sha256":  pdf_hash,
+            "filename":    file.filename,
+            "ai_provider": ai_provider,
+            "ai_model":    ai_model,
+            "reparse":     reparse,
+        })
+        outcome = await idempotency.begin(current_user.id, "upload-resume", idempotency_key, fingerprint)
+        if isinstance(outcome, IdempotentReplay):
+            response.headers["Idempotent-Replayed"] = "true"
+            return outcome.response
+        claim = outcome
 
-        # Re-check size after read (content-type / size header can be spoofed)
-        if len(pdf_bytes) > PDF_MAX_BYTES:
-            raise HTTPException(status_code=400, detail="File too large. Maximum 2 MB allowed.")
+    try:
+        result = await _parse_and_store_resume(
+            pdf_bytes, pdf_hash, file.filename, ai_provider, ai_api_key, ai_model, current_user, db,
+            reparse=reparse,
+            before_commit=(lambda tx, body: idempotency.mark_committed(tx, claim, response=body)) if claim else None,
+        )
+    except BaseException:
+        if claim is not None:
+            await idempotency.release(claim)
+        raise
+    if claim is not None:
+        await idempotency.complete(claim)
+    return result
 
-        # Magic-byte check — PDFs always start with "%PDF"
-        if not pdf_bytes.startswith(b"%PDF"):
-            raise HTTPException(status_code=400, detail="Invalid file: not a PDF.")
 
-        reader = PdfReader(BytesIO(pdf_bytes))
+async def _parse_and_store_resume(pdf_bytes: bytes, pdf_hash: str, filename: str, ai_provider: str,
+                                  ai_api_key: str, ai_model: str | None, current_user: User, db: AsyncSession,
+                                  reparse: bool = False, before_commit=None) -> dict:
+    """Parse an uploaded PDF to YAML with the user's LLM and make it the active resume version.
 
-        # Guard against malformed / adversarial PDFs with absurd page counts
-        if len(reader.pages) > 50:
-            raise HTTPException(status_code=400, detail="PDF has too many pages (max 50).")
+    A PDF (or extracted text) that was parsed before reuses that YAML and
+    skips extraction and/or the LLM call, unless `reparse` is set. The fresh
+    parse is then the newest version with these fingerprints, so later
+    uploads reuse it. `before_commit(db, response)` runs inside the
+    transaction that saves the resume.
+    """
+    result = {
+        "message":  "Resume uploaded and parsed successfully",
+        "filename": filename,
+    }
 
-        resume_content = "".join(page.extract_text() or "" for page in reader.pages)
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"PDF read error for {current_user.id}: {e}")
-        raise HTTPException(status_code=400, detail="Failed to read PDF. It may be corrupted or password-protected.")
+    # Same PDF bytes as an earlier upload → no extraction, no LLM
+    if not reparse and await _store_reused_upload(db, current_user, result, before_commit, pdf_hash=pdf_hash):
+        return result
 
+    resume_content = await pdf_text_pool.extract(pdf_bytes)
     if not resume_content.strip():
         raise HTTPException(status_code=400, detail="No text found in PDF. Please ensure the resume is not a scanned image.")
+    text_hash = upload_text_hash(resume_content)
+
+    # Re-exported PDF with the same text → no LLM
+    if not reparse and await _store_reused_upload(db, current_user, result, before_commit, pdf_hash=pdf_hash, text_hash=text_hash):
+        return result
 
     # Validate BYOK config fields (required for the res2yaml LLM call)
     if not ai_provider or not ai_api_key:
@@ -827,6 +1236,12 @@ async def upload_resume(
             detail="ai_provider and ai_api_key are required form fields for resume parsing."
         )
 
+    # Strip page furniture and mark sections so the LLM gets a smaller, pre-segmented input
+    if RESUME_PRESTRUCTURE:
+        raw_chars = len(resume_content)
+        resume_content = prestructure_resume(resume_content)
+        logger.info(f"[PRESTRUCTURE] {raw_chars:,} → {len(resume_content):,} chars for {current_user.email}")
+
     # Build per-request LLM from user-supplied key
     upload_llm = _build_llm_from_config(
         type("_Cfg", (), {"provider": ai_provider, "api_key": ai_api_key, "model": ai_model or None})()
@@ -876,37 +1291,57 @@ async def upload_resume(
             with open(debug_path, 'w', encoding='utf-8') as f:
                 f.write(resume_yaml)
 
-    # Store resume directly on the user record (replaces any previous resume)
+    # Save as a new resume version (or reuse an identical one) and make it active.
+    # ATS results stay cached: their keys include the resume content hash.
     try:
-        current_user.resume_yaml        = resume_yaml
-        current_user.resume_filename    = file.filename
-        current_user.resume_uploaded_at = datetime.utcnow()
-        db.commit()
-        db.refresh(current_user)
+        await store_resume(db, current_user, resume_yaml, filename, ai_provider, ai_model,
+                           pdf_hash=pdf_hash, text_hash=text_hash)
+        if before_commit is not None:
+            await before_commit(db, result)
+        await db.commit()
+        invalidate_cached_user(current_user.id)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"DB write error after resume parse for {current_user.id}: {e}")
         raise HTTPException(status_code=500, detail="Resume was parsed but could not be saved. Please try again.")
 
     logger.info(f"[OK] Resume processed for {current_user.email}")
-    return {
-        "message":  "Resume uploaded and parsed successfully",
-        "filename": file.filename,
-    }
+    return result
+
+
+async def _store_reused_upload(db: AsyncSession, current_user: User, result: dict, before_commit,
+                               pdf_hash: str, text_hash: str | None = None) -> bool:
+    """Activate an earlier parse of this upload if there is one. Returns False on a miss."""
+    try:
+        version = await reuse_parsed_upload(db, current_user, result["filename"], pdf_hash, text_hash)
+        if version is None:
+            return False
+        if before_commit is not None:
+            await before_commit(db, result)
+        await db.commit()
+        invalidate_cached_user(current_user.id)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"DB write error reusing parsed resume for {current_user.id}: {e}")
+        raise HTTPException(status_code=500, detail="Resume could not be saved. Please try again.")
+
+    logger.info(f"[OK] Resume re-upload served from parse cache for {current_user.email}")
+    return True
 
 
 
 @app.get('/my-resume')
 async def get_my_resume(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    resume: ResumeVersion | None = Depends(get_active_resume)
 ):
     """Get the current user's active resume."""
-    if not current_user.resume_yaml:
+    if resume is None:
         raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
 
     return {
         "filename":           current_user.resume_filename,
-        "resume_yaml":        current_user.resume_yaml,
+        "resume_yaml":        resume.yaml,
         "resume_uploaded_at": current_user.resume_uploaded_at.isoformat() if current_user.resume_uploaded_at else None,
     }
 
@@ -916,13 +1351,21 @@ async def get_my_resume(
 @app.post('/calculate-ats-detailed', response_model=DetailedATS)
 async def calculate_ats_detailed(
     request: CalculateATS,
+    mode: Literal["llm", "fast"] = Query("llm", description="llm: full LLM analysis. fast: instant local keyword/skills scoring, no LLM scoring call."),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    resume: ResumeVersion | None = Depends(get_active_resume),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Calculate a detailed ATS score for the user's resume against a job description.
     
     If `jd_cache_id` is provided in the request body, the pre-parsed JD is reused
-    from DB and no LLM parse call is made.
+    from DB and no LLM parse call is made. Results are cached per
+    (resume, JD, provider, model), so repeat analyses skip the LLM entirely.
+
+    With `?mode=fast` the score is computed locally (config/ats_fast.py) from the
+    parsed JD skills and the resume, and the JD is parsed locally on a cache
+    miss, so no ai_config is needed. Strengths/improvements are templated rather
+    than written by the model.
     """
     logger.info(f"ATS calculation for user: {current_user.email}")
 
@@ -936,117 +1379,196 @@ async def calculate_ats_detailed(
     if not request.job_desc.strip():
         raise HTTPException(status_code=400, detail="Job description cannot be empty.")
 
-    if not current_user.resume_yaml:
+    if resume is None:
         raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
 
+    if mode == "fast":
+        parsed_jd, _ = await resolve_parsed_jd(request.job_desc, request.jd_cache_id, db, llm=None)
+        result = score_fast(resume.yaml, parsed_jd)
+        logger.info(f"[FAST ATS] Score for {current_user.email}: {result.overall_score}")
+        return result
+
+    if request.ai_config is None:
+        raise HTTPException(status_code=400, detail="ai_config is required for LLM scoring. Use mode=fast to score without an API key.")
+
     # Build per-request LLM from BYOK config
     request_llm = _build_llm_from_config(request.ai_config)
 
+    # Unchanged resume + JD + provider/model → serve the stored result
+    ats_key = ats_cache_key(current_user.id, resume, request.job_desc, request.ai_config)
+    cached_result = await get_cached_ats(ats_key, db)
+    if cached_result is not None:
+        return cached_result
+
     # Use cached parse if the client provided a jd_cache_id
-    if request.jd_cache_id:
-        cached = db.query(ParsedJDCache).filter(
-            ParsedJDCache.id == request.jd_cache_id
-        ).first()
-        if cached:
-            from schema.schema import parsedJobDescription
-            parsed_jd = parsedJobDescription(
-                job_title=cached.job_title or "",
-                skills=cached.skills or [],
-                job_description=cached.job_description,
-            )
-            logger.info(f"[CACHE HIT] Reused parsed JD for ATS (cache_id={request.jd_cache_id})")
-        else:
-            logger.warning(f"jd_cache_id {request.jd_cache_id} not found — falling back to live parse")
-            parsed_jd, _ = await get_or_parse_jd(request.job_desc, db, llm=request_llm)
-    else:
-        parsed_jd, _ = await get_or_parse_jd(request.job_desc, db, llm=request_llm)
+    parsed_jd, _ = await resolve_parsed_jd(request.job_desc, request.jd_cache_id, db, llm=request_llm)
 
     try:
-        result = await ats_detailed(current_user.resume_yaml, parsed_jd, request_llm)
+        result = await ats_detailed(resume.yaml, parsed_jd, request_llm)
         logger.info(f"ATS score for {current_user.email}: {result.overall_score}")
+        await store_ats_result(ats_key, result)
         return result
     except Exception as e:
         logger.error(f"ATS error for {current_user.id}: {e}")
         raise HTTPException(status_code=500, detail="Unable to calculate ATS score. Please try again.")
 
 
-@app.post('/optimize-resume')
-async def optimize_resume_endpoint(
-    request: OptimizeResumeRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Optimize resume for a job description.
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "10"))
 
-    Accepts optional `jd_cache_id` (skip LLM JD parse) and `original_ats_score`
-    (skip re-running the original ATS calculation — already done by /calculate-ats-detailed).
-    Requires ai_config (provider + api_key) in the request body.
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _sse_stream(events):
+    """Turn an async iterator of (event, data) pairs into SSE frames.
+
+    Emits a `: keep-alive` comment whenever no event arrived for
+    SSE_HEARTBEAT_SECONDS, so proxies never see an idle connection. Errors
+    raised after the 200 response has started are sent as an `error` event.
     """
-    logger.info(f"Resume optimization for user: {current_user.email}")
+    it = events.__aiter__()
+    step = asyncio.ensure_future(it.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({step}, timeout=SSE_HEARTBEAT_SECONDS)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                event, data = step.result()
+            except StopAsyncIteration:
+                break
+            except HTTPException as e:
+                yield _sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+                break
+            except Exception as e:
+                logger.error(f"[SSE] Stream failed: {e}")
+                yield _sse_event("error", {"status_code": 500, "detail": "Unexpected error. Please try again."})
+                break
+            yield _sse_event(event, data)
+            step = asyncio.ensure_future(it.__anext__())
+    finally:
+        # Client went away (or we are done): stop the pipeline and its LLM calls
+        if not step.done():
+            step.cancel()
+
+
+async def _optimize_pipeline(request: OptimizeResumeRequest, current_user: User, resume: ResumeVersion,
+                             db: AsyncSession, request_llm, stream_tokens: bool = False, before_commit=None,
+                             reservation: UsageReservation | None = None):
+    """Run the optimization stages, yielding (event, data) as each one finishes.
+
+    Events: jd, baseline, token (only with stream_tokens), optimized, score,
+    changes, usage and finally result — the same payload the JSON endpoint
+    returns. Raises HTTPException on failure (429 when the weekly quota is used up).
+
+    A quota slot is reserved before any LLM call and refunded if the pipeline
+    fails or is abandoned before the OptimizedResume is committed. Callers
+    that must fail with a real 429 before a response starts (the streaming
+    endpoint) reserve it themselves and pass `reservation` in.
+
+    `before_commit(db, optimized_resume_id)` runs inside the transaction that
+    saves the OptimizedResume (used by background jobs).
+    """
+    if reservation is None:
+        reservation = await reserve_generation(current_user)
+    try:
+        async with aclosing(_optimize_stages(request, current_user, resume, db, request_llm, reservation,
+                                             stream_tokens, before_commit)) as stages:
+            async for event in stages:
+                yield event
+    finally:
+        if not reservation.consumed:
+            await asyncio.shield(release_generation(reservation))
+
+
+async def _optimize_stages(request: OptimizeResumeRequest, current_user: User, resume: ResumeVersion,
+                           db: AsyncSession, request_llm, reservation: UsageReservation,
+                           stream_tokens: bool, before_commit):
+    """The body of _optimize_pipeline; marks `reservation` consumed once the result is committed."""
+    # ---- Resolve parsed JD (cache-first) ----
+    parsed_jd, jd_cache_id = await resolve_parsed_jd(request.job_desc, request.jd_cache_id, db, llm=request_llm)
+    yield "jd", {"jd_cache_id": jd_cache_id, "job_title": parsed_jd.job_title, "skills": parsed_jd.skills}
 
-    # Block unverified users
-    if not current_user.email_verified:
-        raise HTTPException(
-            status_code=403,
-            detail="Please verify your email address before generating optimized resumes. Check your inbox for the verification link."
-        )
+    # ---- Baseline ATS from the result cache (usually filled by the Analyze step) ----
+    ats_key      = ats_cache_key(current_user.id, resume, request.job_desc, request.ai_config)
+    original_ats = await get_cached_ats(ats_key, db)
 
-    if not request.job_desc.strip():
-        raise HTTPException(status_code=400, detail="Job description cannot be empty.")
+    def baseline_event():
+        if request.original_ats_score is not None:
+            return {"original_score": round(request.original_ats_score, 2)}
+        return {"original_score": round(original_ats.overall_score, 2), "match_level": original_ats.match_level}
 
-    if not current_user.resume_yaml:
-        raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
+    if original_ats is not None or request.original_ats_score is not None:
+        yield "baseline", baseline_event()
 
-    # Build per-request LLM from BYOK config
-    request_llm = _build_llm_from_config(request.ai_config)
+    tokens: asyncio.Queue | None = asyncio.Queue() if stream_tokens else None
 
-    # ---- Resolve parsed JD (cache-first) ----
-    if request.jd_cache_id:
-        cached = db.query(ParsedJDCache).filter(
-            ParsedJDCache.id == request.jd_cache_id
-        ).first()
-        if cached:
-            from schema.schema import parsedJobDescription
-            parsed_jd = parsedJobDescription(
-                job_title=cached.job_title or "",
-                skills=cached.skills or [],
-                job_description=cached.job_description,
-            )
-            logger.info(f"[CACHE HIT] Reused parsed JD for optimize (cache_id={request.jd_cache_id})")
-        else:
-            logger.warning(f"jd_cache_id {request.jd_cache_id} not found — falling back to live parse")
-            parsed_jd, _ = await get_or_parse_jd(request.job_desc, db, llm=request_llm)
-    else:
-        parsed_jd, _ = await get_or_parse_jd(request.job_desc, db, llm=request_llm)
+    async def on_token(text: str):
+        tokens.put_nowait(text)
 
+    stage_one = None
     try:
-        # ---- Original ATS score (skip if already computed by the Analyze step) ----
+        # ---- Stage 1: original ATS ∥ optimization ----
+        # Both only depend on the parsed JD and the stored resume, so they run
+        # concurrently; the optimized-resume score below waits on the pair.
+        stages = {
+            "optimized": optimize_resume(
+                resume_content=resume.yaml,
+                job_description=parsed_jd,
+                llm=request_llm,
+                addons="",
+                on_token=on_token if stream_tokens else None,
+            ),
+        }
+        # Original ATS score (skip if cached or already computed by the Analyze step)
+        if original_ats is None and request.original_ats_score is None:
+            stages["original"] = ats_detailed(resume.yaml, parsed_jd, request_llm)
+        stage_one = asyncio.ensure_future(gather_or_cancel(*stages.values()))
+
+        # Relay optimized-YAML tokens while stage 1 is running
+        while tokens is not None and not stage_one.done():
+            next_token = asyncio.ensure_future(tokens.get())
+            await asyncio.wait({next_token, stage_one}, return_when=asyncio.FIRST_COMPLETED)
+            if next_token.done():
+                yield "token", {"text": next_token.result()}
+            else:
+                next_token.cancel()
+        while tokens is not None and not tokens.empty():
+            yield "token", {"text": tokens.get_nowait()}
+
+        results = dict(zip(stages, await stage_one))
+
+        optimized_yaml = results["optimized"]
+        if "original" in results:
+            original_ats = results["original"]
+            await store_ats_result(ats_key, original_ats)
+            yield "baseline", baseline_event()
+
         if request.original_ats_score is not None:
             logger.info(f"Using pre-computed original ATS score: {request.original_ats_score} for {current_user.email}")
-            original_ats = None
             original_score_value = request.original_ats_score
         else:
-            original_ats = await ats_detailed(current_user.resume_yaml, parsed_jd, request_llm)
             original_score_value = original_ats.overall_score
             logger.info(f"Original ATS for {current_user.email}: {original_score_value}")
 
-        # ---- Generate the optimized resume ----
-        optimized_yaml = await optimize_resume(
-            resume_content=current_user.resume_yaml,
-            job_description=parsed_jd,
-            llm=request_llm,
-            addons=""
-        )
-
         # Strip markdown fences
         if "```" in optimized_yaml:
             optimized_yaml = optimized_yaml.split("```yaml")[-1] if "```yaml" in optimized_yaml else optimized_yaml.split("```")[-1]
             optimized_yaml = optimized_yaml.split("```")[0].strip()
-
-        # ---- Score the optimized resume ----
-        optimized_ats = await ats_detailed(optimized_yaml, parsed_jd, request_llm)
-        logger.info(f"Optimized ATS for {current_user.email}: {optimized_ats.overall_score}")
+        yield "optimized", {"optimized_resume_yaml": optimized_yaml}
+
+        # ---- Stage 2: score the optimized resume ----
+        # Incremental re-score from the original breakdown; the full LLM call is
+        # opt-in, or the fallback when only a bare original score is known.
+        if original_ats is not None and not request.llm_rescore:
+            optimized_ats = rescore_delta(original_ats, parsed_jd, resume.yaml, optimized_yaml)
+            logger.info(f"Optimized ATS (delta) for {current_user.email}: {optimized_ats.overall_score}")
+        else:
+            optimized_ats = await ats_detailed(optimized_yaml, parsed_jd, request_llm)
+            logger.info(f"Optimized ATS for {current_user.email}: {optimized_ats.overall_score}")
 
         # ---- Build improvement metadata ----
         if original_ats is not None:
@@ -1055,13 +1577,22 @@ async def optimize_resume_endpoint(
                 set(original_ats.keyword_analysis.matched_keywords)
             )
         else:
-            # We didn't re-run the original ATS — diff is unavailable, return empty list
+            # No original ATS breakdown (score came from the client) — diff is unavailable
             keywords_added = []
 
         improvements_made = [
             f"Score improved from {original_score_value:.1f} to {optimized_ats.overall_score:.1f}",
             f"Added {len(keywords_added)} new matching keywords",
         ]
+        yield "score", {
+            "original_score":    round(original_score_value, 2),
+            "optimized_score":   round(optimized_ats.overall_score, 2),
+            "score_improvement": round(optimized_ats.overall_score - original_score_value, 2),
+            "match_level":       optimized_ats.match_level,
+            "keywords_added":    keywords_added,
+            "improvements_made": improvements_made,
+            "critical_improvements_remaining": optimized_ats.critical_improvements,
+        }
 
         # Save debug copy (only when DEBUG_DUMP=true in .env)
         if os.getenv("DEBUG_DUMP", "false").lower() == "true":
@@ -1076,6 +1607,7 @@ async def optimize_resume_endpoint(
         record = OptimizedResume(
             id=uuid.uuid4(),
             user_id=current_user.id,
+            resume_id=resume.id,
             job_description=request.job_desc,
             job_title=parsed_jd.job_title,
             original_ats_score=original_score_value,
@@ -1089,22 +1621,34 @@ async def optimize_resume_endpoint(
             ai_model=request.ai_config.model       if request.ai_config else None,
         )
         db.add(record)
+        await db.flush()   # before_commit hooks may reference record.id
 
-        # ---- Increment weekly usage ----
-        new_count = increment_weekly_usage(current_user.id, db)
-        db.commit()
+        if before_commit is not None:
+            await before_commit(db, record.id)
+        await db.commit()
+        reservation.consumed = True
+        new_count = reservation.count
+
+        # Render the PDF in the background so the first download is instant
+        schedule_prewarm(optimized_yaml)
 
         weekly_limit = PLAN_LIMITS.get(current_user.plan, PLAN_LIMITS["free"])
         logger.info(f"[OK] Optimization complete for {current_user.email}. Weekly usage: {new_count}/{weekly_limit}")
 
         # ---- Compute changelog diff ----
-        resume_changes = compute_resume_diff(current_user.resume_yaml, optimized_yaml)
+        resume_changes = compute_resume_diff(resume.yaml, optimized_yaml)
+        yield "changes", {"resume_changes": resume_changes}
 
         # ---- Usage stats for the meter ----
-        daily_usage   = get_daily_usage(current_user.id, db)
-        monthly_usage = get_monthly_usage(current_user.id, db)
+        _, daily_usage, monthly_usage = await get_usage_snapshot(current_user.id, db)
+        yield "usage", {
+            "weekly_usage":  new_count,
+            "weekly_limit":  weekly_limit,
+            "daily_usage":   daily_usage,
+            "monthly_usage": monthly_usage,
+        }
 
-        return {
+        yield "result", {
             "message":                    "Resume optimized successfully",
             "original_score":             round(original_score_value, 2),
             "optimized_score":            round(optimized_ats.overall_score, 2),
@@ -1123,90 +1667,486 @@ async def optimize_resume_endpoint(
             "monthly_usage":              monthly_usage,
         }
 
-    except HTTPException:
+    except (HTTPException, LeaseLost):
+        # LeaseLost (from a job's before_commit) is the worker's to handle: the run is discarded, not failed
         raise
     except Exception as e:
         logger.error(f"Optimization error for {current_user.id}: {e}")
         raise HTTPException(status_code=500, detail="Unable to optimize resume. Please try again.")
+    finally:
+        if stage_one is not None and not stage_one.done():
+            stage_one.cancel()   # consumer went away mid-stage — stop billing LLM tokens
+
+
+def _check_can_optimize(request: OptimizeResumeRequest, current_user: User) -> None:
+    """Preconditions shared by /optimize-resume and /optimize-jobs."""
+    # Block unverified users
+    if not current_user.email_verified:
+        raise HTTPException(
+            status_code=403,
+            detail="Please verify your email address before generating optimized resumes. Check your inbox for the verification link."
+        )
+
+    if not request.job_desc.strip():
+        raise HTTPException(status_code=400, detail="Job description cannot be empty.")
+
+    if not current_user.has_resume:
+        raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
+
+
+def _optimize_fingerprint(request: OptimizeResumeRequest) -> str:
+    """Idempotency fingerprint of an optimize request (the BYOK key is left out)."""
+    return request_fingerprint(request.model_dump(mode="json", exclude={"ai_config": {"api_key"}}))
+
+
+async def _idempotent_pipeline(pipeline, claim):
+    """Wrap _optimize_pipeline so the claimed Idempotency-Key stores the result,
+    or is released if the pipeline fails or the client goes away first."""
+    completed = False
+    try:
+        async for event, data in pipeline:
+            if event == "result":
+                await idempotency.complete(claim, data)
+                completed = True
+            yield event, data
+    finally:
+        if not completed:
+            await asyncio.shield(idempotency.release(claim))
+
+
+async def _replay_events(result: dict):
+    yield "result", result
+
+
+def _optimization_result_from_record(record: OptimizedResume) -> dict:
+    """The essentials of the /optimize-resume payload, rebuilt from a saved row."""
+    return {
+        "message":               "Resume optimized successfully",
+        "original_score":        round(record.original_ats_score, 2),
+        "optimized_score":       round(record.optimized_ats_score, 2),
+        "score_improvement":     round(record.score_improvement, 2),
+        "match_level":           record.match_level,
+        "improvements_made":     record.improvements_made or [],
+        "keywords_added":        record.keywords_added or [],
+        "optimized_resume_yaml": record.optimized_yaml,
+        "ai_provider":           record.ai_provider,
+        "ai_model":              record.ai_model,
+    }
+
+
+@app.post('/optimize-resume')
+async def optimize_resume_endpoint(
+    request: OptimizeResumeRequest,
+    response: Response,
+    stream: bool = Query(False, description="Stream progress as Server-Sent Events instead of returning one JSON body."),
+    idempotency_key: str | None = Header(None, max_length=255, description="Retries with the same key replay the first response."),
+    current_user: User = Depends(get_current_user),
+    resume: ResumeVersion | None = Depends(get_active_resume),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Optimize resume for a job description.
+
+    Accepts optional `jd_cache_id` (skip LLM JD parse) and `original_ats_score`
+    (skip re-running the original ATS calculation — already done by /calculate-ats-detailed).
+    The optimized resume is re-scored incrementally from the original breakdown;
+    set `llm_rescore` (or have no breakdown available) for a full LLM re-score.
+    Requires ai_config (provider + api_key) in the request body.
+
+    With `?stream=true` the response is `text/event-stream`: `jd`, `baseline`,
+    `token` (optimized YAML as the model writes it), `optimized`, `score`,
+    `changes`, `usage` and a final `result` event carrying the usual JSON body.
+    Failures after the stream has started arrive as an `error` event.
+
+    With an `Idempotency-Key` header, a retry of the same request returns the
+    first response (waiting for it if it is still running) without calling
+    the LLM or counting usage again; replays carry `Idempotent-Replayed: true`
+    and, when streaming, consist of the `result` event only.
+    """
+    logger.info(f"Resume optimization for user: {current_user.email}")
+
+    claim = None
+    if idempotency_key:
+        outcome = await idempotency.begin(current_user.id, "optimize-resume", idempotency_key,
+                                          _optimize_fingerprint(request))
+        if isinstance(outcome, IdempotentReplay):
+            result = outcome.response
+            if result is None:
+                record = await db.get(OptimizedResume, outcome.resource_id) if outcome.resource_id else None
+                if record is None:
+                    raise HTTPException(status_code=404, detail="The optimized resume for this request was deleted.")
+                result = _optimization_result_from_record(record)
+            if stream:
+                return StreamingResponse(
+                    _sse_stream(_replay_events(result)),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "Idempotent-Replayed": "true"},
+                )
+            response.headers["Idempotent-Replayed"] = "true"
+            return result
+        claim = outcome
+
+    try:
+        _check_can_optimize(request, current_user)
+        if resume is None:
+            raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
+        # Build per-request LLM from BYOK config
+        request_llm = _build_llm_from_config(request.ai_config)
+        # Take the quota slot before any response starts, so over-quota is a real 429 when streaming too
+        reservation = await reserve_generation(current_user)
+    except BaseException:
+        if claim is not None:
+            await idempotency.release(claim)
+        raise
+
+    if claim is None:
+        pipeline = _optimize_pipeline(request, current_user, resume, db, request_llm, stream_tokens=stream,
+                                      reservation=reservation)
+    else:
+        pipeline = _idempotent_pipeline(
+            _optimize_pipeline(
+                request, current_user, resume, db, request_llm, stream_tokens=stream,
+                before_commit=lambda tx, record_id: idempotency.mark_committed(tx, claim, resource_id=record_id),
+                reservation=reservation,
+            ),
+            claim,
+        )
+    if stream:
+        return StreamingResponse(
+            _sse_stream(pipeline),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Refund if the body never ran (client gone before the first chunk); no-op otherwise
+            background=BackgroundTask(release_generation, reservation),
+        )
+
+    result = None
+    async for event, data in pipeline:
+        if event == "result":
+            result = data
+    return result
+
+
+# ==================== BACKGROUND OPTIMIZATION JOBS ====================
+
+async def _run_optimization_job(job: OptimizationJob, api_key: str, mark_succeeded) -> dict:
+    """JobWorker runner: replay a queued /optimize-jobs request through the pipeline."""
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, job.user_id)
+        # The version that was active at submission, even if the user re-uploaded since
+        resume = await load_resume(db, job.resume_id or user.active_resume_id, user.id) if user else None
+        if resume is None:
+            raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
+        request = OptimizeResumeRequest.model_validate(
+            {**job.request, "ai_config": {**job.request["ai_config"], "api_key": api_key}}
+        )
+        request_llm = _build_llm_from_config(request.ai_config)
+        result = None
+        async for event, data in _optimize_pipeline(request, user, resume, db, request_llm, before_commit=mark_succeeded):
+            if event == "result":
+                result = data
+        return result
+
+
+job_worker = JobWorker(runner=_run_optimization_job)
+
+# Set JOB_RUN_IN_API=false when jobs are handled only by separate `python worker.py` processes
+JOB_RUN_IN_API = os.getenv("JOB_RUN_IN_API", "true").lower() == "true"
+
+
+def _job_status(job: OptimizationJob) -> dict:
+    return {
+        "job_id":      str(job.id),
+        "status":      job.status,
+        "attempts":    job.attempts,
+        "error":       job.error if job.status != "succeeded" else None,
+        "created_at":  job.created_at.isoformat() if job.created_at else None,
+        "started_at":  job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url":  f"/optimize-jobs/{job.id}",
+        "result_url":  f"/optimize-jobs/{job.id}/result",
+    }
+
+
+async def _get_user_job(job_id: str, current_user: User, db: AsyncSession) -> OptimizationJob:
+    try:
+        job = await db.get(OptimizationJob, uuid.UUID(job_id))
+    except ValueError:
+        job = None
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@app.post('/optimize-jobs', status_code=202)
+async def submit_optimization_job(
+    request: OptimizeResumeRequest,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255, description="Retries with the same key return the first job."),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue a resume optimization and return immediately with a job id.
+
+    Same body as /optimize-resume. Poll GET /optimize-jobs/{job_id} for
+    progress and fetch the usual /optimize-resume payload from
+    GET /optimize-jobs/{job_id}/result once it has succeeded.
+    With an `Idempotency-Key` header, a retry returns the job queued by the
+    first request instead of queueing another one.
+    """
+    claim = None
+    if idempotency_key:
+        outcome = await idempotency.begin(current_user.id, "optimize-jobs", idempotency_key,
+                                          _optimize_fingerprint(request))
+        if isinstance(outcome, IdempotentReplay):
+            response.headers["Idempotent-Replayed"] = "true"
+            return _job_status(await _get_user_job(str(outcome.resource_id), current_user, db))
+        claim = outcome
+
+    try:
+        _check_can_optimize(request, current_user)
+        _build_llm_from_config(request.ai_config)   # reject unknown providers up front
+        await check_generation_limit(current_user, db)   # the worker reserves the slot when it runs
+
+        job = await enqueue_job(db, current_user.id, request, resume_id=current_user.active_resume_id)
+        if claim is not None:
+            await idempotency.mark_committed(db, claim, resource_id=job.id)
+        await db.commit()
+    except BaseException:
+        if claim is not None:
+            await idempotency.release(claim)
+        raise
+    if claim is not None:
+        await idempotency.complete(claim)
+    if JOB_RUN_IN_API:
+        job_worker.wake()
+    logger.info(f"[JOBS] Queued job {job.id} for {current_user.email}")
+    return _job_status(job)
+
+
+@app.get('/optimize-jobs/{job_id}')
+async def get_optimization_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Status of a background optimization job."""
+    return _job_status(await _get_user_job(job_id, current_user, db))
+
+
+@app.get('/optimize-jobs/{job_id}/result')
+async def get_optimization_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Result of a finished job: 202 while queued/running, 409 if it failed."""
+    job = await _get_user_job(job_id, current_user, db)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "succeeded":
+        return Response(
+            content=json.dumps(_job_status(job)),
+            status_code=202,
+            media_type="application/json",
+            headers={"Retry-After": "2"},
+        )
+    if job.result is not None:
+        return job.result
+
+    # Saved but the worker died before storing the payload — rebuild the essentials
+    record = await db.get(OptimizedResume, job.optimized_resume_id) if job.optimized_resume_id else None
+    if record is None:
+        raise HTTPException(status_code=404, detail="The optimized resume for this job was deleted.")
+    return _optimization_result_from_record(record)
 
 
 # ==================== HISTORY ENDPOINT ====================
 
+HISTORY_PAGE_DEFAULT = 50
+HISTORY_PAGE_MAX     = 100
+
+# Columns for the history list — never the job_description / optimized_yaml blobs
+_HISTORY_COLUMNS = (
+    OptimizedResume.id,
+    OptimizedResume.job_title,
+    OptimizedResume.original_ats_score,
+    OptimizedResume.optimized_ats_score,
+    OptimizedResume.score_improvement,
+    OptimizedResume.match_level,
+    OptimizedResume.keywords_added,
+    OptimizedResume.improvements_made,
+    OptimizedResume.ai_provider,
+    OptimizedResume.ai_model,
+    OptimizedResume.created_at,
+)
+
+
+def _encode_history_cursor(created_at: datetime, record_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{record_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_history_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, record_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(record_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _history_item(r) -> dict:
+    return {
+        "id":                   str(r.id),
+        "job_title":            r.job_title,
+        "original_ats_score":   r.original_ats_score,
+        "optimized_ats_score":  r.optimized_ats_score,
+        "score_improvement":    r.score_improvement,
+        "match_level":          r.match_level,
+        "keywords_added":       r.keywords_added,
+        "improvements_made":    r.improvements_made,
+        "ai_provider":          r.ai_provider,
+        "ai_model":             r.ai_model,
+        "created_at":           r.created_at.isoformat() if r.created_at else None,
+    }
+
+
 @app.get('/my-optimizations')
 async def get_my_optimizations(
+    response: Response,
+    limit: int = Query(HISTORY_PAGE_DEFAULT, ge=1, le=HISTORY_PAGE_MAX, description="Page size."),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page."),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Return the user's past resume optimizations (newest first)."""
-    records = (
-        db.query(OptimizedResume)
-        .filter(OptimizedResume.user_id == current_user.id)
-        .order_by(OptimizedResume.created_at.desc())
-        .all()
+    """Return one page of the user's past resume optimizations (newest first).
+
+    Keyset-paginated on (created_at, id): when more rows exist, the response
+    carries an `X-Next-Cursor` header to pass back as `?cursor=`. Items omit
+    the job description and YAML — fetch those from /my-optimizations/{id}.
+    """
+    query = (
+        select(*_HISTORY_COLUMNS)
+        .where(OptimizedResume.user_id == current_user.id)
+        .order_by(OptimizedResume.created_at.desc(), OptimizedResume.id.desc())
+        .limit(limit + 1)
     )
-    return [
-        {
-            "id":                   str(r.id),
-            "job_title":            r.job_title,
-            "original_ats_score":   r.original_ats_score,
-            "optimized_ats_score":  r.optimized_ats_score,
-            "score_improvement":    r.score_improvement,
-            "match_level":          r.match_level,
-            "keywords_added":       r.keywords_added,
-            "improvements_made":    r.improvements_made,
-            "ai_provider":          r.ai_provider,
-            "ai_model":             r.ai_model,
-            "created_at":           r.created_at.isoformat() if r.created_at else None,
-        }
-        for r in records
-    ]
+    if cursor:
+        after_created, after_id = _decode_history_cursor(cursor)
+        query = query.where(
+            tuple_(OptimizedResume.created_at, OptimizedResume.id) < tuple_(after_created, after_id)
+        )
 
-@app.get('/my-optimizations/{record_id}/pdf')
-async def download_optimization_pdf(
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = _encode_history_cursor(last.created_at, last.id)
+    return [_history_item(r) for r in rows]
+
+
+@app.get('/my-optimizations/{record_id}')
+async def get_optimization_detail(
     record_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Re-download a past optimized resume as a PDF by its record ID."""
+    """One past optimization including its job description and optimized YAML."""
     try:
         rid = uuid.UUID(record_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid optimization ID.")
 
-    record = (
-        db.query(OptimizedResume)
-        .filter(OptimizedResume.id == rid, OptimizedResume.user_id == current_user.id)
-        .first()
+    result = await db.execute(
+        select(OptimizedResume)
+        .where(OptimizedResume.id == rid, OptimizedResume.user_id == current_user.id)
     )
+    record = result.scalars().first()
     if not record:
         raise HTTPException(status_code=404, detail="Optimization not found.")
 
-    try:
-        pdf_bytes = generate_pdf_from_yaml_string(record.optimized_yaml)
-    except Exception as e:
-        logger.error(f"PDF re-download error for record {record_id}: {e}")
-        raise HTTPException(status_code=500, detail="PDF generation failed.")
+    return {
+        **_history_item(record),
+        "job_description":       record.job_description,
+        "optimized_resume_yaml": record.optimized_yaml,
+    }
 
-    safe_title = (record.job_title or "optimized_resume").replace(" ", "_")[:40]
-    filename = f"resume_{safe_title}.pdf"
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
+
+def _pdf_response(pdf_bytes: bytes, etag: str, filename: str) -> StreamingResponse:
     return StreamingResponse(
         iter([pdf_bytes]),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"',
             "Content-Length": str(len(pdf_bytes)),
+            "ETag": f'"{etag}"',
+            "Cache-Control": "private, no-cache",
         },
     )
 
 
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"})
+
+
+@app.get('/my-optimizations/{record_id}/pdf')
+async def download_optimization_pdf(
+    record_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: str | None = Header(None),
+):
+    """Re-download a past optimized resume as a PDF by its record ID.
+
+    Served from the rendered-PDF cache when possible; honours If-None-Match.
+    """
+    try:
+        rid = uuid.UUID(record_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid optimization ID.")
+
+    result = await db.execute(
+        select(OptimizedResume)
+        .where(OptimizedResume.id == rid, OptimizedResume.user_id == current_user.id)
+    )
+    record = result.scalars().first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Optimization not found.")
+
+    etag = pdf_cache_key(record.optimized_yaml)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    try:
+        pdf_bytes, etag = await render_pdf_cached(record.optimized_yaml, key=etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF re-download error for record {record_id}: {e}")
+        raise HTTPException(status_code=500, detail="PDF generation failed.")
+
+    safe_title = (record.job_title or "optimized_resume").replace(" ", "_")[:40]
+    filename = f"resume_{safe_title}.pdf"
+
+    return _pdf_response(pdf_bytes, etag, filename)
+
+
 # ==================== PDF GENERATION ENDPOINT ====================
 
 @app.post('/generate-pdf')
 async def generate_pdf_endpoint(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     body: GeneratePDFRequest = None,
+    if_none_match: str | None = Header(None),
 ):
     """
     Generate a PDF from a resume YAML string and stream it back.
@@ -1215,6 +2155,7 @@ async def generate_pdf_endpoint(
         { "resume_yaml": "<yaml string>" }
 
     If resume_yaml is omitted, the user's stored base resume is used.
+    Served from the rendered-PDF cache when possible; honours If-None-Match.
     """
     # Resolve which YAML to render
     resume_yaml = None
@@ -1222,7 +2163,8 @@ async def generate_pdf_endpoint(
         resume_yaml = body.resume_yaml
 
     if not resume_yaml:
-        resume_yaml = current_user.resume_yaml
+        resume = await load_resume(db, current_user.active_resume_id, current_user.id)
+        resume_yaml = resume.yaml if resume else None
 
 
     if not resume_yaml:
@@ -1231,22 +2173,21 @@ async def generate_pdf_endpoint(
             detail="No resume found. Please upload a resume first."
         )
 
+    etag = pdf_cache_key(resume_yaml)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
     try:
-        pdf_bytes = generate_pdf_from_yaml_string(resume_yaml)
+        pdf_bytes, etag = await render_pdf_cached(resume_yaml, key=etag)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"PDF generation error for {current_user.id}: {e}")
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {e}")
 
     logger.info(f"[OK] PDF generated for {current_user.email} ({len(pdf_bytes):,} bytes)")
 
-    return StreamingResponse(
-        iter([pdf_bytes]),
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": 'attachment; filename="optimized_resume.pdf"',
-            "Content-Length": str(len(pdf_bytes)),
-        },
-    )
+    return _pdf_response(pdf_bytes, etag, "optimized_resume.pdf")
 
 
 # ==================== ADMIN ENDPOINTS ====================
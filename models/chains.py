@@ -4,8 +4,10 @@ chains.py
 LangChain chain builder functions for the BYOK (Bring-Your-Own-Key) model.
 
 Each public function accepts a pre-built LangChain LLM instance and returns
-a ready-to-invoke chain. Chains are constructed per-request — there are no
-module-level globals that hold a specific provider's key.
+a ready-to-invoke chain. Prompt templates are compiled once at import time,
+and finished chains are cached per LLM instance for as long as the pooled
+client stays alive (see models/llm_factory.get_llm). No module-level global
+holds a specific provider's key beyond that idle TTL.
 
 A module-level `llm` fallback is still built from the server .env (if present)
 and used only by the /health endpoint to check if a default model is reachable.
@@ -23,6 +25,8 @@ from config.prompts import (
     OPTIMIZATION_HUMAN_TEMPLATE,
 )
 from schema.schema import parsedJobDescription, ATS, DetailedATS
+from config.cache import TTLCache
+from models.llm_factory import LLM_CLIENT_CACHE_SIZE, LLM_CLIENT_IDLE_SECONDS
 from dotenv import load_dotenv
 import os
 import logging
@@ -48,59 +52,106 @@ else:
     )
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Prompt templates — compiled once at import time, shared by every chain
+# ──────────────────────────────────────────────────────────────────────────────
+RES2YAML_PROMPT = ChatPromptTemplate(
+    [
+        ("system", res2yaml_system_prompt),
+        ("human", "{resume_content}"),
+    ]
+)
+
+JD_PARSER_PROMPT = PromptTemplate(
+    template=jd_template,
+    input_variables=["job_description"],
+)
+
+ATS_PROMPT = PromptTemplate(
+    template=ats_calculation,
+    input_variables=["job_title", "skills", "job_description", "resume_yaml"],
+)
+
+ENHANCED_ATS_PROMPT = ChatPromptTemplate(
+    [
+        ("system", ENHANCED_ATS_SYSTEM_PROMPT),
+        ("human", ENHANCED_ATS_HUMAN_TEMPLATE),
+    ]
+)
+
+OPTIMIZATION_PROMPT = ChatPromptTemplate(
+    [
+        ("system", OPTIMIZATION_SYSTEM_PROMPT),
+        ("human", OPTIMIZATION_HUMAN_TEMPLATE),
+    ]
+)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Per-client chain cache
+# ──────────────────────────────────────────────────────────────────────────────
+# `with_structured_output` regenerates the Pydantic JSON schema / tool
+# definition on every call (~3 ms for DetailedATS), so finished chains are
+# cached per LLM instance. LLMs come from the pooled registry in
+# models/llm_factory, so the same instance is reused across requests.
+#
+# Keys use id(llm): a cached chain holds a strong reference to its LLM, so the
+# id cannot be recycled while the entry exists. Entries expire on the same idle
+# TTL as pooled clients, so a user's key is not kept alive past its TTL here.
+_chain_cache = TTLCache(
+    maxsize=4 * LLM_CLIENT_CACHE_SIZE,
+    ttl=LLM_CLIENT_IDLE_SECONDS,
+    name="llm_chains",
+    sliding=True,
+)
+
+
+def _cached_chain(name: str, llm, build):
+    key = (name, id(llm))
+    chain = _chain_cache.get(key)
+    if chain is None:
+        chain = build(llm)
+        _chain_cache.set(key, chain)
+    return chain
+
+
+def purge_idle_chains() -> int:
+    """Drop chains whose LLM client has been idle past its TTL."""
+    return _chain_cache.purge_expired()
+
+
+def chain_cache_stats() -> dict:
+    return _chain_cache.stats()
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Chain builder functions — call these with a user-supplied LLM instance
 # ──────────────────────────────────────────────────────────────────────────────
 
 def build_res2yaml_chain(llm):
     """Resume text → structured YAML chain."""
-    prompt = ChatPromptTemplate(
-        [
-            ("system", res2yaml_system_prompt),
-            ("human", "{resume_content}"),
-        ]
-    )
-    return prompt | llm
+    return _cached_chain("res2yaml", llm, lambda m: RES2YAML_PROMPT | m)
 
 
 def build_jd_parser_chain(llm):
     """Raw job description text → parsedJobDescription structured output chain."""
-    jd_parser_llm = llm.with_structured_output(parsedJobDescription)
-    jd_prompt = PromptTemplate(
-        template=jd_template,
-        input_variables=["job_description"],
+    return _cached_chain(
+        "jd_parser", llm, lambda m: JD_PARSER_PROMPT | m.with_structured_output(parsedJobDescription)
     )
-    return jd_prompt | jd_parser_llm
 
 
 def build_ats_chain(llm):
     """(Legacy) Simple ATS score chain — kept for backward compatibility."""
-    ats_llm = llm.with_structured_output(ATS)
-    ats_prompt = PromptTemplate(
-        template=ats_calculation,
-        input_variables=["job_title", "skills", "job_description", "resume_yaml"],
-    )
-    return ats_prompt | ats_llm
+    return _cached_chain("ats", llm, lambda m: ATS_PROMPT | m.with_structured_output(ATS))
 
 
 def build_enhanced_ats_chain(llm):
     """Detailed ATS breakdown chain with sub-scores."""
-    enhanced_ats_llm = llm.with_structured_output(DetailedATS)
-    enhanced_ats_prompt = ChatPromptTemplate(
-        [
-            ("system", ENHANCED_ATS_SYSTEM_PROMPT),
-            ("human", ENHANCED_ATS_HUMAN_TEMPLATE),
-        ]
+    return _cached_chain(
+        "enhanced_ats", llm, lambda m: ENHANCED_ATS_PROMPT | m.with_structured_output(DetailedATS)
     )
-    return enhanced_ats_prompt | enhanced_ats_llm
 
 
 def build_optimization_chain(llm):
     """Resume optimization chain — returns raw LLM content (YAML string)."""
-    optimization_prompt = ChatPromptTemplate(
-        [
-            ("system", OPTIMIZATION_SYSTEM_PROMPT),
-            ("human", OPTIMIZATION_HUMAN_TEMPLATE),
-        ]
-    )
-    return optimization_prompt | llm
\ No newline at end of file
+    return _cached_chain("optimization", llm, lambda m: OPTIMIZATION_PROMPT | m)
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Date, UniqueConstraint, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Date, UniqueConstraint, ForeignKey, Boolean, LargeBinary, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from config.database import Base
 import uuid
 
@@ -11,7 +11,7 @@ class User(Base):
 
     id                  = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     email               = Column(String, unique=True, index=True, nullable=False)
-    password_hash       = Column(String, nullable=False)
+    password_hash       = deferred(Column(String, nullable=False), raiseload=True)   # only login reads it (undefer)
     full_name           = Column(String, nullable=True)
     plan                = Column(String, nullable=False, default="free")        # 'free' | 'pro'
 
@@ -20,8 +20,10 @@ class User(Base):
     email_verification_token    = Column(String, nullable=True, index=True)      # One-time token sent in email
     email_verification_sent_at  = Column(DateTime(timezone=True), nullable=True) # When last email was sent
 
-    # Resume stored directly on the user (one active resume at a time)
-    resume_yaml         = Column(Text, nullable=True)
+    # Active resume version (content lives in `resumes`; one active version at a time).
+    # Filename/upload time are denormalised here so the auth path needs no join.
+    active_resume_id    = Column(UUID(as_uuid=True), ForeignKey("resumes.id", ondelete="SET NULL", use_alter=True,
+                                                                name="fk_users_active_resume_id"), nullable=True)
     resume_filename     = Column(String, nullable=True)
     resume_uploaded_at  = Column(DateTime(timezone=True), nullable=True)
 
@@ -32,13 +34,50 @@ class User(Base):
     optimized_resumes   = relationship("OptimizedResume", back_populates="user", cascade="all, delete-orphan")
     generation_usage    = relationship("GenerationUsage",  back_populates="user", cascade="all, delete-orphan")
 
+    @property
+    def has_resume(self) -> bool:
+        return self.active_resume_id is not None
+
+
+class Resume(Base):
+    """One immutable version of a user's parsed resume, stored zstd-compressed.
+
+    Uploads insert a new version — or reuse the existing one with the same
+    content_hash — and point User.active_resume_id at it. OptimizedResume and
+    OptimizationJob rows reference the version they were built from, and
+    content_hash (SHA-256 of the YAML) is the resume part of downstream cache keys.
+
+    pdf_hash / text_hash fingerprint the upload the version was parsed from,
+    so re-uploading the same PDF (or the same text) skips the res2yaml LLM call.
+    """
+    __tablename__ = "resumes"
+
+    id           = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id      = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    yaml_zstd    = Column(LargeBinary, nullable=False)       # zstd-compressed UTF-8 YAML
+    yaml_bytes   = Column(Integer, nullable=False)           # Uncompressed size
+    filename     = Column(String, nullable=True)             # Uploaded PDF name
+    ai_provider  = Column(String, nullable=True)             # BYOK provider/model that parsed it
+    ai_model     = Column(String, nullable=True)
+    pdf_hash     = Column(String(64), nullable=True)         # SHA-256 of the uploaded PDF bytes
+    text_hash    = Column(String(64), nullable=True)         # SHA-256 of the normalized extracted text
+    created_at   = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_hash", name="uq_resumes_user_content_hash"),
+        Index("ix_resumes_pdf_hash", "pdf_hash"),
+        Index("ix_resumes_text_hash", "text_hash"),
+    )
+
 
 
 class OptimizedResume(Base):
     __tablename__ = "optimized_resumes"
 
     id                  = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id             = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id             = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    resume_id           = Column(UUID(as_uuid=True), ForeignKey("resumes.id", ondelete="SET NULL"), nullable=True)  # Source version
     job_description     = Column(Text, nullable=False)
     job_title           = Column(String, nullable=True)                         # Parsed from JD
     original_ats_score  = Column(Float, nullable=False)
@@ -55,6 +94,11 @@ class OptimizedResume(Base):
     # Relationship
     user                = relationship("User", back_populates="optimized_resumes")
 
+    __table_args__ = (
+        # Per-user history and the daily/monthly usage counters are range scans on this
+        Index("ix_optimized_resumes_user_created", "user_id", "created_at"),
+    )
+
 
 
 class GenerationUsage(Base):
@@ -78,6 +122,10 @@ class GenerationUsage(Base):
 class ParsedJDCache(Base):
     """Caches parsed job descriptions keyed by a SHA-256 hash of the raw JD text.
     Prevents duplicate LLM calls when the same JD is used across Analyze + Generate.
+
+    `parser` records which path produced the row: "local" (config/jd_local.py)
+    or "llm". A local row below the confidence threshold is replaced in place
+    by an LLM parse the first time a request with an AI config needs it.
     """
     __tablename__ = "parsed_jd_cache"
 
@@ -85,5 +133,92 @@ class ParsedJDCache(Base):
     jd_hash     = Column(String(64), unique=True, nullable=False, index=True)  # SHA-256 hex digest
     job_title   = Column(String, nullable=True)
     skills      = Column(JSONB, nullable=False)      # List[str]
-    job_description = Column(Text, nullable=False)   # Cleaned/condensed JD text from LLM
-    created_at  = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    job_description = Column(Text, nullable=False)   # Cleaned/condensed JD text
+    parser      = Column(String, nullable=False, default="llm", server_default="llm")  # local | llm
+    confidence  = Column(Float, nullable=True)       # Local parser confidence (NULL for LLM parses)
+    created_at  = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ATSResultCache(Base):
+    """Caches DetailedATS results keyed by (resume hash, JD hash, provider, model).
+    Avoids re-running the ATS LLM call when an unchanged resume is re-analysed
+    against an unchanged JD. Rows expire ATS_CACHE_TTL_DAYS after they were
+    written and are purged by the periodic sweeper in main.py; deleting the
+    user removes theirs.
+    """
+    __tablename__ = "ats_result_cache"
+
+    id          = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id     = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    resume_hash = Column(String(64), nullable=False)    # SHA-256 of resume_yaml
+    jd_hash     = Column(String(64), nullable=False)    # Same digest as ParsedJDCache.jd_hash
+    ai_provider = Column(String, nullable=False)
+    ai_model    = Column(String, nullable=False)        # Resolved model (provider default applied)
+    result      = Column(JSONB, nullable=False)         # DetailedATS.model_dump()
+    created_at  = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "resume_hash", "jd_hash", "ai_provider", "ai_model", name="uq_ats_result_cache_key"),
+        Index("ix_ats_result_cache_created", "created_at"),
+    )
+
+
+class OptimizationJob(Base):
+    """Durable queue entry for a background /optimize-jobs request.
+
+    Workers claim rows with SELECT … FOR UPDATE SKIP LOCKED and hold a lease
+    (lease_expires_at) that they renew while running. A crashed worker's job is
+    re-claimed once its lease lapses. `attempts` doubles as a fencing token, so
+    only the current holder can complete a job. The BYOK key is stored encrypted
+    and wiped as soon as the job reaches a terminal state.
+    """
+    __tablename__ = "optimization_jobs"
+
+    id                  = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id             = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status              = Column(String, nullable=False, default="queued")      # queued | running | succeeded | failed
+    request             = Column(JSONB, nullable=False)                         # OptimizeResumeRequest minus the api_key
+    resume_id           = Column(UUID(as_uuid=True), ForeignKey("resumes.id", ondelete="SET NULL"), nullable=True)  # Version active at submission
+    ai_provider         = Column(String, nullable=False)
+    encrypted_api_key   = Column(LargeBinary, nullable=True)                    # Fernet token; NULL once terminal
+    attempts            = Column(Integer, nullable=False, default=0)
+    max_attempts        = Column(Integer, nullable=False, default=3)
+    available_at        = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # retry backoff
+    lease_expires_at    = Column(DateTime(timezone=True), nullable=True)
+    error               = Column(Text, nullable=True)
+    result              = Column(JSONB, nullable=True)                          # Same payload as /optimize-resume
+    optimized_resume_id = Column(UUID(as_uuid=True), ForeignKey("optimized_resumes.id", ondelete="SET NULL"), nullable=True)
+    created_at          = Column(DateTime(timezone=True), server_default=func.now())
+    started_at          = Column(DateTime(timezone=True), nullable=True)
+    finished_at         = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_optimization_jobs_claim", "status", "available_at"),
+    )
+
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the outcome of the request it guarded.
+
+    One row per (user, endpoint, key). `request_hash` fingerprints the request
+    body so a key reused for a different request is rejected. Status moves
+    in_progress → committed (written in the same transaction as the endpoint's
+    own side effects) → completed (`response` stored). Rows expire after a TTL.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id            = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id       = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    endpoint      = Column(String, nullable=False)                   # e.g. "optimize-resume"
+    key           = Column(String(255), nullable=False)
+    request_hash  = Column(String(64), nullable=False)               # SHA-256 of the canonical request body
+    status        = Column(String, nullable=False, default="in_progress")   # in_progress | committed | completed
+    resource_id   = Column(UUID(as_uuid=True), nullable=True)        # e.g. OptimizedResume / OptimizationJob id
+    response      = Column(JSONB, nullable=True)                     # Stored response body once completed
+    locked_at     = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # when the current owner claimed it
+    created_at    = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at    = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_keys_user_endpoint_key"),
+    )
@@ -5,10 +5,24 @@ Per-request LangChain LLM factory for the BYOK (Bring-Your-Own-Key) model.
 
 Usage
 -----
-    from models.llm_factory import build_llm
-    llm = build_llm(provider="openai", api_key="sk-...", model="gpt-4o-mini")
+    from models.llm_factory import get_llm
+    llm = get_llm(provider="openai", api_key="sk-...", model="gpt-4o-mini")
     chain = build_res2yaml_chain(llm)
 
+Client pooling
+--------------
+  get_llm() returns a cached client per (provider, model, key fingerprint).
+  The fingerprint is an HMAC of the API key under a random per-process salt,
+  so raw keys never appear in cache keys, logs or /health. Entries are evicted
+  after LLM_CLIENT_IDLE_SECONDS without use (swept by purge_idle_llm_clients),
+  which drops the only reference to the key. OpenAI, OpenRouter and Groq
+  clients share one keep-alive httpx pool per provider host, so back-to-back
+  calls reuse warm TLS connections. build_llm() always constructs a fresh
+  client (still on the shared pools).
+
+  Env: LLM_CLIENT_CACHE_SIZE (default 256), LLM_CLIENT_IDLE_SECONDS (default 600),
+       LLM_HTTP_MAX_CONNECTIONS (default 100 per host).
+
 Supported providers
 -------------------
   openai      → langchain_openai.ChatOpenAI
@@ -23,8 +37,15 @@ Error handling
   • Auth / quota error → re-raised as ProviderAuthError (caller converts to HTTP 402)
 """
 
+import hashlib
+import hmac
+import os
+
+import httpx
 from fastapi import HTTPException
 
+from config.cache import TTLCache
+
 # Default models used when the caller omits the model field
 PROVIDER_DEFAULTS: dict[str, str] = {
     "openai":      "gpt-4o-mini",
@@ -43,6 +64,83 @@ PROVIDER_LABELS: dict[str, str] = {
 }
 
 
+OPENAI_BASE_URL     = "https://api.openai.com/v1"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+GROQ_BASE_URL       = "https://api.groq.com"
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+
+_KEY_SALT = os.urandom(32)   # per process — fingerprints are never persisted
+
+LLM_CLIENT_CACHE_SIZE   = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "256"))
+LLM_CLIENT_IDLE_SECONDS = float(os.getenv("LLM_CLIENT_IDLE_SECONDS", "600"))
+
+_llm_clients = TTLCache(
+    maxsize=LLM_CLIENT_CACHE_SIZE,
+    ttl=LLM_CLIENT_IDLE_SECONDS,
+    name="llm_clients",
+    sliding=True,
+)
+
+# base_url → shared httpx.AsyncClient (keep-alive connection pool per provider host)
+_http_pools: dict[str, httpx.AsyncClient] = {}
+
+
+def _shared_http_client(base_url: str) -> httpx.AsyncClient:
+    client = _http_pools.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=max(1, LLM_HTTP_MAX_CONNECTIONS // 5),
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            follow_redirects=True,
+        )
+        _http_pools[base_url] = client
+    return client
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Salted HMAC-SHA256 of an API key — safe to use as a cache key."""
+    return hmac.new(_KEY_SALT, api_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def get_llm(provider: str, api_key: str, model: str | None = None):
+    """
+    Return a pooled LangChain chat model for provider + key + model.
+
+    Same contract as build_llm(); the client is built on first use and reused
+    until it has been idle for LLM_CLIENT_IDLE_SECONDS.
+    """
+    provider = provider.strip().lower()
+    key = (provider, model or PROVIDER_DEFAULTS.get(provider), key_fingerprint(api_key))
+    llm = _llm_clients.get(key)
+    if llm is None:
+        llm = build_llm(provider=provider, api_key=api_key, model=model)
+        _llm_clients.set(key, llm)
+    return llm
+
+
+def purge_idle_llm_clients() -> int:
+    """Drop clients (and with them the users' keys) idle past their TTL."""
+    return _llm_clients.purge_expired()
+
+
+async def aclose_llm_clients() -> None:
+    """Forget every pooled client and close the shared HTTP pools (app shutdown)."""
+    _llm_clients.clear()
+    pools = list(_http_pools.values())
+    _http_pools.clear()
+    for client in pools:
+        await client.aclose()
+
+
+def llm_client_stats() -> dict:
+    return {**_llm_clients.stats(), "http_pools": len(_http_pools)}
+
+
 def build_llm(provider: str, api_key: str, model: str | None = None):
     """
     Build and return a LangChain chat model for the given provider + key.
@@ -78,7 +176,11 @@ def build_llm(provider: str, api_key: str, model: str | None = None):
     try:
         if provider == "openai":
             from langchain_openai import ChatOpenAI
-            return ChatOpenAI(api_key=api_key, model=resolved_model)
+            return ChatOpenAI(
+                api_key=api_key,
+                model=resolved_model,
+                http_async_client=_shared_http_client(OPENAI_BASE_URL),
+            )
 
         elif provider == "anthropic":
             from langchain_anthropic import ChatAnthropic
@@ -90,14 +192,19 @@ def build_llm(provider: str, api_key: str, model: str | None = None):
 
         elif provider == "groq":
             from langchain_groq import ChatGroq
-            return ChatGroq(api_key=api_key, model=resolved_model)
+            return ChatGroq(
+                api_key=api_key,
+                model=resolved_model,
+                http_async_client=_shared_http_client(GROQ_BASE_URL),
+            )
 
         elif provider == "openrouter":
             from langchain_openai import ChatOpenAI
             return ChatOpenAI(
                 api_key=api_key,
                 model=resolved_model,
-                base_url="https://openrouter.ai/api/v1",
+                base_url=OPENROUTER_BASE_URL,
+                http_async_client=_shared_http_client(OPENROUTER_BASE_URL),
                 default_headers={
                     "HTTP-Referer": "https://github.com/uditbhatia26/sculpt",
                     "X-Title": "ResumeSculpt",
@@ -68,12 +68,17 @@ class parsedJobDescription(BaseModel):
     job_title:       Annotated[str,       Field(..., description="Job Title")]
 
 
+class ParseJDRequest(BaseModel):
+    job_desc:     Annotated[str, Field(..., description="Job Description provided by the user", min_length=50, max_length=20_000)]
+    ai_config:    Optional[AIProviderConfig] = Field(None, description="BYOK AI provider configuration. Optional: without it the JD is parsed locally.")
+
+
 # ==================== ATS SCORING SCHEMAS ====================
 
 class CalculateATS(BaseModel):
     job_desc:     Annotated[str, Field(..., description="Job Description provided by the user", min_length=50, max_length=20_000)]
     jd_cache_id:  Optional[str] = Field(None, description="ID of a previously parsed and cached JD. If provided the LLM parse step is skipped.")
-    ai_config:    AIProviderConfig = Field(..., description="BYOK AI provider configuration")
+    ai_config:    Optional[AIProviderConfig] = Field(None, description="BYOK AI provider configuration. Required unless mode=fast.")
 
 
 class ATS(BaseModel):
@@ -142,6 +147,7 @@ class OptimizeResumeRequest(BaseModel):
     job_desc:           Annotated[str, Field(..., description="Job Description provided by the user", min_length=50, max_length=20_000)]
     jd_cache_id:        Optional[str]   = Field(None,  description="ID of a previously parsed and cached JD. If provided, the LLM JD parse step is skipped.")
     original_ats_score: Optional[float] = Field(None,  description="ATS score already computed by /calculate-ats-detailed. If provided, the original ATS LLM call is skipped.", ge=0, le=100)
+    llm_rescore:        bool            = Field(False, description="Re-score the optimized resume with a full LLM ATS call instead of the incremental local re-score.")
     ai_config:          AIProviderConfig = Field(...,  description="BYOK AI provider configuration")
 
 
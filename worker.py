@@ -0,0 +1,42 @@
+"""
+Standalone optimization worker
+Runs queued /optimize-jobs jobs outside the API process, so optimization
+throughput can be scaled independently of the HTTP tier.
+
+Usage:
+    python worker.py
+
+Run any number of these next to (or instead of) the in-API worker; set
+JOB_RUN_IN_API=false on the API to leave all jobs to them. See config/jobs.py
+for the JOB_* settings.
+"""
+
+import asyncio
+import logging
+import signal
+
+from main import job_worker, pdf_render_pool, aclose_llm_clients, sweep_idle_llm_clients
+
+logger = logging.getLogger("Sculpt")
+
+
+async def run_worker():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    job_worker.start()
+    # Same idle-TTL sweep as the API: pooled BYOK clients and chains must not outlive it here either
+    sweeper = asyncio.create_task(sweep_idle_llm_clients())
+    await stop.wait()
+
+    logger.info("[JOBS] Shutting down worker...")
+    sweeper.cancel()
+    await job_worker.stop()
+    pdf_render_pool.shutdown()
+    await aclose_llm_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())